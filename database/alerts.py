@@ -275,6 +275,82 @@ def get_alert_count_by_id(alert_id):
         if 'conn' in locals() and conn:
             disconnect_from_db(conn)
 
+def get_alert_rowid_stats(after_rowid):
+    """
+    Get the row count and rowid range of the alerts table, used to keep in-memory alert id sets in step with it.
+
+    SQLite reuses the rowid of a deleted newest row, so the counts alone can miss a delete
+    followed by an insert. Deletes therefore bump the AlertsGeneration setting, see
+    record_alerts_deleted, which is returned as well.
+
+    Args:
+        after_rowid (int): Count the rows with a rowid above this as well
+
+    Returns:
+        tuple: (row_count, max_rowid, rows_after, generation), or None if an error occurs
+    """
+    logger = logging.getLogger(__name__)
+
+    try:
+        conn = connect_to_db(CONST_CONSOLIDATED_DB, "alerts")
+        if not conn:
+            log_error(logger, "[ERROR] Unable to connect to alerts database.")
+            return None
+
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*), IFNULL(MAX(rowid), 0) FROM alerts")
+        row_count, max_rowid = cursor.fetchone()
+        cursor.execute("SELECT COUNT(*) FROM alerts WHERE rowid > ? AND rowid <= ?", (after_rowid, max_rowid))
+        rows_after = cursor.fetchone()[0]
+        cursor.execute("SELECT value FROM configuration WHERE key = 'AlertsGeneration'")
+        generation = cursor.fetchone()
+        return row_count, max_rowid, rows_after, generation[0] if generation else None
+
+    except sqlite3.Error as e:
+        log_error(logger, f"[ERROR] Database error while reading alert row statistics: {e}")
+        return None
+    finally:
+        if 'conn' in locals() and conn:
+            disconnect_from_db(conn)
+
+def get_alert_ids_page(suffix, after_rowid, max_rowid, limit):
+    """
+    Get one page of alert ids ending in suffix, in rowid order.
+
+    Args:
+        suffix (str): Alert id suffix, e.g. "_NewOutboundDetection"
+        after_rowid (int): Only return rows with a rowid above this
+        max_rowid (int): Only return rows with a rowid up to this
+        limit (int): Page size
+
+    Returns:
+        list: (rowid, id) tuples, or None if an error occurs
+    """
+    logger = logging.getLogger(__name__)
+
+    try:
+        conn = connect_to_db(CONST_CONSOLIDATED_DB, "alerts")
+        if not conn:
+            log_error(logger, "[ERROR] Unable to connect to alerts database.")
+            return None
+
+        cursor = conn.cursor()
+        # GLOB rather than LIKE so the underscores in the suffix match literally
+        cursor.execute("""
+            SELECT rowid, id FROM alerts
+            WHERE rowid > ? AND rowid <= ? AND id GLOB ?
+            ORDER BY rowid
+            LIMIT ?
+        """, (after_rowid, max_rowid, f"*{suffix}", limit))
+        return cursor.fetchall()
+
+    except sqlite3.Error as e:
+        log_error(logger, f"[ERROR] Database error while reading alert ids: {e}")
+        return None
+    finally:
+        if 'conn' in locals() and conn:
+            disconnect_from_db(conn)
+
 def get_recent_alerts_database():
     """
     Retrieve the most recent 100 alerts from the alerts table.
@@ -324,6 +400,19 @@ def get_recent_alerts_database():
         if 'conn' in locals() and conn:
             disconnect_from_db(conn)
 
+def record_alerts_deleted(cursor):
+    """
+    Bump the AlertsGeneration setting in the transaction that deletes alerts, so in-memory
+    alert id sets reload instead of trusting the row counts, see get_alert_rowid_stats.
+
+    Args:
+        cursor: Cursor of the connection running the delete
+    """
+    cursor.execute("""
+        INSERT OR REPLACE INTO configuration (key, value, last_changed)
+        VALUES ('AlertsGeneration', ?, datetime('now', 'localtime'))
+    """, (str(time.time_ns()),))
+
 def delete_alert_database(alert_id):
     """
     Delete an alert from the database.
@@ -350,6 +439,7 @@ def delete_alert_database(alert_id):
         
         # Check if any rows were affected
         if cursor.rowcount > 0:
+            record_alerts_deleted(cursor)
             conn.commit()
             log_info(logger, f"[INFO] Alert with ID {alert_id} was successfully deleted.")
             return True
@@ -392,7 +482,7 @@ def log_alert_to_db(ip_address, flow, category, alert_enrichment_1, alert_enrich
 
         cursor = conn.cursor()
 
-        # Execute the insert or update query
+        # Execute the insert or update query, a freshly inserted row comes back with times_seen 1
         cursor.execute("""
             INSERT INTO alerts (id, ip_address, flow, category, alert_enrichment_1, alert_enrichment_2, times_seen, first_seen, last_seen, acknowledged)
             VALUES (?, ?, ?, ?, ?, ?, 1, datetime('now', 'localtime'), datetime('now', 'localtime'), 0)
@@ -400,10 +490,10 @@ def log_alert_to_db(ip_address, flow, category, alert_enrichment_1, alert_enrich
             DO UPDATE SET
                 times_seen = times_seen + 1,
                 last_seen = datetime('now', 'localtime')
+            RETURNING times_seen
         """, (alert_id_hash, ip_address, json.dumps(flow), category, alert_enrichment_1, alert_enrichment_2))
 
-        # Check the number of rows affected
-        if conn.total_changes == 1:
+        if cursor.fetchone()[0] == 1:
             operation = "insert"
         else:
             operation = "update"
@@ -419,6 +509,57 @@ def log_alert_to_db(ip_address, flow, category, alert_enrichment_1, alert_enrich
         if 'conn' in locals() and conn:
             disconnect_from_db(conn)
 
+def log_alerts_to_db(alerts):
+    """
+    Log a batch of alerts to the alerts table in a single transaction.
+
+    Each alert is upserted like log_alert_to_db. RETURNING times_seen tells the two cases
+    apart: a freshly inserted row comes back with times_seen 1. Alerts sharing an id are
+    applied in order, so only the first of them can be an insert.
+
+    Args:
+        alerts (list): (ip_address, flow, category, alert_enrichment_1, alert_enrichment_2, alert_id_hash) tuples
+
+    Returns:
+        list: "insert" or "update" for each alert in order, or "error" for every alert if the transaction failed.
+    """
+    logger = logging.getLogger(__name__)
+    if not alerts:
+        return []
+
+    try:
+        conn = connect_to_db(CONST_CONSOLIDATED_DB, "alerts")
+        if not conn:
+            log_error(logger, "[ERROR] Unable to connect to alerts database.")
+            return ["error"] * len(alerts)
+
+        cursor = conn.cursor()
+        operations = []
+        for ip_address, flow, category, alert_enrichment_1, alert_enrichment_2, alert_id_hash in alerts:
+            cursor.execute("""
+                INSERT INTO alerts (id, ip_address, flow, category, alert_enrichment_1, alert_enrichment_2, times_seen, first_seen, last_seen, acknowledged)
+                VALUES (?, ?, ?, ?, ?, ?, 1, datetime('now', 'localtime'), datetime('now', 'localtime'), 0)
+                ON CONFLICT(id)
+                DO UPDATE SET
+                    times_seen = times_seen + 1,
+                    last_seen = datetime('now', 'localtime')
+                RETURNING times_seen
+            """, (alert_id_hash, ip_address, json.dumps(flow), category, alert_enrichment_1, alert_enrichment_2))
+            operations.append("insert" if cursor.fetchone()[0] == 1 else "update")
+
+        conn.commit()
+        log_info(logger, f"[INFO] Logged {len(alerts)} alerts to database ({operations.count('insert')} new).")
+        return operations
+
+    except sqlite3.Error as e:
+        if 'conn' in locals() and conn:
+            conn.rollback()
+        log_error(logger, f"[ERROR] Error logging alerts to database: {e}")
+        return ["error"] * len(alerts)
+    finally:
+        if 'conn' in locals() and conn:
+            disconnect_from_db(conn)
+
 def get_alerts_summary():
     """
     Get a summary of alerts by category from alerts.db.
@@ -12,7 +12,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from init import *
 
 def update_all_flows(rows, config_dict):
-    """Update allflows.db with the rows from newflows.db."""
+    """
+    Update allflows.db with the rows from newflows.db.
+
+    The whole batch is bound to one prepared upsert with executemany inside a
+    single transaction instead of executing the statement row by row.
+    """
     logger = logging.getLogger(__name__)
     conn = connect_to_db(CONST_CONSOLIDATED_DB, "allflows")
     total_packets = 0
@@ -20,29 +25,33 @@ def update_all_flows(rows, config_dict):
 
     if conn:
         try:
-            allflows_cursor = conn.cursor()
+            params = []
             for row in rows:
-                src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes_, flow_start, flow_end, last_seen, times_seen, tags = row
+                src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes_, flow_start, flow_end, last_seen, times_seen, tags = row[:12]
+                tag_bits = (row[12] or 0) if len(row) > 12 else 0
                 total_packets += packets
                 total_bytes += bytes_
+                params.append((src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes_, flow_start, flow_end, tags, tag_bits))
 
-                # Use datetime('now', 'localtime') for the current timestamp
-                allflows_cursor.execute("""
-                    INSERT INTO allflows (
-                        src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes, flow_start, flow_end, times_seen, last_seen, tags
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, datetime('now', 'localtime'), ?)
-                    ON CONFLICT(src_ip, dst_ip, src_port, dst_port, protocol)
-                    DO UPDATE SET
-                        packets = packets + excluded.packets,
-                        bytes = bytes + excluded.bytes,
-                        flow_end = excluded.flow_end,
-                        times_seen = times_seen + 1,
-                        last_seen = datetime('now', 'localtime'),
-                        tags = excluded.tags
-                """, (src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes_, flow_start, flow_end, tags))
+            # Use datetime('now', 'localtime') for the current timestamp
+            conn.executemany("""
+                INSERT INTO allflows (
+                    src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes, flow_start, flow_end, times_seen, last_seen, tags, tag_bits
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, datetime('now', 'localtime'), ?, ?)
+                ON CONFLICT(src_ip, dst_ip, src_port, dst_port, protocol)
+                DO UPDATE SET
+                    packets = packets + excluded.packets,
+                    bytes = bytes + excluded.bytes,
+                    flow_end = excluded.flow_end,
+                    times_seen = times_seen + 1,
+                    last_seen = datetime('now', 'localtime'),
+                    tags = excluded.tags,
+                    tag_bits = excluded.tag_bits
+            """, params)
             conn.commit()
             log_info(logger, f"[INFO] Updated {CONST_CONSOLIDATED_DB} with {len(rows)} rows.")
         except sqlite3.Error as e:
+            conn.rollback()
             log_error(logger, f"[ERROR] Error updating {CONST_CONSOLIDATED_DB}: {e}")
         finally:
             disconnect_from_db(conn)
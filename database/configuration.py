@@ -33,6 +33,35 @@ def get_config_settings():
         if 'conn' in locals() and conn:
             disconnect_from_db(conn)
 
+def get_config_setting(key, default=None):
+    """
+    Read a single configuration setting without loading the whole table.
+
+    Args:
+        key (str): The configuration key
+        default: Value returned when the key is missing or the read fails
+
+    Returns:
+        The configuration value, or default
+    """
+    logger = logging.getLogger(__name__)
+    try:
+        conn = connect_to_db(CONST_CONSOLIDATED_DB, "configuration")
+        if not conn:
+            log_error(logger,"[ERROR] Unable to connect to configuration database")
+            return default
+
+        cursor = conn.cursor()
+        cursor.execute("SELECT value FROM configuration WHERE key = ?", (key,))
+        result = cursor.fetchone()
+        return result[0] if result else default
+    except sqlite3.Error as e:
+        log_error(logger,f"[ERROR] Error reading configuration setting {key}: {e}")
+        return default
+    finally:
+        if 'conn' in locals() and conn:
+            disconnect_from_db(conn)
+
 def update_config_setting(key, value):
     """
     Insert or update a configuration setting in the database.
@@ -1,4 +1,5 @@
 import os
+import re
 import sqlite3
 import sys
 from datetime import datetime, timedelta
@@ -13,14 +14,128 @@ if parent_dir not in sys.path:
 sys.path.insert(0, "/database")
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
+import threading
+import weakref
 from locallogging import log_info, log_error
+from src.const import CONST_SQLITE_MMAP_SIZE, CONST_SQLITE_CACHE_SIZE
+
+# Reused connections, one per database in each thread's pooled_connections.connections,
+# so a connection is released together with its thread
+pooled_connections = threading.local()
+# Every pooled connection still open in this process, for close_pooled_connections
+open_pooled_connections = weakref.WeakSet()
+pooled_connections_lock = threading.Lock()
+connection_pool_enabled = True
+
+class PooledConnection(sqlite3.Connection):
+    """
+    SQLite connection kept open in its thread's pool between connect_to_db calls.
+
+    Callers get a ConnectionCheckout wrapping it, and the connection is only shared
+    while no transaction is open, so one caller's commit or rollback never touches
+    another caller's work.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.closed = False
+        self.pid = os.getpid()
+        self.db_name = args[0] if args else kwargs.get("database")
+
+    def close_connection(self):
+        """Really close the underlying SQLite connection."""
+        self.closed = True
+        super().close()
+
+class ConnectionCheckout:
+    """
+    One connect_to_db checkout of a pooled connection.
+
+    Everything except close() is passed through to the connection. close() releases
+    the checkout once and rolls back a transaction the caller left open, like closing
+    a real connection would; later calls are ignored. A checkout dropped without
+    close() is released when it is garbage collected.
+    """
+
+    __slots__ = ('connection', 'released')
+
+    def __init__(self, connection):
+        object.__setattr__(self, 'connection', connection)
+        object.__setattr__(self, 'released', False)
+        connection.checkouts += 1
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.connection, name, value)
+
+    def __enter__(self):
+        return self.connection.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self.connection.__exit__(*exc_info)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def close(self):
+        if self.released:
+            return
+        object.__setattr__(self, 'released', True)
+        connection = self.connection
+        connection.checkouts -= 1
+        if connection.closed:
+            return
+        if connection.in_transaction:
+            connection.rollback()
+        if connection.checkouts == 0:
+            connection.isolation_level = ""
+
+def apply_connection_pragmas(conn):
+    """
+    Apply the performance PRAGMAs used for every pooled connection.
+
+    Args:
+        conn: Newly opened SQLite connection
+    """
+    conn.execute("PRAGMA busy_timeout = 10000")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute(f"PRAGMA mmap_size = {int(CONST_SQLITE_MMAP_SIZE)}")
+    conn.execute(f"PRAGMA cache_size = {int(CONST_SQLITE_CACHE_SIZE)}")
+
+def close_pooled_connections(db_name=None):
+    """
+    Really close pooled connections held by this process.
+
+    Args:
+        db_name (str, optional): Only close connections to this database file
+    """
+    with pooled_connections_lock:
+        connections = list(open_pooled_connections)
+    for conn in connections:
+        if conn.pid == os.getpid() and not conn.closed and (db_name is None or conn.db_name == db_name):
+            try:
+                conn.close_connection()
+            except sqlite3.Error:
+                pass
 
 def delete_database(db_path):
     """Deletes the specified SQLite database file if it exists."""
     logger = logging.getLogger(__name__)
     try:
+        close_pooled_connections(db_path)
         if os.path.exists(db_path):
             os.remove(db_path)
+            for suffix in ("-wal", "-shm"):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
             log_info(logger, f"[INFO] Deleted: {db_path}")
         else:
             log_info(logger, f"[INFO] {db_path} does not exist, skipping deletion.")
@@ -28,14 +143,43 @@ def delete_database(db_path):
         log_error(logger,f"[ERROR] Error deleting {db_path}: {e}")
 
 def connect_to_db(DB_NAME,table):
-    """Establish a connection to the specified database."""
+    """
+    Establish a connection to the specified database.
+
+    Connections are kept per process and thread and reused by later calls, so
+    disconnect_from_db only releases them. WAL and the other PRAGMAs are applied
+    once when a connection is first opened. While an outer caller on the same thread
+    has a transaction open, a separate connection is returned instead.
+    """
     logger = logging.getLogger(__name__)
 
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.execute("PRAGMA busy_timeout = 10000")
-        #log_info(logger, f"[INFO] Connected to database: {DB_NAME} table {table}")
-        return conn
+        if not connection_pool_enabled:
+            conn = sqlite3.connect(DB_NAME)
+            conn.execute("PRAGMA busy_timeout = 10000")
+            return conn
+
+        connections = getattr(pooled_connections, "connections", None)
+        if connections is None:
+            connections = pooled_connections.connections = {}
+        # The process id keeps a forked child off its parent's connections
+        key = (os.getpid(), DB_NAME)
+        conn = connections.get(key)
+        if conn is not None and not conn.closed and conn.in_transaction:
+            if conn.checkouts:
+                # An outer caller's transaction is open, keep this caller's commits and rollbacks away from it
+                conn = sqlite3.connect(DB_NAME)
+                apply_connection_pragmas(conn)
+                return conn
+            conn.rollback()
+        if conn is None or conn.closed:
+            conn = sqlite3.connect(DB_NAME, factory=PooledConnection, check_same_thread=False)
+            apply_connection_pragmas(conn)
+            connections[key] = conn
+            with pooled_connections_lock:
+                open_pooled_connections.add(conn)
+            #log_info(logger, f"[INFO] Connected to database: {DB_NAME} table {table}")
+        return ConnectionCheckout(conn)
     except sqlite3.Error as e:
         log_error(logger,f"[ERROR] Error connecting to database {DB_NAME} table {table}: {e}")
         return None
@@ -74,6 +218,32 @@ def create_table(db_name, create_table_sql, table):
     except sqlite3.Error as e:
         log_error(logger,f"[ERROR] Error initializing {db_name}: {e}")
 
+def add_column_if_missing(db_name, table_name, column_name, column_definition):
+    """
+    Add a column to an existing table created by an older version of the schema.
+
+    Args:
+        db_name (str): Database file
+        table_name (str): Table to check
+        column_name (str): Column that must exist
+        column_definition (str): Type and default, e.g. "INTEGER DEFAULT 0"
+    """
+    logger = logging.getLogger(__name__)
+    conn = connect_to_db(db_name, table_name)
+    if not conn:
+        log_error(logger,f"[ERROR] Unable to connect to {db_name}")
+        return
+    try:
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table_name})")]
+        if column_name not in columns:
+            conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_definition}")
+            conn.commit()
+            log_info(logger, f"[INFO] Added column {column_name} to {db_name} table {table_name}")
+    except sqlite3.Error as e:
+        log_error(logger,f"[ERROR] Error adding column {column_name} to {db_name} {table_name}: {e}")
+    finally:
+        disconnect_from_db(conn)
+
 def delete_all_records(db_name, table_name):
     """Delete all records from the specified database and table."""
     logger = logging.getLogger(__name__)
@@ -90,6 +260,71 @@ def delete_all_records(db_name, table_name):
             disconnect_from_db(conn)
     disconnect_from_db(conn)
 
+def bulk_replace_table(db_name, table_name, create_table_sql, columns, rows, index_columns=None):
+    """
+    Replace the contents of a table in one transaction through a shadow table.
+
+    Rows are streamed with executemany into {table_name}_shadow, which is then swapped
+    in with ALTER TABLE ... RENAME and indexed before the commit. Readers keep seeing
+    the previous rows until the commit and never see a partially loaded table.
+
+    Args:
+        db_name (str): The database file path
+        table_name (str): The table to replace
+        create_table_sql (str): The table's CREATE TABLE IF NOT EXISTS statement
+        columns (tuple): Column names the rows provide values for
+        rows: Iterable of row tuples, consumed once
+        index_columns (list): Column tuples to build an index on, e.g. [("start_ip", "end_ip")]
+
+    Returns:
+        int: Number of rows loaded, or None if the load failed and the table was left unchanged
+    """
+    logger = logging.getLogger(__name__)
+    shadow_table = f"{table_name}_shadow"
+    old_table = f"{table_name}_old"
+
+    shadow_sql, replaced = re.subn(rf"CREATE TABLE IF NOT EXISTS\s+{table_name}\b", f"CREATE TABLE {shadow_table}", create_table_sql, count=1)
+    if not replaced:
+        log_error(logger, f"[ERROR] No CREATE TABLE statement for {table_name} to build a shadow table from")
+        return None
+
+    conn = connect_to_db(db_name, table_name)
+    if not conn:
+        return None
+
+    try:
+        start = time.perf_counter()
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(f"DROP TABLE IF EXISTS {shadow_table}")
+        cursor.execute(shadow_sql)
+        cursor.executemany(
+            f"INSERT OR IGNORE INTO {shadow_table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            rows
+        )
+        row_count = cursor.execute(f"SELECT COUNT(*) FROM {shadow_table}").fetchone()[0]
+
+        cursor.execute(f"DROP TABLE IF EXISTS {old_table}")
+        table_exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)).fetchone()
+        if table_exists:
+            cursor.execute(f"ALTER TABLE {table_name} RENAME TO {old_table}")
+        cursor.execute(f"ALTER TABLE {shadow_table} RENAME TO {table_name}")
+        if table_exists:
+            cursor.execute(f"DROP TABLE {old_table}")
+        # Built after the old table and its indexes are gone, so index names stay stable across loads
+        for index in index_columns or []:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_{'_'.join(index)} ON {table_name} ({', '.join(index)})")
+        conn.commit()
+
+        log_info(logger, f"[PERFORMANCE] Bulk loaded {row_count} rows into {table_name} in {time.perf_counter() - start:.2f} seconds")
+        return row_count
+    except Exception as e:
+        conn.rollback()
+        log_error(logger, f"[ERROR] Error bulk loading {table_name}, keeping the previous rows: {e}")
+        return None
+    finally:
+        disconnect_from_db(conn)
+
 def get_row_count(db_name, table_name):
     """
     Get the total number of rows in a specified database table.
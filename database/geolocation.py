@@ -1,6 +1,6 @@
 import os
 import sys
-from database.core import connect_to_db, disconnect_from_db
+from database.core import connect_to_db, disconnect_from_db, bulk_replace_table
 from pathlib import Path
 # Set up path for imports
 current_dir = Path(__file__).resolve().parent
@@ -57,6 +57,21 @@ def insert_geolocation(rows):
         # Properly disconnect from the database
         disconnect_from_db(conn)
 
+def replace_geolocations(rows):
+    """
+    Replace every geolocation record in one transaction, see bulk_replace_table.
+
+    Args:
+        rows: Iterable of (network, start_ip, end_ip, netmask, country_name) tuples
+
+    Returns:
+        int: Number of records loaded, or None if the load failed and the previous records were kept
+    """
+    return bulk_replace_table(
+        CONST_CONSOLIDATED_DB, "geolocation", CONST_CREATE_GEOLOCATION_SQL,
+        ("network", "start_ip", "end_ip", "netmask", "country_name"), rows, [("start_ip", "end_ip")]
+    )
+
 def get_all_geolocations():
     """
     Retrieve all geolocation records from the database.
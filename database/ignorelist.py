@@ -153,9 +153,9 @@ def insert_ignorelist_entry(ignorelist_id, src_ip, dst_ip, dst_port, protocol):
     
     Args:
         ignorelist_id (str): A unique identifier for the ignorelist entry
-        src_ip (str): Source IP address to ignore
-        dst_ip (str): Destination IP address to ignore
-        dst_port (str): Destination port to ignore
+        src_ip (str): Source IP address or CIDR prefix to ignore
+        dst_ip (str): Destination IP address or CIDR prefix to ignore
+        dst_port (str): Destination port or port range (e.g. '8000-8100') to ignore
         protocol (str): Protocol to ignore (e.g., 'tcp', 'udp')
         
     Returns:
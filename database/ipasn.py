@@ -10,6 +10,7 @@ if parent_dir not in sys.path:
 sys.path.insert(0, "/database")
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from init import *
+from integrations.ipintel import get_ip_intel
 
 
 def get_asn_for_ip(ip_address):
@@ -31,6 +32,19 @@ def get_asn_for_ip(ip_address):
         if ip_int is None:
             log_error(logger, f"[ERROR] Invalid IP address format: {ip_address}")
             return None
+
+        # Use the compiled IP intelligence file when the fetch process has written one
+        ip_intel = get_ip_intel()
+        if ip_intel is not None:
+            intel = ip_intel.lookup(ip_int)
+            if not intel or not intel["asn"]:
+                log_info(logger, f"[INFO] No ASN information found for IP: {ip_address}")
+                return None
+            return {
+                "asn": intel["asn"],
+                "isp_name": intel["isp_name"],
+                "network": intel["asn_network"]
+            }
             
         # Connect to the database
         conn = connect_to_db(CONST_CONSOLIDATED_DB, "asn")
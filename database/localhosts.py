@@ -482,6 +482,7 @@ def delete_alerts_by_ip(ip_address):
         
         # Delete all alerts for the specified IP address
         cursor.execute("DELETE FROM alerts WHERE ip_address = ?", (ip_address,))
+        record_alerts_deleted(cursor)
         
         conn.commit()
         log_info(logger, f"[INFO] Successfully deleted {count} alerts for IP address: {ip_address}")
@@ -54,14 +54,64 @@ def get_new_flows():
         if conn:
             disconnect_from_db(conn)
 
+def claim_new_flows():
+    """
+    Read and remove every flow in newflows up to the current rowid watermark in one short transaction.
+
+    The collector keeps upserting while the processor works on the claimed rows, and
+    anything written after the claim stays in newflows for the next cycle.
+
+    Returns:
+        list: A list of lists containing the claimed flow records,
+              or an empty list if an error occurs.
+    """
+    logger = logging.getLogger(__name__)
+    conn = None
+
+    try:
+        conn = connect_to_db(CONST_CONSOLIDATED_DB, "newflows")
+        if not conn:
+            log_error(logger, "[ERROR] Failed to connect to newflows database")
+            return []
+
+        # Manage the transaction explicitly so SELECT and DELETE see the same rows
+        conn.isolation_level = None
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute("SELECT MAX(rowid) FROM newflows")
+            watermark = cursor.fetchone()[0]
+            if watermark is None:
+                cursor.execute("COMMIT")
+                return []
+
+            cursor.execute("SELECT * FROM newflows WHERE rowid <= ?", (watermark,))
+            rows = [list(row) for row in cursor.fetchall()]
+            cursor.execute("DELETE FROM newflows WHERE rowid <= ?", (watermark,))
+            cursor.execute("COMMIT")
+        except sqlite3.Error:
+            cursor.execute("ROLLBACK")
+            raise
+
+        log_info(logger, f"[INFO] Claimed {len(rows)} flow records from newflows database up to rowid {watermark}")
+        return rows
+
+    except Exception as e:
+        log_error(logger, f"[ERROR] Failed to claim flows from newflows database: {e}")
+        return []
+
+    finally:
+        if conn:
+            disconnect_from_db(conn)
+
 def update_new_flow(record):
     conn = connect_to_db(CONST_CONSOLIDATED_DB, "newflows")
     c = conn.cursor()
 
     c.execute('''
         INSERT INTO newflows (
-            src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes, flow_start, flow_end, last_seen, times_seen, tags
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now', 'localtime'), 1,?)
+            src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes, flow_start, flow_end, last_seen, times_seen, tags, tag_bits
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now', 'localtime'), 1,?,?)
         ON CONFLICT(src_ip, dst_ip, src_port, dst_port, protocol)
         DO UPDATE SET 
             packets = packets + excluded.packets,
@@ -69,7 +119,52 @@ def update_new_flow(record):
             flow_end = excluded.flow_end,
             last_seen = excluded.last_seen,
             times_seen = times_seen + 1
-    ''', (record['src_ip'], record['dst_ip'], record['src_port'], record['dst_port'],record['protocol'], record['packets'], record['bytes'], record['start_time'], record['end_time'],  record['tags']))
+    ''', (record['src_ip'], record['dst_ip'], record['src_port'], record['dst_port'],record['protocol'], record['packets'], record['bytes'], record['start_time'], record['end_time'],  record['tags'], record.get('tag_bits', 0)))
 
     conn.commit()
     disconnect_from_db(conn)
+
+
+def update_new_flows_bulk(conn, flow_table):
+    """
+    Upsert an aggregated flow table into newflows with one executemany in one transaction.
+
+    Args:
+        conn: Open SQLite connection owned by the caller and reused across flushes
+        flow_table (dict): (src_ip, dst_ip, src_port, dst_port, protocol) with integer IPs ->
+                           [packets, bytes, flow_start, flow_end, times_seen, tags, tag_bits]
+
+    Returns:
+        int: Number of aggregated flows written, or -1 if an error occurs
+    """
+    logger = logging.getLogger(__name__)
+
+    if not flow_table:
+        return 0
+
+    # Text conversion happens here, where the database actually needs it
+    params = (
+        (int_to_ip(src_ip), int_to_ip(dst_ip), src_port, dst_port, protocol,
+         packets, bytes_, flow_start, flow_end, times_seen, tags, tag_bits)
+        for (src_ip, dst_ip, src_port, dst_port, protocol), (packets, bytes_, flow_start, flow_end, times_seen, tags, tag_bits)
+        in flow_table.items()
+    )
+
+    try:
+        with conn:
+            conn.executemany('''
+                INSERT INTO newflows (
+                    src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes, flow_start, flow_end, last_seen, times_seen, tags, tag_bits
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now', 'localtime'), ?, ?, ?)
+                ON CONFLICT(src_ip, dst_ip, src_port, dst_port, protocol)
+                DO UPDATE SET 
+                    packets = packets + excluded.packets,
+                    bytes = bytes + excluded.bytes,
+                    flow_end = excluded.flow_end,
+                    last_seen = excluded.last_seen,
+                    times_seen = times_seen + excluded.times_seen
+            ''', params)
+        return len(flow_table)
+    except sqlite3.Error as e:
+        log_error(logger, f"[ERROR] Failed to write aggregated flows to newflows database: {e}")
+        return -1
@@ -1,6 +1,6 @@
 import os
 import sys
-from database.core import connect_to_db, disconnect_from_db
+from database.core import connect_to_db, disconnect_from_db, bulk_replace_table
 from pathlib import Path
 # Set up path for imports
 current_dir = Path(__file__).resolve().parent
@@ -53,6 +53,21 @@ def insert_reputation(network, start_ip, end_ip, netmask):
         # Properly disconnect from the database
         disconnect_from_db(conn)
 
+def replace_reputation_records(rows):
+    """
+    Replace every reputation record in one transaction, see bulk_replace_table.
+
+    Args:
+        rows: Iterable of (network, start_ip, end_ip, netmask) tuples
+
+    Returns:
+        int: Number of records loaded, or None if the load failed and the previous records were kept
+    """
+    return bulk_replace_table(
+        CONST_CONSOLIDATED_DB, "reputationlist", CONST_CREATE_REPUTATIONLIST_SQL,
+        ("network", "start_ip", "end_ip", "netmask"), rows, [("start_ip", "end_ip")]
+    )
+
 def get_all_reputation_records():
     """
     Retrieve all reputation records from the database.
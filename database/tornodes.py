@@ -1,6 +1,6 @@
 import os
 import sys
-from database.core import connect_to_db, disconnect_from_db
+from database.core import connect_to_db, disconnect_from_db, bulk_replace_table
 from pathlib import Path
 # Set up path for imports
 current_dir = Path(__file__).resolve().parent
@@ -87,4 +87,20 @@ def insert_tor_node(ip_address):
         return False
     finally:
         # Properly disconnect from the database
-        disconnect_from_db(conn)
\ No newline at end of file
+        disconnect_from_db(conn)
+
+def replace_tor_nodes(ip_addresses):
+    """
+    Replace the Tor node list in one transaction, see bulk_replace_table.
+
+    Args:
+        ip_addresses: Iterable of Tor node IP addresses
+
+    Returns:
+        int: Number of nodes loaded, or None if the load failed and the previous list was kept
+    """
+    import_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return bulk_replace_table(
+        CONST_CONSOLIDATED_DB, "tornodes", CONST_CREATE_TORNODES_SQL,
+        ("ip_address", "import_date"), ((ip_address, import_date) for ip_address in ip_addresses)
+    )
@@ -67,16 +67,16 @@ def update_traffic_stats(rows, config_dict):
         log_error(logger, "[ERROR] Unable to connect to allflows database.")
         return
 
-    LOCAL_NETWORKS = set(config_dict['LocalNetworks'].split(','))
+    LOCAL_NETWORKS = get_network_set(config_dict['LocalNetworks'])
 
     try:
         cursor = conn.cursor()
 
         # Process each row and update the trafficstats table
         for row in rows:
-            src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes_, flow_start, flow_end, last_seen, times_seen, tags = row
+            src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes_, flow_start, flow_end, last_seen, times_seen, tags, *_ = row
 
-            if not is_ip_in_range(src_ip, LOCAL_NETWORKS):
+            if src_ip not in LOCAL_NETWORKS:
                 continue
 
             # Format the timestamp as yyyy-mm-dd-hh
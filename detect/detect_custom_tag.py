@@ -16,45 +16,39 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
 from locallogging import log_info, log_error, log_warn
 from notifications.core import handle_alert
+from src.detectionengine import FlowDetector, run_detectors
 from init import *
 
-def detect_custom_tag(rows, config_dict):
-    """
-    Detect and alert on rows with tags matching the AlertOnCustomTag configuration.
 
-    Args:
-        rows: List of flow records.
-        config_dict: Dictionary containing configuration settings.
-    """
-    logger = logging.getLogger(__name__)
-    log_info(logger, "[INFO] Started detecting custom tag alerts")
+class CustomTagDetector(FlowDetector):
+    """Flows from local hosts carrying one of the AlertOnCustomTagList tags."""
+
+    name = "CustomTagAlertDetection"
 
-    # Get the list of tags to alert on
-    alert_tags = set(tag.strip() for tag in config_dict.get("AlertOnCustomTagList", "").split(",") if tag.strip())
+    def start(self):
+        log_info(self.logger, "[INFO] Started detecting custom tag alerts")
 
-    if not alert_tags:
-        log_warn(logger, "[WARN] No tags specified in AlertOnCustomTag.")
-        return
+        # Get the list of tags to alert on
+        self.alert_tags = set(tag.strip() for tag in self.config_dict.get("AlertOnCustomTagList", "").split(",") if tag.strip())
 
-    LOCAL_NETWORKS = set(config_dict['LocalNetworks'].split(','))
+        if not self.alert_tags:
+            log_warn(self.logger, "[WARN] No tags specified in AlertOnCustomTag.")
+            return False
 
-    log_info(logger, f"[INFO] Alerting on the following tags: {alert_tags}")
+        log_info(self.logger, f"[INFO] Alerting on the following tags: {self.alert_tags}")
 
-    # Iterate through rows to check for matching tags
-    for row in rows:
-        src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes, flow_start, flow_end, times_seen, last_seen, tags = row
-        # Ensure the row has a 'tags' column
+    def process_row(self, flows, i):
+        if not flows.src_local[i]:
+            return
 
-        if not is_ip_in_range(src_ip, LOCAL_NETWORKS):
-            continue
+        tags = flows.tags[i]
 
         # Check if any tag in the row matches the alert tags
         row_tags = set(tags.split(";")) if tags else set()
-        matching_tags = row_tags.intersection(alert_tags)
+        matching_tags = row_tags.intersection(self.alert_tags)
 
         if matching_tags:
-            # Generate an alert for the matching tags
-
+            src_ip, dst_ip, dst_port, protocol = flows.src_ip[i], flows.dst_ip[i], flows.dst_port[i], flows.protocol[i]
             alert_id = f"{src_ip}_{dst_ip}_{protocol}_{dst_port}_CustomTagAlert_{matching_tags}"
 
             message = (f"Custom Tag Alert Detected:\n"
@@ -63,19 +57,29 @@ def detect_custom_tag(rows, config_dict):
                        f"Protocol: {protocol}\n"
                        f"Matching Tags: {', '.join(matching_tags)}")
 
-            log_info(logger, f"[INFO] Custom tag alert detected: {src_ip} -> {dst_ip}:{dst_port} Tags: {', '.join(matching_tags)} ")
+            log_info(self.logger, f"[INFO] Custom tag alert detected: {src_ip} -> {dst_ip}:{dst_port} Tags: {', '.join(matching_tags)} ")
 
-            # Call the reusable function
-            handle_alert(
-                config_dict,
+            self.alert(
                 "CustomTagAlertDetection",
                 message,
                 src_ip,
-                row,
+                flows.rows[i],
                 "Custom Tag Alert Detected",
                 dst_ip,
                 f"Tags: {', '.join(matching_tags)}",
                 alert_id
             )
 
-    log_info(logger, "[INFO] Finished detecting custom tag alerts")
\ No newline at end of file
+    def finish(self):
+        log_info(self.logger, "[INFO] Finished detecting custom tag alerts")
+
+
+def detect_custom_tag(rows, config_dict):
+    """
+    Detect and alert on rows with tags matching the AlertOnCustomTag configuration.
+
+    Args:
+        rows: List of flow records.
+        config_dict: Dictionary containing configuration settings.
+    """
+    run_detectors(rows, config_dict, [CustomTagDetector(config_dict)])
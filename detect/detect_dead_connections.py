@@ -15,8 +15,64 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
 from locallogging import log_info, log_error, log_warn
 from notifications.core import handle_alert
+from src.detectionengine import FlowDetector, run_detectors
 from init import *
 
+
+class DeadConnectionDetector(FlowDetector):
+    """Local flows that keep sending without ever getting a response, read from allflows."""
+
+    name = "DeadConnectionDetection"
+    uses_rows = False
+
+    def start(self):
+        log_info(self.logger, f"[INFO] Started detecting unresponsive destinations")
+
+    def finish(self):
+        # Get local networks from the configuration
+        LOCAL_NETWORKS = get_network_set(self.config_dict['LocalNetworks'])
+        dead_connections = get_dead_connections_from_database()
+
+        log_info(self.logger, f"[INFO] Found {len(dead_connections)} potential dead connections")
+
+        for row in dead_connections:
+            src_ip = row[0]
+            dst_ip = row[1]
+            dst_port = row[2]
+            protocol = row[5]
+            row_tags = row[6]  # Existing tags for the flow
+
+            # Skip if src_ip is not in LOCAL_NETWORKS
+            if src_ip not in LOCAL_NETWORKS:
+                continue
+
+            alert_id = f"{src_ip}_{dst_ip}_{protocol}_{dst_port}_DeadConnection"
+
+            message = (f"Dead Connection Detected:\n"
+                        f"Source: {src_ip}\n"
+                        f"Destination: {dst_ip}:{dst_port}\n"
+                        f"Protocol: {protocol}\n")
+
+            log_info(self.logger, f"[INFO] Dead connection detected: {src_ip}->{dst_ip}:{dst_port} {protocol}")
+
+            # Add a Tag to the matching row using update_tag
+            if not update_tag_to_allflows("allflows", "DeadConnectionDetection;", src_ip, dst_ip, dst_port):
+                log_error(self.logger, f"[ERROR] Failed to add tag for flow: {src_ip} -> {dst_ip}:{dst_port}")
+
+            self.alert(
+                "DeadConnectionDetection",
+                message,
+                src_ip,
+                row,
+                "Dead Connection Detected",
+                dst_ip,
+                dst_port,
+                alert_id
+            )
+
+        log_info(self.logger, f"[INFO] Finished detecting unresponsive destinations")
+
+
 def detect_dead_connections(config_dict):
     """
     Detect dead connections by finding flows with:
@@ -28,50 +84,4 @@ def detect_dead_connections(config_dict):
     Args:
         config_dict: Dictionary containing configuration settings
     """
-    logger = logging.getLogger(__name__)
-    log_info(logger, f"[INFO] Started detecting unresponsive destinations")
-
-    # Get local networks from the configuration
-    LOCAL_NETWORKS = set(config_dict['LocalNetworks'].split(','))
-    dead_connections = get_dead_connections_from_database()
-
-    log_info(logger, f"[INFO] Found {len(dead_connections)} potential dead connections")
-
-    for row in dead_connections:
-        src_ip = row[0]
-        dst_ip = row[1]
-        dst_port = row[2]
-        protocol = row[5]
-        row_tags = row[6]  # Existing tags for the flow
-
-        # Skip if src_ip is not in LOCAL_NETWORKS
-        if not is_ip_in_range(src_ip, LOCAL_NETWORKS):
-            continue
-
-        alert_id = f"{src_ip}_{dst_ip}_{protocol}_{dst_port}_DeadConnection"
-        
-        message = (f"Dead Connection Detected:\n"
-                    f"Source: {src_ip}\n"
-                    f"Destination: {dst_ip}:{dst_port}\n"
-                    f"Protocol: {protocol}\n")
-        
-        log_info(logger, f"[INFO] Dead connection detected: {src_ip}->{dst_ip}:{dst_port} {protocol}")
-        
-        # Add a Tag to the matching row using update_tag
-        if not update_tag_to_allflows("allflows", "DeadConnectionDetection;", src_ip, dst_ip, dst_port):
-            log_error(logger, f"[ERROR] Failed to add tag for flow: {src_ip} -> {dst_ip}:{dst_port}")
-
-
-        handle_alert(
-            config_dict,
-            "DeadConnectionDetection",
-            message,
-            src_ip,
-            row,
-            "Dead Connection Detected",
-            dst_ip,
-            dst_port,
-            alert_id
-        )
-
-    log_info(logger, f"[INFO] Finished detecting unresponsive destinations")
\ No newline at end of file
+    run_detectors([], config_dict, [DeadConnectionDetector(config_dict)])
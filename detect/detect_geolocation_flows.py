@@ -16,84 +16,77 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
 from locallogging import log_info, log_error, log_warn
 from notifications.core import handle_alert
+from src.detectionengine import FlowDetector, run_detectors
+from integrations.geolocation import GeolocationIndex, get_geolocation_index
 from init import *
 
-def detect_geolocation_flows(rows, config_dict, geolocation_data):
-    """
-    Optimized version of geolocation flow detection.
-    Uses set lookups and precomputed data structures for better performance.
-    """
-    logger = logging.getLogger(__name__)
-    
-    log_info(logger,"[INFO] Started detecting flows involving banned geolocations")
-    
-    # Convert banned countries to a set for O(1) lookups
-    banned_countries = set(
-        country.strip() 
-        for country in config_dict.get("BannedCountryList", "").split(",") 
-        if country.strip()
-    )
-
-    if not banned_countries:
-        log_warn(logger, "[WARN] No banned countries specified in BannedCountryList.")
-        return
-
-    # Debug: Print banned countries
-    #log_info(logger, f"[DEBUG] Banned countries: {banned_countries}")
-
-    # Pre-process geolocation data into ranges
-    geo_ranges = []
-    for entry in geolocation_data:
-        if len(entry) >= 5:  # Ensure entry has at least 5 elements
-            network, start_ip, end_ip, netmask, country = entry[:5]  # Take first 4 elements
-            if country in banned_countries:
-                geo_ranges.append((start_ip, end_ip, netmask, country))
-
-    # Sort ranges by start_ip for efficient lookup
-    geo_ranges.sort(key=lambda x: x[0])
-    
-    def find_matching_country(ip_int):
-        """Find matching country for an IP using linear search with early exit"""
-        if not ip_int:
-            return None
-
-        best_match = None
-        best_netmask = -1
-
-        for start_ip, end_ip, netmask, country in geo_ranges:
-            if start_ip <= ip_int <= end_ip:
-                if netmask > best_netmask:
-                    best_match = country
-                    best_netmask = netmask
-            elif start_ip > ip_int:
-                break  # Early exit if we've passed possible matches
-
-        return best_match
-
-    # Process rows
-    total = len(rows)
-    matches = 0
-    for index, row in enumerate(rows, 1):
-        if index % 1000 == 0:
-            print(f"\rProcessing geolocation flows: {index}/{total} (matches: {matches})", end='', flush=True)
-            
-        src_ip, dst_ip, src_port, dst_port, protocol, *_ = row
-        
-        # Convert IPs to integers
-        src_ip_int = ip_to_int(src_ip)
-        dst_ip_int = ip_to_int(dst_ip)
-        
+
+class GeolocationFlowsDetector(FlowDetector):
+    """Flows involving an address in one of the BannedCountryList countries."""
+
+    name = "GeolocationFlowsDetection"
+
+    def __init__(self, config_dict, geolocation_data=None):
+        """
+        Args:
+            config_dict: Dictionary containing configuration settings
+            geolocation_data: A GeolocationIndex, geolocation rows to index, or None to use
+                              the process's shared index when the detector starts
+        """
+        super().__init__(config_dict)
+        if geolocation_data is None or isinstance(geolocation_data, GeolocationIndex):
+            self.geolocation_index = geolocation_data
+        else:
+            self.geolocation_index = GeolocationIndex(geolocation_data)
+        self.total = 0
+        self.matches = 0
+
+    def start(self):
+        log_info(self.logger,"[INFO] Started detecting flows involving banned geolocations")
+
+        # Convert banned countries to a set for O(1) lookups
+        banned_countries = set(
+            country.strip()
+            for country in self.config_dict.get("BannedCountryList", "").split(",")
+            if country.strip()
+        )
+
+        if not banned_countries:
+            log_warn(self.logger, "[WARN] No banned countries specified in BannedCountryList.")
+            return False
+
+        if self.geolocation_index is None:
+            self.geolocation_index = get_geolocation_index(self.config_dict.get('GeolocationGeneration'))
+
+        # Lookups return a country code, so a banned check is one set membership test
+        self.banned_codes = self.geolocation_index.codes_for(banned_countries)
+        self.countries = self.geolocation_index.countries
+
+    def find_matching_country(self, ip_int):
+        """Return the banned country an address falls in, or None"""
+        code = self.geolocation_index.lookup_code(ip_int)
+        if code in self.banned_codes:
+            return self.countries[code]
+        return None
+
+    def process_row(self, flows, i):
+        self.total += 1
+        if self.total % 1000 == 0:
+            print(f"\rProcessing geolocation flows: {self.total} (matches: {self.matches})", end='', flush=True)
+
+        src_ip_int = flows.src_int[i]
+        dst_ip_int = flows.dst_int[i]
+
         if not src_ip_int and not dst_ip_int:
-            continue
+            return
 
         # Find matching countries
-        src_country = find_matching_country(src_ip_int)
-        dst_country = find_matching_country(dst_ip_int)
+        src_country = self.find_matching_country(src_ip_int)
+        dst_country = self.find_matching_country(dst_ip_int)
 
-        #log_info(logger, f"[DEBUG] src_ip: {src_ip}, dst_ip: {dst_ip}, src_country: {src_country}, dst_country: {dst_country}")
         if src_country or dst_country:
-            log_info(logger, f"[INFO] Flow involves an IP in a banned country: {src_ip} ({src_country}) and {dst_ip} ({dst_country})")
-
+            src_ip, dst_ip, protocol = flows.src_ip[i], flows.dst_ip[i], flows.protocol[i]
+            log_info(self.logger, f"[INFO] Flow involves an IP in a banned country: {src_ip} ({src_country}) and {dst_ip} ({dst_country})")
 
             local_ip = None
             remote_ip = None
@@ -107,25 +100,32 @@ def detect_geolocation_flows(rows, config_dict, geolocation_data):
                 remote_country = src_country
                 remote_ip = src_ip
 
-            matches += 1
+            self.matches += 1
             message = (f"Flow involves an IP in a banned country:\n"
                       f"Local IP: {local_ip}\n"
                       f"Remote IP: {remote_ip} ({remote_country or 'N/A'})")
 
             alert_id = f"{local_ip}_{remote_ip}_{protocol}_BannedCountryDetection"
 
-
-            handle_alert(
-                config_dict,
+            self.alert(
                 "GeolocationFlowsDetection",
                 message,
                 local_ip,
-                row,
+                flows.rows[i],
                 "Flow involves an IP in a banned country",
                 remote_ip,
                 remote_country,
                 alert_id
             )
 
-    print()  # Final newline
-    log_info(logger, f"[INFO] Completed geolocation processing. Found {matches} matches in {total} flows")
+    def finish(self):
+        print()  # Final newline
+        log_info(self.logger, f"[INFO] Completed geolocation processing. Found {self.matches} matches in {self.total} flows")
+
+
+def detect_geolocation_flows(rows, config_dict, geolocation_data=None):
+    """
+    Detect flows involving an address in one of the BannedCountryList countries.
+    geolocation_data is a GeolocationIndex or geolocation rows, the shared index when None.
+    """
+    run_detectors(rows, config_dict, [GeolocationFlowsDetector(config_dict, geolocation_data)])
@@ -16,9 +16,67 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
 from locallogging import log_info, log_error, log_warn
 from notifications.core import handle_alert
+from src.detectionengine import FlowDetector, run_detectors
 from init import *
 
 
+class HighBandwidthFlowDetector(FlowDetector):
+    """Local addresses whose total packets or bytes over the batch exceed MaxPackets or MaxBytes."""
+
+    name = "HighBandwidthFlowDetection"
+
+    def start(self):
+        log_info(self.logger, "[INFO] Started detecting high bandwidth flows")
+        self.packet_rate_threshold = int(self.config_dict.get("MaxPackets", "1000"))  # Default: 1000 packets/sec
+        self.byte_rate_threshold = int(self.config_dict.get("MaxBytes", "1000000"))  # Default: 1 MB/sec
+        # Totals for each local src_ip and dst_ip, with the last flow seen for the alert
+        self.traffic_stats = {}
+
+    def add_traffic(self, ip, packets, bytes_, row):
+        stats = self.traffic_stats.get(ip)
+        if stats is None:
+            stats = self.traffic_stats[ip] = {"packets": 0, "bytes": 0, "flow": row}
+        stats["packets"] += packets
+        stats["bytes"] += bytes_
+        stats["flow"] = row
+
+    def process_row(self, flows, i):
+        if flows.src_local[i]:
+            self.add_traffic(flows.src_ip[i], flows.packets[i], flows.bytes[i], flows.rows[i])
+        if flows.dst_local[i]:
+            self.add_traffic(flows.dst_ip[i], flows.packets[i], flows.bytes[i], flows.rows[i])
+
+    def finish(self):
+        for ip, stats in self.traffic_stats.items():
+            total_packets = stats["packets"]
+            total_bytes = stats["bytes"]
+
+            # Check if the thresholds are exceeded
+            if total_packets > self.packet_rate_threshold or total_bytes > self.byte_rate_threshold:
+                alert_id = f"{ip}_HighBandwidthFlow"
+
+                message = (f"High Bandwidth Flow Detected:\n"
+                           f"IP Address: {ip}\n"
+                           f"Total Packets: {total_packets}\n"
+                           f"Total Bytes: {total_bytes}\n")
+
+                log_info(self.logger, f"[INFO] High bandwidth flow detected for {ip}: "
+                                      f"Packets: {total_packets}, Bytes: {total_bytes}")
+
+                self.alert(
+                    "HighBandwidthFlowDetection",
+                    message,
+                    ip,
+                    stats["flow"],
+                    "High Bandwidth Flow Detected",
+                    "Aggregate",
+                    f"Packets: {total_packets}, Bytes: {total_bytes}",
+                    alert_id
+                )
+
+        log_info(self.logger, "[INFO] Finished detecting high bandwidth flows")
+
+
 def detect_high_bandwidth_flows(rows, config_dict):
     """
     Detect flows where the total packet or byte rates for a single src_ip or dst_ip exceed thresholds.
@@ -27,67 +85,4 @@ def detect_high_bandwidth_flows(rows, config_dict):
         rows: List of flow records.
         config_dict: Dictionary containing configuration settings.
     """
-    logger = logging.getLogger(__name__)
-    log_info(logger, "[INFO] Started detecting high bandwidth flows")
-
-    # Get thresholds from config_dict
-    packet_rate_threshold = int(config_dict.get("MaxPackets", "1000"))  # Default: 1000 packets/sec
-    byte_rate_threshold = int(config_dict.get("MaxBytes", "1000000"))  # Default: 1 MB/sec
-
-    # Dictionary to track totals for each src_ip and dst_ip
-    traffic_stats = {}
-    LOCAL_NETWORKS = set(config_dict['LocalNetworks'].split(','))
-
-    # First pass: Aggregate traffic by src_ip and dst_ip
-    for row in rows:
-        src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes_, flow_start, flow_end, *_ = row
-
-        # Initialize stats for src_ip
-        if src_ip not in traffic_stats:
-            traffic_stats[src_ip] = {"packets": 0, "bytes": 0, "flows": []}
-        traffic_stats[src_ip]["packets"] += packets
-        traffic_stats[src_ip]["bytes"] += bytes_
-        traffic_stats[src_ip]["flows"].append(row)
-
-        # Initialize stats for dst_ip
-        if dst_ip not in traffic_stats:
-            traffic_stats[dst_ip] = {"packets": 0, "bytes": 0, "flows": []}
-        traffic_stats[dst_ip]["packets"] += packets
-        traffic_stats[dst_ip]["bytes"] += bytes_
-        traffic_stats[dst_ip]["flows"].append(row)
-
-    # Second pass: Check for threshold violations
-    for ip, stats in traffic_stats.items():
-
-        if not is_ip_in_range(ip, LOCAL_NETWORKS):
-            continue
-
-        total_packets = stats["packets"]
-        total_bytes = stats["bytes"]
-
-        # Check if the thresholds are exceeded
-        if total_packets > packet_rate_threshold or total_bytes > byte_rate_threshold:
-            alert_id = f"{ip}_HighBandwidthFlow"
-
-            message = (f"High Bandwidth Flow Detected:\n"
-                       f"IP Address: {ip}\n"
-                       f"Total Packets: {total_packets}\n"
-                       f"Total Bytes: {total_bytes}\n")
-
-            log_info(logger, f"[INFO] High bandwidth flow detected for {ip}: "
-                             f"Packets: {total_packets}, Bytes: {total_bytes}")
-
-
-            handle_alert(
-                config_dict,
-                "HighBandwidthFlowDetection",
-                message,
-                ip,
-                row,
-                "High Bandwidth Flow Detected",
-                "Aggregate",
-                f"Packets: {total_packets}, Bytes: {total_bytes}",
-                alert_id
-            )
-
-    log_info(logger, "[INFO] Finished detecting high bandwidth flows")
\ No newline at end of file
+    run_detectors(rows, config_dict, [HighBandwidthFlowDetector(config_dict)])
@@ -17,92 +17,102 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
 from locallogging import log_info, log_error, log_warn
 from notifications.core import handle_alert
+from src.detectionengine import FlowDetector, run_detectors
 from init import *
 
-def detect_high_risk_ports(rows, config_dict):
-    """
-    Detect traffic from local networks to high-risk destination ports.
-    Common high-risk ports include:
-    - 135: MSRPC
-    - 137-139: NetBIOS
-    - 445: SMB
-    - 25/587: SMTP
-    - 22: SSH
-    - 23: Telnet
-    - 3389: RDP
-    
-    Args:
-        rows: List of flow records
-        config_dict: Dictionary containing configuration settings
-    """
-    logger = logging.getLogger(__name__)
-    log_info(logger,"[INFO] Started detecting high risk ports")
-    # Get high-risk ports from config
-    high_risk_ports = set(
-        int(port.strip()) 
-        for port in config_dict.get("HighRiskPorts", "135,137,138,139,445,25,587,22,23,3389").split(",")
-        if port.strip()
-    )
-    
-    # Get local networks
-    LOCAL_NETWORKS = set(config_dict['LocalNetworks'].split(','))
-    
-    # Get ignorelisted destinations if configured
-    approved_destinations = set(config_dict.get("ApprovedHighRiskDestinations", "").split(","))
-    
-    total = len(rows)
-    matches = 0
-    
-    for row in rows:
-        src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes_, *_ = row
-        
+
+class HighRiskPortDetector(FlowDetector):
+    """Local hosts connecting to HighRiskPorts on destinations that are not approved."""
+
+    name = "HighRiskPortDetection"
+
+    SERVICE_NAMES = {
+        135: "MSRPC",
+        137: "NetBIOS",
+        138: "NetBIOS",
+        139: "NetBIOS",
+        445: "SMB",
+        25: "SMTP",
+        587: "SMTP",
+        22: "SSH",
+        23: "Telnet",
+        3389: "RDP"
+    }
+
+    def start(self):
+        log_info(self.logger,"[INFO] Started detecting high risk ports")
+        # Get high-risk ports from config
+        self.high_risk_ports = set(
+            int(port.strip())
+            for port in self.config_dict.get("HighRiskPorts", "135,137,138,139,445,25,587,22,23,3389").split(",")
+            if port.strip()
+        )
+
+        # Get ignorelisted destinations if configured
+        self.approved_destinations = set(self.config_dict.get("ApprovedHighRiskDestinations", "").split(","))
+        self.total = 0
+        self.matches = 0
+
+    def process_row(self, flows, i):
+        self.total += 1
+
         # Only check outbound connections from local networks
-        if not is_ip_in_range(src_ip, LOCAL_NETWORKS):
-            continue
-            
+        if not flows.src_local[i]:
+            return
+
+        dst_ip, dst_port = flows.dst_ip[i], flows.dst_port[i]
+
         # Skip if destination is approved
-        if dst_ip in approved_destinations:
-            continue
-        
+        if dst_ip in self.approved_destinations:
+            return
+
         # Check if destination port is in high-risk list
-        if dst_port in high_risk_ports:
-            matches += 1
-            
-            service_name = {
-                135: "MSRPC",
-                137: "NetBIOS",
-                138: "NetBIOS",
-                139: "NetBIOS",
-                445: "SMB",
-                25: "SMTP",
-                587: "SMTP",
-                22: "SSH",
-                23: "Telnet",
-                3389: "RDP"
-            }.get(dst_port, "Unknown")
-            
+        if dst_port in self.high_risk_ports:
+            src_ip, protocol, packets = flows.src_ip[i], flows.protocol[i], flows.packets[i]
+            self.matches += 1
+
+            service_name = self.SERVICE_NAMES.get(dst_port, "Unknown")
+
             alert_id = f"{src_ip}_{dst_ip}_{protocol}_{dst_port}_HighRiskPort"
-            
+
             message = (f"High-Risk Port Traffic Detected:\n"
                       f"Source: {src_ip}\n"
                       f"Destination: {dst_ip}:{dst_port}\n"
                       f"Service: {service_name}\n"
                       f"Protocol: {protocol}\n"
                       f"Packets: {packets}")
-            
-            log_info(logger, f"[INFO] High-risk port traffic detected: {src_ip} -> {dst_ip}:{dst_port} ({service_name})")
-            
-            handle_alert(
-                config_dict,
+
+            log_info(self.logger, f"[INFO] High-risk port traffic detected: {src_ip} -> {dst_ip}:{dst_port} ({service_name})")
+
+            self.alert(
                 "HighRiskPortDetection",
                 message,
                 src_ip,
-                row,
+                flows.rows[i],
                 "High-Risk Port Traffic Detected",
                 dst_ip,
                 f"Port:{dst_port} ({service_name})",
                 alert_id
             )
-    
-    log_info(logger, f"[INFO] Completed high-risk port detection. Found {matches} matches in {total} flows")
 
+    def finish(self):
+        log_info(self.logger, f"[INFO] Completed high-risk port detection. Found {self.matches} matches in {self.total} flows")
+
+
+def detect_high_risk_ports(rows, config_dict):
+    """
+    Detect traffic from local networks to high-risk destination ports.
+    Common high-risk ports include:
+    - 135: MSRPC
+    - 137-139: NetBIOS
+    - 445: SMB
+    - 25/587: SMTP
+    - 22: SSH
+    - 23: Telnet
+    - 3389: RDP
+    
+    Args:
+        rows: List of flow records
+        config_dict: Dictionary containing configuration settings
+    """
+    run_detectors(rows, config_dict, [HighRiskPortDetector(config_dict)])
@@ -15,53 +15,65 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
 from locallogging import log_info, log_error, log_warn
 from notifications.core import handle_alert
+from src.detectionengine import FlowDetector, run_detectors
 from init import *
 
-def detect_incorrect_authoritative_dns(rows, config_dict):
-    """
-    Detect and alert if a flow originates from a local network (src_ip) and uses
-    dst_port 53 (DNS) with a dst_ip that is not in the ApprovedAuthoritativeDnsServersList.
 
-    Args:
-        rows: List of flow records.
-        config_dict: Dictionary containing configuration settings.
-    """
-    logger = logging.getLogger(__name__)
-    log_info(logger,"[INFO] Started detecting local DNS servers using unauthorized authoritative DNS")
-    # Get the list of approved authoritative DNS servers
-    approved_authoritative_dns_servers = set(config_dict.get("ApprovedAuthoritativeDnsServersList", "").split(","))
-    if not approved_authoritative_dns_servers:
-        log_warn(logger, "[WARN] No approved authoritative DNS servers configured")
-        return
-
-    APPROVED_LOCAL_DNS_SERVERS_LIST = set(config_dict.get("ApprovedLocalDnsServersList", "").split(","))
-    filtered_rows = [row for row in rows if row[3] == 53]
-    
-    for row in filtered_rows:
-        src_ip, dst_ip, src_port, dst_port, protocol = row[0:5]
+class IncorrectAuthoritativeDnsDetector(FlowDetector):
+    """Approved local DNS servers querying an authoritative server that is not approved."""
+
+    name = "IncorrectAuthoritativeDnsDetection"
+
+    def start(self):
+        log_info(self.logger,"[INFO] Started detecting local DNS servers using unauthorized authoritative DNS")
+        # Get the list of approved authoritative DNS servers
+        self.approved_authoritative_dns_servers = set(self.config_dict.get("ApprovedAuthoritativeDnsServersList", "").split(","))
+        if not self.approved_authoritative_dns_servers:
+            log_warn(self.logger, "[WARN] No approved authoritative DNS servers configured")
+            return False
+
+        self.approved_local_dns_servers = set(self.config_dict.get("ApprovedLocalDnsServersList", "").split(","))
+
+    def process_row(self, flows, i):
+        if flows.dst_port[i] != 53:
+            return
+
+        src_ip, dst_ip, src_port, dst_port, protocol = flows.src_ip[i], flows.dst_ip[i], flows.src_port[i], flows.dst_port[i], flows.protocol[i]
 
         # Check if src_ip is in local networks
-        if src_ip in APPROVED_LOCAL_DNS_SERVERS_LIST and dst_ip not in approved_authoritative_dns_servers:
+        if src_ip in self.approved_local_dns_servers and dst_ip not in self.approved_authoritative_dns_servers:
             # Check if dst_ip is not in the approved authoritative DNS servers list
             alert_id = f"{src_ip}_{dst_ip}__IncorrectAuthoritativeDNS"
 
-            log_info(logger, f"[INFO] Incorrect Authoritative DNS Detected: {src_ip} -> {dst_ip}")
+            log_info(self.logger, f"[INFO] Incorrect Authoritative DNS Detected: {src_ip} -> {dst_ip}")
 
             message = (f"Incorrect Authoritative DNS Detected:\n"
                         f"Source: {src_ip}:{src_port}\n"
                         f"Destination: {dst_ip}:{dst_port}\n"
                         f"Protocol: {protocol}")
 
-            handle_alert(
-                config_dict,
+            self.alert(
                 "IncorrectAuthoritativeDnsDetection",
                 message,
                 src_ip,
-                row,
+                flows.rows[i],
                 "Incorrect Authoritative DNS Detected",
                 dst_ip,
                 dst_port,
                 alert_id
             )
 
-    log_info(logger,"[INFO] Finished detecting local DNS servers using unauthorized authoritative DNS")
\ No newline at end of file
+    def finish(self):
+        log_info(self.logger,"[INFO] Finished detecting local DNS servers using unauthorized authoritative DNS")
+
+
+def detect_incorrect_authoritative_dns(rows, config_dict):
+    """
+    Detect and alert if a flow originates from a local network (src_ip) and uses
+    dst_port 53 (DNS) with a dst_ip that is not in the ApprovedAuthoritativeDnsServersList.
+
+    Args:
+        rows: List of flow records.
+        config_dict: Dictionary containing configuration settings.
+    """
+    run_detectors(rows, config_dict, [IncorrectAuthoritativeDnsDetector(config_dict)])
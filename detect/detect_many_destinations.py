@@ -16,72 +16,78 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
 from locallogging import log_info, log_error, log_warn
 from notifications.core import handle_alert
+from src.detectionengine import FlowDetector, run_detectors
 from init import *
 
-def detect_many_destinations(rows, config_dict):
+
+class ManyDestinationsDetector(FlowDetector):
     """
-    Detect hosts from local networks that are communicating with an unusually high
+    Hosts from local networks that are communicating with an unusually high
     number of different destination IPs, which could indicate scanning or malware.
-
-    Args:
-        rows: List of flow records
-        config_dict: Dictionary containing configuration settings
     """
-    logger = logging.getLogger(__name__)
-    log_info(logger, "[INFO] Started one source to many destinations detection")
-
-    # Get configuration parameters
-    LOCAL_NETWORKS = set(config_dict['LocalNetworks'].split(','))
-    dest_threshold = int(config_dict.get("MaxUniqueDestinations", "30"))
 
-    # Track destinations per source IP
-    source_stats = {}
+    name = "ManyDestinationsDetection"
 
-    # First pass: Count unique destinations for each source IP
-    for row in rows:
-        src_ip, dst_ip, *_ = row
+    def start(self):
+        log_info(self.logger, "[INFO] Started one source to many destinations detection")
+        self.dest_threshold = int(self.config_dict.get("MaxUniqueDestinations", "30"))
+        # Track destinations per source IP
+        self.source_stats = {}
 
+    def process_row(self, flows, i):
         # Only check sources from local networks
-        if not is_ip_in_range(src_ip, LOCAL_NETWORKS):
-            continue
+        if not flows.src_local[i]:
+            return
+
+        src_ip = flows.src_ip[i]
 
         # Initialize source IP tracking if not already present
-        if src_ip not in source_stats:
-            source_stats[src_ip] = {
+        if src_ip not in self.source_stats:
+            self.source_stats[src_ip] = {
                 'destinations': set(),
-                'ports': set(),
-                'flow': row
+                'flow': flows.rows[i]
             }
 
         # Track unique destinations
-        source_stats[src_ip]['destinations'].add(dst_ip)
+        self.source_stats[src_ip]['destinations'].add(flows.dst_ip[i])
+
+    def finish(self):
+        # Check for threshold violations and alert
+        for src_ip, stats in self.source_stats.items():
+            unique_dests = len(stats['destinations'])
+            flow = stats['flow']
 
-    # Second pass: Check for threshold violations and alert
-    for src_ip, stats in source_stats.items():
-        unique_dests = len(stats['destinations'])
-        flow = stats['flow']
+            # Check if the threshold is exceeded
+            if unique_dests > self.dest_threshold:
+                alert_id = f"{src_ip}_ManyDestinations"
 
-        # Check if the threshold is exceeded
-        if unique_dests > dest_threshold:
-            alert_id = f"{src_ip}_ManyDestinations"
+                message = (f"Host Connecting to Many Destinations:\n"
+                           f"Source IP: {src_ip}\n"
+                           f"Unique Destinations: {unique_dests}\n")
 
-            message = (f"Host Connecting to Many Destinations:\n"
-                       f"Source IP: {src_ip}\n"
-                       f"Unique Destinations: {unique_dests}\n")
+                log_info(self.logger, f"[INFO] Excessive destinations detected from {src_ip}: {unique_dests} destinations")
 
-            log_info(logger, f"[INFO] Excessive destinations detected from {src_ip}: {unique_dests} destinations")
+                self.alert(
+                    "ManyDestinationsDetection",
+                    message,
+                    src_ip,
+                    flow,
+                    "Excessive Unique Destinations",
+                    "",
+                    f"{unique_dests} destinations",
+                    alert_id
+                )
 
-            handle_alert(
-                config_dict,
-                "ManyDestinationsDetection",
-                message,
-                src_ip,
-                flow,
-                "Excessive Unique Destinations",
-                "",
-                f"{unique_dests} destinations",
-                alert_id
-            )
+        log_info(self.logger, "[INFO] Finished one source to many destinations detection")
 
-    log_info(logger, "[INFO] Finished one source to many destinations detection")
 
+def detect_many_destinations(rows, config_dict):
+    """
+    Detect hosts from local networks that are communicating with an unusually high
+    number of different destination IPs, which could indicate scanning or malware.
+
+    Args:
+        rows: List of flow records
+        config_dict: Dictionary containing configuration settings
+    """
+    run_detectors(rows, config_dict, [ManyDestinationsDetector(config_dict)])
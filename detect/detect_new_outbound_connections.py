@@ -4,6 +4,9 @@ import sys
 from datetime import datetime, timedelta
 from pathlib import Path
 import time
+from array import array
+import heapq
+from bisect import bisect_left
 # Set up path for imports
 current_dir = Path(__file__).resolve().parent
 parent_dir = str(current_dir.parent)
@@ -15,8 +18,173 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
 from locallogging import log_info, log_error, log_warn
 from notifications.core import handle_alert
+from src.detectionengine import FlowDetector, run_detectors
 from init import *
 
+# Smallest number of hashes held in the recent set before they are merged into the sorted array
+KNOWN_ALERT_IDS_MERGE_SIZE = 65536
+KNOWN_ALERT_IDS_PAGE_SIZE = 50000
+
+
+class KnownAlertIds:
+    """
+    Compact in-memory set of the alert ids already in the alerts table for one detection.
+
+    Ids are kept as 64-bit hashes in a sorted array('Q'), about 8 bytes per id, so installs
+    with millions of historic alerts stay small. Ids added since the last merge sit in a
+    plain set capped at a sixteenth of the array. refresh() loads only rows added since the
+    previous call, and reloads from scratch when the table's row count or the AlertsGeneration
+    setting shows alerts were deleted.
+    """
+
+    def __init__(self, suffix):
+        """
+        Args:
+            suffix (str): Alert id suffix of the detection, e.g. "_NewOutboundDetection"
+        """
+        self.suffix = suffix
+        self.hashes = array('Q')
+        self.recent = set()
+        self.last_rowid = 0
+        self.row_count = None
+        self.generation = None
+
+    @staticmethod
+    def hash_id(alert_id):
+        return hash(alert_id) & 0xFFFFFFFFFFFFFFFF
+
+    def __contains__(self, alert_id):
+        key = self.hash_id(alert_id)
+        if key in self.recent:
+            return True
+        index = bisect_left(self.hashes, key)
+        return index < len(self.hashes) and self.hashes[index] == key
+
+    def __len__(self):
+        return len(self.hashes) + len(self.recent)
+
+    def merge(self):
+        """Fold the recent set into the sorted array with one streaming merge."""
+        if self.recent:
+            self.hashes = array('Q', heapq.merge(self.hashes, sorted(self.recent)))
+            self.recent = set()
+
+    def load(self, after_rowid, max_rowid):
+        """
+        Read the ids in a rowid range page by page.
+
+        Returns:
+            list: Sorted array('Q') runs of hashes, one per page, or None if the table could not be read
+        """
+        runs = []
+        while True:
+            page = get_alert_ids_page(self.suffix, after_rowid, max_rowid, KNOWN_ALERT_IDS_PAGE_SIZE)
+            if page is None:
+                return None
+            if page:
+                runs.append(array('Q', sorted(self.hash_id(alert_id) for rowid, alert_id in page)))
+            if len(page) < KNOWN_ALERT_IDS_PAGE_SIZE:
+                return runs
+            after_rowid = page[-1][0]
+
+    def refresh(self):
+        """
+        Bring the set up to date with the alerts table.
+
+        Returns:
+            bool: False if the table could not be read and the set should not be trusted
+        """
+        stats = get_alert_rowid_stats(self.last_rowid)
+        if stats is None:
+            return False
+        row_count, max_rowid, rows_after, generation = stats
+
+        if self.row_count is None or generation != self.generation or row_count != self.row_count + rows_after:
+            # First load, or rows were deleted since the last refresh
+            runs = self.load(0, max_rowid)
+            if runs is None:
+                self.row_count = None
+                return False
+            self.hashes = array('Q', heapq.merge(*runs)) if len(runs) > 1 else (runs[0] if runs else array('Q'))
+            self.recent = set()
+        elif rows_after:
+            runs = self.load(self.last_rowid, max_rowid)
+            if runs is None:
+                self.row_count = None
+                return False
+            for run in runs:
+                self.recent.update(run)
+            if len(self.recent) >= max(KNOWN_ALERT_IDS_MERGE_SIZE, len(self.hashes) // 16):
+                self.merge()
+
+        self.last_rowid = max_rowid
+        self.row_count = row_count
+        self.generation = generation
+        return True
+
+
+# Kept across processing cycles so each refresh only reads new alerts
+known_new_outbound_ids = KnownAlertIds("_NewOutboundDetection")
+
+
+class NewOutboundDetector(FlowDetector):
+    """New connections from a local client to a lower, server side port on another host."""
+
+    name = "NewOutboundDetection"
+
+    def start(self):
+        log_info(self.logger,f"[INFO] Preparing to detect new outbound connections")
+        # Existing alert ids are checked in memory, falling back to a query per flow if they cannot be loaded
+        self.known_ids = known_new_outbound_ids if known_new_outbound_ids.refresh() else None
+        if self.known_ids is not None:
+            log_info(self.logger, f"[INFO] Loaded {len(self.known_ids)} known new outbound alert ids")
+        # Alert ids raised this cycle, so a repeated connection is not alerted twice before its row is written.
+        # The known ids only learn them from the alerts table on the next refresh, once the buffered alerts
+        # were actually written, so an alert lost to a failed flush is raised again
+        self.raised = set()
+
+    def process_row(self, flows, i):
+        # If source is local and destination port is lower (indicating server),
+        # this might be a new outbound connection
+        if not (flows.src_local[i] and flows.to_server[i]):
+            return
+
+        src_ip, dst_ip, dst_port, protocol = flows.src_ip[i], flows.dst_ip[i], flows.dst_port[i], flows.protocol[i]
+
+        # Create a unique identifier for this connection
+        alert_id = f"{src_ip}_{dst_ip}_{protocol}_{dst_port}_NewOutboundDetection"
+
+        if alert_id in self.raised:
+            return
+        if self.known_ids is not None:
+            exists = alert_id in self.known_ids
+        else:
+            exists = get_alert_count_by_id(alert_id) > 0
+
+        if not exists:
+            self.raised.add(alert_id)
+            message = (f"New outbound connection detected:\n"
+                     f"Local client: {src_ip}\n"
+                     f"Remote server: {dst_ip}:{dst_port}\n"
+                     f"Protocol: {protocol}")
+
+            log_info(self.logger, f"[INFO] New outbound connection detected: {src_ip} -> {dst_ip}:{dst_port}")
+
+            self.alert(
+                "NewOutboundDetection",
+                message,
+                src_ip,
+                flows.rows[i],
+                "New outbound connection detected",
+                dst_ip,
+                dst_port,
+                alert_id
+            )
+
+    def finish(self):
+        log_info(self.logger,f"[INFO] Finished detecting new outbound connections")
+
+
 def detect_new_outbound_connections(rows, config_dict):
     """
     Detect new outbound connections from local clients to external servers.
@@ -26,53 +194,4 @@ def detect_new_outbound_connections(rows, config_dict):
         rows: List of flow records
         config_dict: Dictionary containing configuration settings
     """
-    logger = logging.getLogger(__name__)
-    log_info(logger,f"[INFO] Preparing to detect new outbound connections")
-
-    LOCAL_NETWORKS = set(config_dict['LocalNetworks'].split(','))
-
-    try:
-
-        for row in rows:
-            src_ip, dst_ip, src_port, dst_port, protocol = row[0:5]
-            
-            # Check if source IP is in any of the local networks
-            is_src_local = False
-
-            if is_ip_in_range(src_ip, LOCAL_NETWORKS):
-                is_src_local = True
-            
-            # If source is local and destination port is lower (indicating server),
-            # this might be a new outbound connection
-            if is_src_local and dst_port < src_port:
-                # Create a unique identifier for this connection
-                alert_id = f"{src_ip}_{dst_ip}_{protocol}_{dst_port}_NewOutboundDetection"
-                
-                count = get_alert_count_by_id(alert_id)
-
-                exists = count > 0
-                
-                if not exists:
-                    message = (f"New outbound connection detected:\n"
-                             f"Local client: {src_ip}\n"
-                             f"Remote server: {dst_ip}:{dst_port}\n"
-                             f"Protocol: {protocol}")
-                    
-                    log_info(logger, f"[INFO] New outbound connection detected: {src_ip} -> {dst_ip}:{dst_port}")
-
-                    handle_alert(
-                        config_dict,
-                        "NewOutboundDetection",
-                        message,
-                        src_ip,
-                        row,
-                        "New outbound connection detected",
-                        dst_ip,
-                        dst_port,
-                        alert_id
-                    )    
-
-    except Exception as e:
-        log_error(logger, f"[ERROR] Error in detect_new_outbound_connections: {e}")
-    
-    log_info(logger,f"[INFO] Finished detecting new outbound connections")
+    run_detectors(rows, config_dict, [NewOutboundDetector(config_dict)])
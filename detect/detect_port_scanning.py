@@ -16,81 +16,86 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
 from locallogging import log_info, log_error, log_warn
 from notifications.core import handle_alert
+from src.detectionengine import FlowDetector, run_detectors
 from init import *
 
-def detect_port_scanning(rows, config_dict):
+
+class PortScanDetector(FlowDetector):
     """
-    Detect local hosts that are connecting to many different ports on the same destination IP,
+    Local hosts that are connecting to many different ports on the same destination IP,
     which could indicate port scanning activity. Only considers TCP flows (protocol 6).
-
-    Args:
-        rows: List of flow records
-        config_dict: Dictionary containing configuration settings
     """
-    logger = logging.getLogger(__name__)
-    log_info(logger, "[INFO] Started detecting port scanning activity")
 
-    # Get configuration parameters
-    LOCAL_NETWORKS = set(config_dict['LocalNetworks'].split(','))
-    port_threshold = int(config_dict.get("MaxPortsPerDestination", "15"))
+    name = "PortScanDetection"
 
-    # Dictionary to track {(src_ip, dst_ip): {ports}}
-    scan_tracking = {}
-
-    # First pass: Iterate through all rows to collect data
-    for row in rows:
-        src_ip, dst_ip, src_port, dst_port, protocol, *_ = row
+    def start(self):
+        log_info(self.logger, "[INFO] Started detecting port scanning activity")
+        self.port_threshold = int(self.config_dict.get("MaxPortsPerDestination", "15"))
+        # Dictionary to track {(src_ip, dst_ip): {ports}}
+        self.scan_tracking = {}
 
+    def process_row(self, flows, i):
         # Only process TCP flows (protocol 6)
-        if protocol != 6:
-            continue
+        if flows.protocol[i] != 6:
+            return
 
         # Only check flows where src_port > dst_port
-        if src_port <= dst_port:
-            continue
+        if not flows.to_server[i]:
+            return
 
         # Only check sources from local networks
-        if not is_ip_in_range(src_ip, LOCAL_NETWORKS):
-            continue
+        if not flows.src_local[i]:
+            return
 
         # Create key for tracking
-        flow_key = (src_ip, dst_ip)
+        flow_key = (flows.src_ip[i], flows.dst_ip[i])
 
         # Initialize tracking for new source-destination pair
-        if flow_key not in scan_tracking:
-            scan_tracking[flow_key] = {
+        if flow_key not in self.scan_tracking:
+            self.scan_tracking[flow_key] = {
                 'ports': set(),
-                'flow': row
+                'flow': flows.rows[i]
             }
 
         # Track unique destination ports
-        scan_tracking[flow_key]['ports'].add(dst_port)
-
-    # Second pass: Iterate through all tracked source-destination pairs
-    for (src_ip, dst_ip), stats in scan_tracking.items():
-        unique_ports = len(stats['ports'])
-
-        # Check if the port threshold is exceeded
-        if unique_ports > port_threshold:
-            alert_id = f"{src_ip}_{dst_ip}_PortScan"
-
-            message = (f"Potential Port Scan Detected:\n"
-                       f"Source IP: {src_ip}\n"
-                       f"Target IP: {dst_ip}\n"
-                       f"Unique Ports: {unique_ports}\n")
-
-            log_info(logger, f"[INFO] Port scan detected from {src_ip} to {dst_ip}: {unique_ports} ports")
-
-            handle_alert(
-                config_dict,
-                "PortScanDetection",
-                message,
-                src_ip,
-                row,
-                "Port Scan Detected",
-                dst_ip,
-                f"Ports:{unique_ports}",
-                alert_id
-            )
-
-    log_info(logger, "[INFO] Finished detecting port scanning activity")
\ No newline at end of file
+        self.scan_tracking[flow_key]['ports'].add(flows.dst_port[i])
+
+    def finish(self):
+        for (src_ip, dst_ip), stats in self.scan_tracking.items():
+            unique_ports = len(stats['ports'])
+
+            # Check if the port threshold is exceeded
+            if unique_ports > self.port_threshold:
+                alert_id = f"{src_ip}_{dst_ip}_PortScan"
+
+                message = (f"Potential Port Scan Detected:\n"
+                           f"Source IP: {src_ip}\n"
+                           f"Target IP: {dst_ip}\n"
+                           f"Unique Ports: {unique_ports}\n")
+
+                log_info(self.logger, f"[INFO] Port scan detected from {src_ip} to {dst_ip}: {unique_ports} ports")
+
+                self.alert(
+                    "PortScanDetection",
+                    message,
+                    src_ip,
+                    stats['flow'],
+                    "Port Scan Detected",
+                    dst_ip,
+                    f"Ports:{unique_ports}",
+                    alert_id
+                )
+
+        log_info(self.logger, "[INFO] Finished detecting port scanning activity")
+
+
+def detect_port_scanning(rows, config_dict):
+    """
+    Detect local hosts that are connecting to many different ports on the same destination IP,
+    which could indicate port scanning activity. Only considers TCP flows (protocol 6).
+
+    Args:
+        rows: List of flow records
+        config_dict: Dictionary containing configuration settings
+    """
+    run_detectors(rows, config_dict, [PortScanDetector(config_dict)])
@@ -15,68 +15,62 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
 from locallogging import log_info, log_error, log_warn
 from notifications.core import handle_alert
+from src.detectionengine import FlowDetector, run_detectors
+from integrations.reputation import ReputationIndex, get_reputation_index
 from init import *
 
-def detect_reputation_flows(rows, config_dict, reputation_data):
-    """
-    Detect flows where a local IP communicates with an IP on the reputation list.
 
-    Args:
-        rows: List of flow records.
-        config_dict: Dictionary containing configuration settings.
-        reputation_data: Preprocessed reputation list data.
-    """
-    logger = logging.getLogger(__name__)
-    log_info(logger, f"[INFO] Started detecting reputationlist destinations")
-    # Pre-process reputation data into ranges
-    reputation_ranges = []
-    for entry in reputation_data:
-        if len(entry) >= 4:  # Ensure entry has at least 4 elements
-            network, start_ip, end_ip, netmask = entry[:4]
-            reputation_ranges.append((network, start_ip, end_ip, netmask))
-
-    # Sort ranges by start_ip for efficient lookup
-    reputation_ranges.sort(key=lambda x: x[0])
-
-    def find_match(ip_int):
+class ReputationFlowsDetector(FlowDetector):
+    """Local hosts talking to an address on the reputation list."""
+
+    name = "ReputationListDetection"
+
+    def __init__(self, config_dict, reputation_data=None):
+        """
+        Args:
+            config_dict: Dictionary containing configuration settings
+            reputation_data: A ReputationIndex, reputation rows to index, or None to use
+                             the process's shared index when the detector starts
+        """
+        super().__init__(config_dict)
+        if reputation_data is None or isinstance(reputation_data, ReputationIndex):
+            self.reputation_index = reputation_data
+        else:
+            self.reputation_index = ReputationIndex(reputation_data)
+        self.total = 0
+        self.matches = 0
+
+    def start(self):
+        log_info(self.logger, f"[INFO] Started detecting reputationlist destinations")
+        if self.reputation_index is None:
+            self.reputation_index = get_reputation_index(self.config_dict.get('ReputationGeneration'))
+
+    def find_match(self, ip_int):
         """Find if an IP is in the reputation list."""
-        if not ip_int:
-            return None
-
-        for network, start_ip, end_ip, netmask in reputation_ranges:
-            if start_ip <= ip_int <= end_ip:
-                return (True, network)
-            elif start_ip > ip_int:
-                break  # Early exit if we've passed possible matches
-
-        return (False,None)
-
-    # Get local networks from the configuration
-    LOCAL_NETWORKS = set(config_dict['LocalNetworks'].split(','))
-
-    # Process rows
-    total = len(rows)
-    matches = 0
-    for index, row in enumerate(rows, 1):
+        network = self.reputation_index.lookup(ip_int)
+        if network is None:
+            return (False, None)
+        return (True, network)
 
-        src_ip, dst_ip, src_port, dst_port, protocol, *_ = row
+    def process_row(self, flows, i):
+        self.total += 1
 
-        # Convert IPs to integers
-        src_ip_int = ip_to_int(src_ip)
-        dst_ip_int = ip_to_int(dst_ip)
+        src_ip_int = flows.src_int[i]
+        dst_ip_int = flows.dst_int[i]
 
         if not src_ip_int or not dst_ip_int:
-            continue
+            return
 
-        # Check if src_ip or dst_ip is in LOCAL_NETWORKS
-        is_src_local = is_ip_in_range(src_ip, LOCAL_NETWORKS)
+        # If src_ip is local, check dst_ip against the reputation list
+        if not flows.src_local[i]:
+            return
 
-        (reputation_match, match_network) = find_match(dst_ip_int)
+        (reputation_match, match_network) = self.find_match(dst_ip_int)
 
-        # If src_ip is local, check dst_ip against the reputation list
-        if is_src_local and reputation_match:
-            matches += 1
-            log_info(logger, f"[INFO] Flow involves an IP on the reputation list: {src_ip} -> {dst_ip} ({match_network})")
+        if reputation_match:
+            src_ip, dst_ip, protocol = flows.src_ip[i], flows.dst_ip[i], flows.protocol[i]
+            self.matches += 1
+            log_info(self.logger, f"[INFO] Flow involves an IP on the reputation list: {src_ip} -> {dst_ip} ({match_network})")
 
             message = (f"Flow involves an IP on the reputation list:\n"
                        f"Source IP: {src_ip}\n"
@@ -85,17 +79,28 @@ def detect_reputation_flows(rows, config_dict, reputation_data):
 
             alert_id = f"{src_ip}_{dst_ip}_{protocol}_ReputationListDetection"
 
-            handle_alert(
-                config_dict,
+            self.alert(
                 "ReputationListDetection",
                 message,
                 src_ip,
-                row,
+                flows.rows[i],
                 "Flow involves an IP on the reputation list",
                 dst_ip,
                 match_network,
                 alert_id
             )
 
-    log_info(logger, f"[INFO] Completed reputation flow processing. Found {matches} matches in {total} flows")
+    def finish(self):
+        log_info(self.logger, f"[INFO] Completed reputation flow processing. Found {self.matches} matches in {self.total} flows")
+
+
+def detect_reputation_flows(rows, config_dict, reputation_data=None):
+    """
+    Detect flows where a local IP communicates with an IP on the reputation list.
 
+    Args:
+        rows: List of flow records.
+        config_dict: Dictionary containing configuration settings.
+        reputation_data: A ReputationIndex or reputation rows, the shared index when None.
+    """
+    run_detectors(rows, config_dict, [ReputationFlowsDetector(config_dict, reputation_data)])
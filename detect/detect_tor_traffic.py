@@ -17,9 +17,49 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
 from locallogging import log_info, log_error, log_warn
 from notifications.core import handle_alert
+from src.detectionengine import FlowDetector, run_detectors
+from integrations.enrichment import get_ip_enrichment
 from init import *
 
 
+class TorTrafficDetector(FlowDetector):
+    """Local hosts talking to known Tor nodes."""
+
+    name = "TorFlowDetection"
+
+    def start(self):
+        log_info(self.logger,"[INFO] Started detecting traffic to tor nodes")
+
+    def process_row(self, flows, i):
+        # Check if source is local and destination is Tor node
+        if not flows.src_local[i]:
+            return
+
+        dst_ip = flows.dst_ip[i]
+        if get_ip_enrichment(dst_ip)["tor"]:
+            src_ip, dst_port, protocol = flows.src_ip[i], flows.dst_port[i], flows.protocol[i]
+            alert_id = f"{src_ip}_{dst_ip}_{protocol}_{dst_port}_TorTraffic"
+            message = (f"Tor Traffic Detected:\n"
+                      f"Local IP: {src_ip}\n"
+                      f"Tor Node: {dst_ip}:{dst_port}\n")
+
+            log_info(self.logger, f"[INFO] Tor traffic detected: {src_ip} -> {dst_ip}:{dst_port}")
+
+            self.alert(
+                "TorFlowDetection",
+                message,
+                src_ip,
+                flows.rows[i],
+                "Tor Traffic Detected",
+                dst_ip,
+                f"Tor Exit Node",
+                alert_id
+            )
+
+    def finish(self):
+        log_info(self.logger,"[INFO] Finished detecting traffic to tor nodes")
+
+
 def detect_tor_traffic(rows, config_dict):
     """
     Detect traffic to/from known Tor nodes.
@@ -28,44 +68,4 @@ def detect_tor_traffic(rows, config_dict):
         rows: List of flow records
         config_dict: Dictionary containing configuration settings
     """
-    logger = logging.getLogger(__name__)
-    log_info(logger,"[INFO] Started detecting traffic to tor nodes")
-
-    # Get local networks
-    LOCAL_NETWORKS = set(config_dict['LocalNetworks'].split(','))
-    
-    try:
-        tor_rows = get_all_tor_nodes()
-
-        tor_nodes = set(row[0] for row in tor_rows)
-        
-        for row in rows:
-            src_ip, dst_ip, src_port, dst_port, protocol, *_ = row
-            
-            # Check if source is local and destination is Tor node
-            is_src_local = is_ip_in_range(src_ip, LOCAL_NETWORKS)
-            
-            if is_src_local and dst_ip in tor_nodes:
-                alert_id = f"{src_ip}_{dst_ip}_{protocol}_{dst_port}_TorTraffic"
-                message = (f"Tor Traffic Detected:\n"
-                          f"Local IP: {src_ip}\n"
-                          f"Tor Node: {dst_ip}:{dst_port}\n")
-                
-                log_info(logger, f"[INFO] Tor traffic detected: {src_ip} -> {dst_ip}:{dst_port}")
-
-                handle_alert(
-                    config_dict,
-                    "TorFlowDetection",
-                    message,
-                    src_ip,
-                    row,
-                    "Tor Traffic Detected",
-                    dst_ip,
-                    f"Tor Exit Node",
-                    alert_id
-                )
-                    
-    except Exception as e:
-        log_error(logger, f"[ERROR] Error in detect_tor_traffic: {e}")
-
-    log_info(logger,"[INFO] Finished detecting traffic to tor nodes")
\ No newline at end of file
+    run_detectors(rows, config_dict, [TorTrafficDetector(config_dict)])
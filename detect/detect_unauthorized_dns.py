@@ -15,54 +15,63 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
 from locallogging import log_info, log_error, log_warn
 from notifications.core import handle_alert
+from src.detectionengine import FlowDetector, run_detectors
 from init import *
 
-def detect_unauthorized_dns(rows, config_dict):
-    """
-    Detect DNS traffic (port 53) that doesn't involve approved DNS servers,
-    but only alert if the src_ip is in local networks.
 
-    Args:
-        rows: List of flow records
-        config_dict: Dictionary containing configuration settings
-    """
-    logger = logging.getLogger(__name__)
-    log_info(logger,"[INFO] Starting detecting unauthorized NTP destinations")
-    # Get the list of approved DNS servers
-    approved_dns_servers = set(config_dict.get("ApprovedLocalDnsServersList", "").split(","))
-    if not approved_dns_servers:
-        log_warn(logger, "[WARN] No approved DNS servers configured")
-        return
-    
-    LOCAL_NETWORKS=set(config_dict['LocalNetworks'].split(','))
-    filtered_rows = [row for row in rows if row[3] == 53]
+class UnauthorizedDnsDetector(FlowDetector):
+    """DNS traffic (port 53) from a local host that is not an approved DNS server."""
+
+    name = "UnauthorizedDNSDetection"
+
+    def start(self):
+        log_info(self.logger,"[INFO] Starting detecting unauthorized DNS destinations")
+        # Get the list of approved DNS servers
+        self.approved_dns_servers = set(self.config_dict.get("ApprovedLocalDnsServersList", "").split(","))
+        if not self.approved_dns_servers:
+            log_warn(self.logger, "[WARN] No approved DNS servers configured")
+            return False
+
+    def process_row(self, flows, i):
+        if flows.dst_port[i] != 53:
+            return
 
-    for row in filtered_rows:
-        src_ip, dst_ip, src_port, dst_port, protocol = row[0:5]
+        src_ip, dst_ip, src_port, dst_port, protocol = flows.src_ip[i], flows.dst_ip[i], flows.src_port[i], flows.dst_port[i], flows.protocol[i]
 
         # Check if either IP is not in the approved DNS servers list
-        if src_ip not in approved_dns_servers:
-            if is_ip_in_range(src_ip, LOCAL_NETWORKS):
+        if src_ip not in self.approved_dns_servers and flows.src_local[i]:
             # Create a unique identifier for this alert
-                alert_id = f"{src_ip}_{dst_ip}__UnauthorizedDNS"
+            alert_id = f"{src_ip}_{dst_ip}__UnauthorizedDNS"
 
-                log_info(logger, f"[INFO] Unauthorized DNS Traffic Detected: {src_ip} -> {dst_ip}")
+            log_info(self.logger, f"[INFO] Unauthorized DNS Traffic Detected: {src_ip} -> {dst_ip}")
 
-                message = (f"Unauthorized DNS Traffic Detected:\n"
-                            f"Source: {src_ip}:{src_port}\n"
-                            f"Destination: {dst_ip}:{dst_port}\n"
-                            f"Protocol: {protocol}")
+            message = (f"Unauthorized DNS Traffic Detected:\n"
+                        f"Source: {src_ip}:{src_port}\n"
+                        f"Destination: {dst_ip}:{dst_port}\n"
+                        f"Protocol: {protocol}")
 
-                handle_alert(
-                    config_dict,
-                    "BypassLocalDnsDetection",
-                    message,
-                    src_ip,
-                    row,
-                    "Unauthorized DNS Traffic Detected",
-                    dst_ip,
-                    dst_port,
-                    alert_id
-                )
+            self.alert(
+                "BypassLocalDnsDetection",
+                message,
+                src_ip,
+                flows.rows[i],
+                "Unauthorized DNS Traffic Detected",
+                dst_ip,
+                dst_port,
+                alert_id
+            )
 
-    log_info(logger,"[INFO] Finished detecting unauthorized DNS destinations")
\ No newline at end of file
+    def finish(self):
+        log_info(self.logger,"[INFO] Finished detecting unauthorized DNS destinations")
+
+
+def detect_unauthorized_dns(rows, config_dict):
+    """
+    Detect DNS traffic (port 53) that doesn't involve approved DNS servers,
+    but only alert if the src_ip is in local networks.
+
+    Args:
+        rows: List of flow records
+        config_dict: Dictionary containing configuration settings
+    """
+    run_detectors(rows, config_dict, [UnauthorizedDnsDetector(config_dict)])
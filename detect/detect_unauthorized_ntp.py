@@ -15,57 +15,64 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
 from locallogging import log_info, log_error, log_warn
 from notifications.core import handle_alert
+from src.detectionengine import FlowDetector, run_detectors
 from init import *
 
-def detect_unauthorized_ntp(rows, config_dict):
-    """
-    Detect DNS traffic (port 53) that doesn't involve approved DNS servers,
-    but only alert if the src_ip is in local networks.
 
-    Args:
-        rows: List of flow records
-        config_dict: Dictionary containing configuration settings
-    """
+class UnauthorizedNtpDetector(FlowDetector):
+    """NTP traffic (port 123) from a local host that is not an approved NTP server."""
 
-    logger = logging.getLogger(__name__)
-    log_info(logger,"[INFO] Detecting unauthorized NTP destinations")
-    # Get the list of approved NTP servers
-    approved_ntp_servers = set(config_dict.get("ApprovedLocalNtpServersList", "").split(","))
+    name = "UnauthorizedNTPDetection"
 
-    if not approved_ntp_servers:
-        log_warn(logger, "[WARN] No approved NTP servers configured")
-        return
+    def start(self):
+        log_info(self.logger,"[INFO] Detecting unauthorized NTP destinations")
+        # Get the list of approved NTP servers
+        self.approved_ntp_servers = set(self.config_dict.get("ApprovedLocalNtpServersList", "").split(","))
 
-    LOCAL_NETWORKS=set(config_dict['LocalNetworks'].split(','))
+        if not self.approved_ntp_servers:
+            log_warn(self.logger, "[WARN] No approved NTP servers configured")
+            return False
 
-    filtered_rows = [row for row in rows if row[3] == 123]
+    def process_row(self, flows, i):
+        if flows.dst_port[i] != 123:
+            return
 
-    for row in filtered_rows:
-        src_ip, dst_ip, src_port, dst_port, protocol = row[0:5]
+        src_ip, dst_ip, src_port, dst_port, protocol = flows.src_ip[i], flows.dst_ip[i], flows.src_port[i], flows.dst_port[i], flows.protocol[i]
 
         # Check if either IP is not in the approved NTP servers list
-        if src_ip not in approved_ntp_servers:
-            if is_ip_in_range(src_ip, LOCAL_NETWORKS):
+        if src_ip not in self.approved_ntp_servers and flows.src_local[i]:
             # Create a unique identifier for this alert
-                alert_id = f"{src_ip}_{dst_ip}__UnauthorizedNTP"
-
-                log_info(logger, f"[INFO] Unauthorized NTP Traffic Detected: {src_ip} -> {dst_ip}")
-
-                message = (f"Unauthorized NTP Traffic Detected:\n"
-                        f"Source: {src_ip}:{src_port}\n"
-                        f"Destination: {dst_ip}:{dst_port}\n"
-                        f"Protocol: {protocol}")
-
-                handle_alert(
-                    config_dict,
-                    "BypassLocalNtpDetection",
-                    message,
-                    src_ip,
-                    row,
-                    "Unauthorized NTP Traffic Detected",
-                    dst_ip,
-                    dst_port,
-                    alert_id
-                )
-
-    log_info(logger,"[INFO] Finished detecting unauthorized NTP destinations")
\ No newline at end of file
+            alert_id = f"{src_ip}_{dst_ip}__UnauthorizedNTP"
+
+            log_info(self.logger, f"[INFO] Unauthorized NTP Traffic Detected: {src_ip} -> {dst_ip}")
+
+            message = (f"Unauthorized NTP Traffic Detected:\n"
+                    f"Source: {src_ip}:{src_port}\n"
+                    f"Destination: {dst_ip}:{dst_port}\n"
+                    f"Protocol: {protocol}")
+
+            self.alert(
+                "BypassLocalNtpDetection",
+                message,
+                src_ip,
+                flows.rows[i],
+                "Unauthorized NTP Traffic Detected",
+                dst_ip,
+                dst_port,
+                alert_id
+            )
+
+    def finish(self):
+        log_info(self.logger,"[INFO] Finished detecting unauthorized NTP destinations")
+
+
+def detect_unauthorized_ntp(rows, config_dict):
+    """
+    Detect DNS traffic (port 53) that doesn't involve approved DNS servers,
+    but only alert if the src_ip is in local networks.
+
+    Args:
+        rows: List of flow records
+        config_dict: Dictionary containing configuration settings
+    """
+    run_detectors(rows, config_dict, [UnauthorizedNtpDetector(config_dict)])
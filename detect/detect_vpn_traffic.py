@@ -16,28 +16,15 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
 from locallogging import log_info, log_error, log_warn
 from notifications.core import handle_alert
+from src.detectionengine import FlowDetector, run_detectors
 from init import *
 
 
-def detect_vpn_traffic(rows, config_dict):
-    """
-    Detect VPN traffic from local hosts by checking for common VPN protocols and ports.
-    
-    Common VPN protocols and ports:
-    - OpenVPN: UDP 1194, TCP 443/1194
-    - IPsec/IKE: UDP 500 (IKE), UDP 4500 (NAT-T)
-    - L2TP: UDP 1701
-    - PPTP: TCP 1723
-    - WireGuard: UDP 51820
-    - SoftEther: TCP 443, TCP 992, TCP 5555
-    - Cisco AnyConnect: TCP/UDP 443
-    
-    Args:
-        rows: List of flow records
-        config_dict: Dictionary containing configuration settings
-    """
-    logger = logging.getLogger(__name__)
-    log_info(logger, f"[INFO] Started detecting VPN protocol usage")
+class VpnTrafficDetector(FlowDetector):
+    """Local hosts using common VPN ports or tunnelling protocols."""
+
+    name = "VpnTrafficDetection"
+
     # Define VPN-related ports and protocols
     VPN_PORTS = {
         'TCP': {1194, 1723, 992, 5555},  # TCP ports (protocol 6)
@@ -52,67 +39,74 @@ def detect_vpn_traffic(rows, config_dict):
         97: 'ETHERIP',         # Ethernet-within-IP encapsulation
         115: 'L2TP'           # Layer 2 Tunneling Protocol
     }
-    
-    # Get local networks
-    LOCAL_NETWORKS = set(config_dict['LocalNetworks'].split(','))
-    
-    # Get ignorelisted VPN servers if configured
-    approved_vpn_servers = set(config_dict.get("ApprovedVpnServersList", "").split(","))
-    
-    vpn_flows = {}  # Track potential VPN flows by source IP
-    
-    for row in rows:
-        src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes_, *_ = row
-        
+
+    def start(self):
+        log_info(self.logger, f"[INFO] Started detecting VPN protocol usage")
+        # Get ignorelisted VPN servers if configured
+        self.approved_vpn_servers = set(self.config_dict.get("ApprovedVpnServersList", "").split(","))
+
+    def process_row(self, flows, i):
         # Only check outbound connections from local networks
-        if not is_ip_in_range(src_ip, LOCAL_NETWORKS):
-            continue
-            
+        if not flows.src_local[i]:
+            return
+
+        src_ip, dst_ip, dst_port, protocol = flows.src_ip[i], flows.dst_ip[i], flows.dst_port[i], flows.protocol[i]
+
         # Skip if destination is an approved VPN server
-        if dst_ip in approved_vpn_servers:
-            continue
-        
-        is_vpn = False
-        proto_name = None
+        if dst_ip in self.approved_vpn_servers:
+            return
 
         # Check TCP/UDP ports
-        if protocol == 6 and dst_port in VPN_PORTS['TCP']:
-            is_vpn = True
+        if protocol == 6 and dst_port in self.VPN_PORTS['TCP']:
             proto_name = f'TCP/{dst_port}'
-        elif protocol == 17 and dst_port in VPN_PORTS['UDP']:
-            is_vpn = True
+        elif protocol == 17 and dst_port in self.VPN_PORTS['UDP']:
             proto_name = f'UDP/{dst_port}'
         # Check VPN protocols
-        elif protocol in VPN_PROTOCOLS:
-            is_vpn = True
-            proto_name = VPN_PROTOCOLS[protocol]
-
-        if not is_vpn:
-            continue
-        
-        # Create flow identifier
-        alert_id = f"{src_ip}_{dst_ip}_{protocol}_{dst_port}"
-        
+        elif protocol in self.VPN_PROTOCOLS:
+            proto_name = self.VPN_PROTOCOLS[protocol]
+        else:
+            return
+
         # Alert if this is first time seeing this flow
-        alert_id = f"{alert_id}_VPNDetection"
-        
+        alert_id = f"{src_ip}_{dst_ip}_{protocol}_{dst_port}_VPNDetection"
+
         message = (f"Potential VPN Traffic Detected:\n"
                   f"Source: {src_ip}\n"
                   f"Destination: {dst_ip}:{dst_port}\n"
                   f"Protocol: {proto_name}\n")
-         
-        log_info(logger, f"[INFO] Potential VPN traffic detected: {src_ip} -> {dst_ip}:{dst_port} ({proto_name})")
 
-        handle_alert(
-            config_dict,
+        log_info(self.logger, f"[INFO] Potential VPN traffic detected: {src_ip} -> {dst_ip}:{dst_port} ({proto_name})")
+
+        self.alert(
             "VpnTrafficDetection",
             message,
             src_ip,
-            row,
+            flows.rows[i],
             "Potential VPN Traffic Detected",
             dst_ip,
             f"Port:{dst_port} Proto:{proto_name}",
             alert_id
         )
 
-    log_info(logger, f"[INFO] Finished detecting VPN protocol usage")
\ No newline at end of file
+    def finish(self):
+        log_info(self.logger, f"[INFO] Finished detecting VPN protocol usage")
+
+
+def detect_vpn_traffic(rows, config_dict):
+    """
+    Detect VPN traffic from local hosts by checking for common VPN protocols and ports.
+    
+    Common VPN protocols and ports:
+    - OpenVPN: UDP 1194, TCP 443/1194
+    - IPsec/IKE: UDP 500 (IKE), UDP 4500 (NAT-T)
+    - L2TP: UDP 1701
+    - PPTP: TCP 1723
+    - WireGuard: UDP 51820
+    - SoftEther: TCP 443, TCP 992, TCP 5555
+    - Cisco AnyConnect: TCP/UDP 443
+    
+    Args:
+        rows: List of flow records
+        config_dict: Dictionary containing configuration settings
+    """
+    run_detectors(rows, config_dict, [VpnTrafficDetector(config_dict)])
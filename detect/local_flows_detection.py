@@ -15,53 +15,49 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
 from locallogging import log_info, log_error, log_warn
 from notifications.core import handle_alert
+from src.detectionengine import FlowDetector, run_detectors
 from init import *
 
 
-def local_flows_detection(rows, config_dict):
-    """
-    Detect and handle flows where both src_ip and dst_ip are in LOCAL_NETWORKS,
-    excluding any flows involving ROUTER_IPADDRESS.
-    """
-    logger = logging.getLogger(__name__)
-    ROUTER_LIST = set(config_dict['RouterIpAddresses'].split(','))
-    LOCAL_NETWORKS = set(config_dict['LocalNetworks'].split(','))
+class LocalFlowsDetector(FlowDetector):
+    """Flows between two local hosts that do not involve a router address."""
 
-    log_info(logger,"[INFO] Detecting flows for the same local networks going through the router")
-    for row in rows:
-        src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes_, flow_start, flow_end, *_ = row
+    name = "LocalFlowsDetection"
 
-        # Skip if either IP is in ROUTER_IPADDRESS array
-        is_router_ip = False
-        for router_ip in ROUTER_LIST:
-            if src_ip == router_ip or dst_ip == router_ip:
-                is_router_ip = True
+    def start(self):
+        log_info(self.logger,"[INFO] Detecting flows for the same local networks going through the router")
 
-        if is_router_ip:
-            continue
+    def process_row(self, flows, i):
+        # Skip if either IP is in ROUTER_IPADDRESS array
+        if flows.src_router[i] or flows.dst_router[i]:
+            return
 
         # Determine if both IPs are in LOCAL_NETWORKS
-        is_src_local = False
-        is_dst_local = False
-        if is_ip_in_range(src_ip, LOCAL_NETWORKS):
-            is_src_local = True
-        if is_ip_in_range(dst_ip, LOCAL_NETWORKS):
-            is_dst_local = True
+        if not (flows.src_local[i] and flows.dst_local[i]):
+            return
 
-        if is_src_local and is_dst_local:
-            log_info(logger, f"[INFO] Flow involves two local hosts: {src_ip} and {dst_ip}")
-            message = f"Flow involves two local hosts: {src_ip} and {dst_ip}"
+        src_ip, dst_ip, src_port, dst_port, protocol = flows.src_ip[i], flows.dst_ip[i], flows.src_port[i], flows.dst_port[i], flows.protocol[i]
+        log_info(self.logger, f"[INFO] Flow involves two local hosts: {src_ip} and {dst_ip}")
+        message = f"Flow involves two local hosts: {src_ip} and {dst_ip}"
 
-            handle_alert(
-                config_dict,
-                "LocalFlowsDetection",
-                message,
-                src_ip,
-                row,
-                "Flow involves two local hosts",
-                dst_ip,
-                dst_port,
-                f"{src_ip}_{dst_ip}_{protocol}_{src_port}_{dst_port}_LocalFlowsDetection"
-            )
+        self.alert(
+            "LocalFlowsDetection",
+            message,
+            src_ip,
+            flows.rows[i],
+            "Flow involves two local hosts",
+            dst_ip,
+            dst_port,
+            f"{src_ip}_{dst_ip}_{protocol}_{src_port}_{dst_port}_LocalFlowsDetection"
+        )
 
-    log_info(logger,"[INFO] Finished detecting flows for the same local network going through the router")
\ No newline at end of file
+    def finish(self):
+        log_info(self.logger,"[INFO] Finished detecting flows for the same local network going through the router")
+
+
+def local_flows_detection(rows, config_dict):
+    """
+    Detect and handle flows where both src_ip and dst_ip are in LOCAL_NETWORKS,
+    excluding any flows involving ROUTER_IPADDRESS.
+    """
+    run_detectors(rows, config_dict, [LocalFlowsDetector(config_dict)])
@@ -15,48 +15,54 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
 from locallogging import log_info, log_error, log_warn
 from notifications.core import handle_alert
+from src.detectionengine import FlowDetector, run_detectors
 from init import *
 
 
+class RouterFlowsDetector(FlowDetector):
+    """Flows to or from one of the configured router addresses."""
+
+    name = "RouterFlowsDetection"
+
+    def start(self):
+        log_info(self.logger,"[INFO] Detecting flows to or from the router")
+
+    def process_row(self, flows, i):
+        # Determine if the flow involves a router IP address using exact matching
+        src_router = flows.src_router[i]
+        if not (src_router or flows.dst_router[i]):
+            return
+
+        src_ip, dst_ip, src_port, dst_port, protocol = flows.src_ip[i], flows.dst_ip[i], flows.src_port[i], flows.dst_port[i], flows.protocol[i]
+        if src_router:
+            router_ip_seen = src_ip
+            router_port = src_port
+        else:
+            router_ip_seen = dst_ip
+            router_port = dst_port
+
+        log_info(self.logger, f"[INFO] Flow involves a router IP address: {router_ip_seen}")
+
+        message = f"Flow involves a router IP address: {router_ip_seen}"
+
+        self.alert(
+            "RouterFlowsDetection",
+            message,
+            router_ip_seen,
+            flows.rows[i],
+            "Flow involves a router IP address",
+            src_port,
+            dst_port,
+            f"{router_ip_seen}_{src_ip}_{dst_ip}_{protocol}_{router_port}_RouterFlowsDetection"
+        )
+
+    def finish(self):
+        log_info(self.logger,"[INFO] Finished detecting flows to or from the router")
+
+
 def router_flows_detection(rows, config_dict):
     """
     Detect and handle flows involving a router IP address.
     Uses exact IP matching instead of network matching.
     """
-    logger = logging.getLogger(__name__)
-    log_info(logger,"[INFO] Detecting flows to or from the router")
-
-    ROUTER_LIST = set(config_dict['RouterIpAddresses'].split(','))
-    for row in rows:
-        src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes_, flow_start, flow_end, *_ = row
-
-        # Determine if the flow involves a router IP address using exact matching
-        router_ip_seen = None
-        router_port = None
-        for router_ip in ROUTER_LIST:
-            if src_ip == router_ip:
-                router_ip_seen = src_ip
-                router_port = src_port
-            elif dst_ip == router_ip:
-                router_ip_seen = dst_ip
-                router_port = dst_port
-
-        if router_ip_seen:
-            original_flow = json.dumps(row)
-            log_info(logger, f"[INFO] Flow involves a router IP address: {router_ip_seen}")
-
-            message = f"Flow involves a router IP address: {router_ip_seen}"
-
-            handle_alert(
-                config_dict,
-                "RouterFlowsDetection",
-                message,
-                router_ip_seen,
-                row,
-                "Flow involves a router IP address",
-                src_port,
-                dst_port,
-                f"{router_ip_seen}_{src_ip}_{dst_ip}_{protocol}_{router_port}_RouterFlowsDetection"
-            )
-
-    log_info(logger,"[INFO] Finished detecting flows to or from the router")
\ No newline at end of file
+    run_detectors(rows, config_dict, [RouterFlowsDetector(config_dict)])
@@ -16,55 +16,55 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import logging
 from locallogging import log_info, log_error, log_warn
 from notifications.core import handle_alert
+from src.detectionengine import FlowDetector, run_detectors
 from init import *
 
-def update_local_hosts(rows, config_dict):
+
+class LocalHostsDetector(FlowDetector):
     """
-    Check for new IPs in the provided rows and add them to localhosts.db if necessary.
-    Uses an in-memory list to avoid repeated database queries.
+    Adds local addresses not yet in localhosts to the database, raising a new host alert.
+    Uses an in-memory set to avoid repeated database queries.
     """
-    logger = logging.getLogger(__name__)
-    log_info(logger,"[INFO] Starting to update local hosts")
-    # Connect to the localhosts database
-    LOCAL_NETWORKS=set(config_dict['LocalNetworks'].split(','))
 
-    try:
+    name = "NewHostsDetection"
+    parallel = False
 
-        existing_localhosts = get_localhosts()
-        log_info(logger, f"[INFO] Loaded {len(existing_localhosts)} existing local hosts into memory")
-    
-        for row in rows:
-            for range_index in (0, 1):  # Assuming the IP addresses are in the first two columns
-                ip_address = row[range_index]
+    def start(self):
+        log_info(self.logger,"[INFO] Starting to update local hosts")
+        self.existing_localhosts = get_localhosts()
+        log_info(self.logger, f"[INFO] Loaded {len(self.existing_localhosts)} existing local hosts into memory")
 
-                # Check if the IP is within any of the allowed network ranges
-                is_local = is_ip_in_range(ip_address, LOCAL_NETWORKS)
+    def process_row(self, flows, i):
+        for ip_address, is_local in ((flows.src_ip[i], flows.src_local[i]), (flows.dst_ip[i], flows.dst_local[i])):
+            if is_local and ip_address not in self.existing_localhosts:
+                # Add the new IP to localhosts.db
+                row = flows.rows[i]
+                original_flow = json.dumps(row)  # Encode the original flow as JSON
+                insert_localhost_basic(ip_address, original_flow)
 
-                if is_local and ip_address not in existing_localhosts:
-                    # Add the new IP to localhosts.db
-                    first_seen = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    original_flow = json.dumps(row)  # Encode the original flow as JSON
-                    insert_localhost_basic(ip_address, original_flow)
+                self.existing_localhosts.add(ip_address)  # Add to in-memory set
+                log_info(self.logger, f"[INFO] Added new IP to localhosts.db: {ip_address}")
 
-                    existing_localhosts.add(ip_address)  # Add to in-memory set
-                    log_info(logger, f"[INFO] Added new IP to localhosts.db: {ip_address}")
-                    
-                    message = f"New Host Detected: {ip_address}"
+                message = f"New Host Detected: {ip_address}"
 
-                    handle_alert(
-                        config_dict,
-                        "NewHostsDetection",
-                        message,
-                        ip_address,
-                        row,
-                        "New Host Detected",
-                        "",
-                        "",
-                        f"{ip_address}_NewHostsDetection"
-                    )  
+                self.alert(
+                    "NewHostsDetection",
+                    message,
+                    ip_address,
+                    row,
+                    "New Host Detected",
+                    "",
+                    "",
+                    f"{ip_address}_NewHostsDetection"
+                )
 
-    except Exception as e:
-        log_error(logger, f"[ERROR] Error in update_local_hosts: {e}")
+    def finish(self):
+        log_info(self.logger,"[INFO] Finished updating local hosts")
 
 
-    log_info(logger,"[INFO] Finished updating local hosts")
\ No newline at end of file
+def update_local_hosts(rows, config_dict):
+    """
+    Check for new IPs in the provided rows and add them to localhosts.db if necessary.
+    Uses an in-memory list to avoid repeated database queries.
+    """
+    run_detectors(rows, config_dict, [LocalHostsDetector(config_dict)])
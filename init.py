@@ -36,6 +36,10 @@ from src.const import (
     CONST_CREATE_TORNODES_SQL,
     CONST_CREATE_PIHOLE_SQL,
     CONST_LINK_LOCAL_RANGE,
+    CONST_TAG_IGNORELIST,
+    CONST_TAG_BROADCAST,
+    CONST_TAG_MULTICAST,
+    CONST_TAG_LINKLOCAL,
     CONST_SITE,
     IS_CONTAINER,
     VERSION,
@@ -45,8 +49,11 @@ from src.const import (
 
 from src.network import (
     is_ip_in_range,
+    NetworkSet,
+    get_network_set,
     ip_network_to_range,
     ip_to_int,
+    int_to_ip,
     get_usable_ips,
     calculate_broadcast
 )
@@ -67,6 +74,7 @@ from database.core import (
 #     create_table, 
 #     delete_database,
       delete_all_records, 
+     bulk_replace_table,
      get_row_count, 
      run_timed_query
 )
@@ -84,6 +92,7 @@ from database.common import (
 # Alert functions
 from database.alerts import (
     log_alert_to_db, 
+    log_alerts_to_db,
     get_alerts_summary, 
     get_recent_alerts_by_ip, 
     get_alerts_by_category, 
@@ -92,6 +101,9 @@ from database.alerts import (
     delete_alert_database,
     get_recent_alerts_database,
     get_alert_count_by_id,
+    get_alert_rowid_stats,
+    record_alerts_deleted,
+    get_alert_ids_page,
     get_hourly_alerts_summary,
     summarize_alerts_by_ip,
     get_all_alerts_by_ip
@@ -104,6 +116,7 @@ from database.ipasn import  (
 # Configuration functions
 from database.configuration import (
     get_config_settings, 
+    get_config_setting,
     update_config_setting
 )
 
@@ -175,9 +188,11 @@ from database.services import (
 
 from database.tornodes import (
     get_all_tor_nodes,
-    insert_tor_node
+    insert_tor_node,
+    replace_tor_nodes
 )
 
 from database.newflows import (
-    update_new_flow
+    update_new_flow,
+    update_new_flows_bulk
 )
\ No newline at end of file
@@ -0,0 +1,224 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+# Set up path for imports
+current_dir = Path(__file__).resolve().parent
+parent_dir = str(current_dir.parent)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+sys.path.insert(0, "/database")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.const import (
+    CONST_ENRICHMENT_CACHE_SIZE, CONST_ENRICHMENT_TTL_SECONDS, CONST_ENRICHMENT_CHECK_SECONDS,
+    CONST_ENRICHMENT_GENERATION_KEYS
+)
+from init import *
+from database.ipasn import get_asn_for_ip
+from integrations.geolocation import get_geolocation_index
+from integrations.reputation import get_reputation_index
+from integrations.ipintel import get_ip_intel
+
+
+class EnrichmentCache:
+    """
+    LRU cache with a size cap and a time to live per entry.
+
+    Values are produced by a loader on a miss. Hit, miss, expiry and eviction
+    counters are kept for stats(), and invalidate() drops every entry at once.
+    """
+
+    def __init__(self, max_size=CONST_ENRICHMENT_CACHE_SIZE, ttl=CONST_ENRICHMENT_TTL_SECONDS):
+        """
+        Args:
+            max_size (int): Most entries kept before the least recently used is evicted
+            ttl (float): Seconds an entry stays valid after it is loaded
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, loader):
+        """
+        Return the cached value for key, calling loader(key) to fill it on a miss.
+
+        The loader runs outside the lock. Its value is not stored when the cache was
+        invalidated in the meantime.
+
+        Args:
+            key: Cache key
+            loader: Callable producing the value for key
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self.entries[key]
+                self.expirations += 1
+            self.misses += 1
+            invalidations = self.invalidations
+
+        value = loader(key)
+
+        with self.lock:
+            # An invalidate() while the loader ran means the value may come from the replaced dataset
+            if self.invalidations != invalidations:
+                return value
+            self.entries[key] = (now + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def invalidate(self):
+        """Drop every entry, e.g. after an underlying dataset was re-imported."""
+        with self.lock:
+            self.entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        """Return the cache size and counters as a dictionary."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0
+        }
+
+
+# Caches shared by everything in this process, see check_enrichment_generation
+ip_enrichment_cache = EnrichmentCache()
+port_services_cache = EnrichmentCache()
+enrichment_generation = None
+enrichment_checked = None
+enrichment_lock = threading.Lock()
+tor_nodes = None
+
+
+def check_enrichment_generation():
+    """
+    Invalidate the caches when a dataset has been re-imported since they were filled.
+
+    The import generations and the IP intelligence file are checked at most every
+    CONST_ENRICHMENT_CHECK_SECONDS.
+    """
+    global enrichment_generation, enrichment_checked, tor_nodes
+    logger = logging.getLogger(__name__)
+
+    now = time.monotonic()
+    if enrichment_checked is not None and now - enrichment_checked < CONST_ENRICHMENT_CHECK_SECONDS:
+        return
+
+    with enrichment_lock:
+        if enrichment_checked is not None and now - enrichment_checked < CONST_ENRICHMENT_CHECK_SECONDS:
+            return
+        enrichment_checked = now
+        ip_intel = get_ip_intel()
+        generation = tuple(get_config_setting(key) for key in CONST_ENRICHMENT_GENERATION_KEYS) + (ip_intel.identity if ip_intel else None,)
+        if generation != enrichment_generation:
+            if enrichment_generation is not None:
+                log_info(logger, "[INFO] Enrichment datasets changed, clearing the enrichment caches")
+            enrichment_generation = generation
+            tor_nodes = None
+            ip_enrichment_cache.invalidate()
+            port_services_cache.invalidate()
+
+
+def load_ip_enrichment(ip_address):
+    """
+    Look up everything known about an address from the IP intelligence file, or from
+    the geolocation and reputation indexes, the ASN table and the Tor list until one
+    has been compiled.
+
+    Args:
+        ip_address (str): The IP address to enrich
+
+    Returns:
+        dict: country, asn, isp_name, asn_network, reputation_network and tor
+    """
+    global tor_nodes
+    ip_int = ip_to_int(ip_address)
+    enrichment = {"country": None, "asn": None, "isp_name": None, "asn_network": None, "reputation_network": None, "tor": False}
+    if not ip_int:
+        return enrichment
+
+    ip_intel = get_ip_intel()
+    if ip_intel is not None:
+        return ip_intel.lookup(ip_int) or enrichment
+
+    enrichment["country"] = get_geolocation_index().lookup(ip_int)
+    enrichment["reputation_network"] = get_reputation_index().lookup(ip_int)
+    asn = get_asn_for_ip(ip_address)
+    if asn:
+        enrichment["asn"] = asn["asn"]
+        enrichment["isp_name"] = asn["isp_name"]
+        enrichment["asn_network"] = asn["network"]
+    if tor_nodes is None:
+        tor_nodes = set(get_all_tor_nodes())
+    enrichment["tor"] = ip_address in tor_nodes
+    return enrichment
+
+
+def get_ip_enrichment(ip_address):
+    """
+    Return the cached enrichment for an address, see load_ip_enrichment.
+
+    The returned dictionary is shared with other callers and must not be modified.
+    """
+    check_enrichment_generation()
+    return ip_enrichment_cache.get(ip_address, load_ip_enrichment)
+
+
+def get_port_services(port_number):
+    """
+    Return the cached services for a port, in the shape returned by get_services_by_port.
+
+    The returned dictionary is shared with other callers and must not be modified.
+    """
+    check_enrichment_generation()
+    return port_services_cache.get(int(port_number), get_services_by_port)
+
+
+def get_enrichment_stats():
+    """Return the counters of this process's enrichment caches."""
+    return {
+        "ip": ip_enrichment_cache.stats(),
+        "port": port_services_cache.stats()
+    }
+
+
+def log_enrichment_stats():
+    """Log this process's enrichment cache counters and store them as the EnrichmentCacheStats setting."""
+    logger = logging.getLogger(__name__)
+    stats = get_enrichment_stats()
+    for name, cache_stats in stats.items():
+        log_info(logger, f"[PERFORMANCE] Enrichment cache {name}: {cache_stats['size']} entries, {cache_stats['hits']} hits, "
+                         f"{cache_stats['misses']} misses, {cache_stats['evictions']} evictions, hit rate {cache_stats['hit_rate']:.1%}")
+    update_config_setting('EnrichmentCacheStats', json.dumps(stats))
@@ -7,6 +7,10 @@ import zipfile
 import os
 import sqlite3
 import sys
+import threading
+import time
+from array import array
+from bisect import bisect_right
 from datetime import datetime, timedelta
 from pathlib import Path
 # Set up path for imports
@@ -14,10 +18,11 @@ current_dir = Path(__file__).resolve().parent
 parent_dir = str(current_dir.parent)
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
-from database.geolocation import insert_geolocation, get_all_geolocations, get_country_by_ip_int
+from database.geolocation import replace_geolocations, get_all_geolocations
 sys.path.insert(0, "/database")
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from init import *
+from integrations.ipintel import get_ip_intel
 
 
 if IS_CONTAINER:
@@ -41,7 +46,6 @@ def create_geolocation_db():
     locations_csv_url = "https://download.maxmind.com/app/geoip_download?edition_id=GeoLite2-Country-CSV&license_key={api_key}&suffix=zip"
 
     temp_dir = "/database"
-    BATCH_SIZE = 1000  # Number of records to process in each batch
     
     # Define paths for files
     blocks_zip_path = os.path.join(temp_dir, "GeoLite2-Country-Blocks.zip")
@@ -127,79 +131,216 @@ def create_geolocation_db():
                 country_name = row.get("country_name", "")
                 locations[geoname_id] = country_name
 
-        # Step 4: Populate the database from the country blocks CSV file in batches
+        # Step 4: Stream the country blocks CSV, then LOCAL_NETWORKS, into the table in one transaction
         log_info(logger, f"[INFO] Populating the SQLite database with country blocks data...")
-        geolocation_batch = []
-        total_records = 0
-        
-        with open(blocks_csv_path, "r", encoding="utf-8") as blocks_file:
-            reader = csv.DictReader(blocks_file)
-            for row in reader:
-                network = row["network"]
+
+        def geolocation_rows():
+            with open(blocks_csv_path, "r", encoding="utf-8") as blocks_file:
+                reader = csv.DictReader(blocks_file)
+                for row in reader:
+                    network = row["network"]
+                    start_ip, end_ip, netmask = ip_network_to_range(network)
+                    if start_ip is None:
+                        continue
+
+                    geoname_id = row.get("geoname_id")
+                    country_name = locations.get(geoname_id, None)  # Get the country name from the locations dictionary
+                    yield (network, start_ip, end_ip, netmask, country_name)
+
+            for network in LOCAL_NETWORKS:
                 start_ip, end_ip, netmask = ip_network_to_range(network)
                 if start_ip is None:
                     continue
+                yield (network, start_ip, end_ip, netmask, SITE)
 
-                geoname_id = row.get("geoname_id")
-                country_name = locations.get(geoname_id, None)  # Get the country name from the locations dictionary
-
-                # Add to batch
-                geolocation_batch.append((network, start_ip, end_ip, netmask, country_name))
-                
-                # When batch size is reached, process the batch
-                if len(geolocation_batch) >= BATCH_SIZE:
-                    success_count, _ = insert_geolocation(geolocation_batch)
-                    total_records += success_count
-                    geolocation_batch = []  # Clear the batch
-                    log_info(logger, f"[INFO] Inserted {total_records} geolocation records so far...")
-
-        # Process any remaining records in the last batch
-        if geolocation_batch:
-            success_count, _ = insert_geolocation(geolocation_batch)
-            total_records += success_count
-            log_info(logger, f"[INFO] Inserted {total_records} total MaxMind geolocation records")
-            geolocation_batch = []  # Clear the batch
-
-        # After processing CSV files, add LOCAL_NETWORKS
-        log_info(logger, f"[INFO] Adding LOCAL_NETWORKS to geolocation database...")
-        local_networks_batch = []
-
-        for network in LOCAL_NETWORKS:
-            start_ip, end_ip, netmask = ip_network_to_range(network)
-            if start_ip is None:
-                continue
-            local_networks_batch.append((network, start_ip, end_ip, netmask, SITE))
+        total_records = replace_geolocations(geolocation_rows())
+        if total_records is None:
+            log_error(logger, "[ERROR] Geolocation import failed, keeping the previous geolocation data.")
+            return
+        log_info(logger, f"[INFO] Loaded {total_records} geolocation records including LOCAL_NETWORKS")
 
-        # Process the local networks batch
-        if local_networks_batch:
-            success_count, _ = insert_geolocation(local_networks_batch)
-            log_info(logger, f"[INFO] Added {success_count} local network records to geolocation database")
+        # Tell running processes to rebuild their geolocation index from the new rows
+        update_config_setting('GeolocationGeneration', str(time.time_ns()))
 
         log_info(logger, f"[INFO] Geolocation database {CONST_CONSOLIDATED_DB} created successfully.")
 
     except Exception as e:
         log_error(logger, f"[ERROR] Error creating geolocation database: {e}")
 
-def load_geolocation_data():
+class GeolocationIndex:
+    """
+    In-memory country lookup built from the geolocation table.
+
+    Nested networks are flattened into sorted, non-overlapping intervals where the most
+    specific network wins, so a lookup is one bisect over the start addresses. Country
+    names are stored once and referenced by code, code 0 meaning no country.
+    """
+
+    __slots__ = ('starts', 'ends', 'codes', 'countries', 'generation')
+
+    def __init__(self, geolocation_data, generation=None):
+        """
+        Args:
+            geolocation_data: Rows of (network, start_ip, end_ip, netmask, country_name)
+            generation: GeolocationGeneration value the rows were loaded under
+        """
+        self.starts = array('L')
+        self.ends = array('L')
+        self.codes = array('H')
+        self.countries = [None]
+        self.generation = generation
+
+        country_codes = {None: 0}
+        ranges = []
+        for entry in geolocation_data or []:
+            if len(entry) < 5 or entry[1] is None or entry[2] is None:
+                continue
+            country = entry[4] or None
+            if country not in country_codes:
+                country_codes[country] = len(self.countries)
+                self.countries.append(country)
+            ranges.append((entry[1], entry[2], country_codes[country]))
+
+        # Outer networks sort ahead of the networks nested inside them
+        ranges.sort(key=lambda r: (r[0], -r[1]))
+
+        stack = []
+        cursor = 0
+        for start_ip, end_ip, code in ranges:
+            while stack and stack[-1][0] < start_ip:
+                stack_end, stack_code = stack.pop()
+                if cursor <= stack_end:
+                    self._emit(cursor, stack_end, stack_code)
+                    cursor = stack_end + 1
+            if stack and cursor < start_ip:
+                self._emit(cursor, start_ip - 1, stack[-1][1])
+            cursor = start_ip
+            stack.append((end_ip, code))
+        while stack:
+            stack_end, stack_code = stack.pop()
+            if cursor <= stack_end:
+                self._emit(cursor, stack_end, stack_code)
+                cursor = stack_end + 1
+
+    def _emit(self, start_ip, end_ip, code):
+        """Append an interval, extending the previous one when it is adjacent and has the same country."""
+        if not code:
+            return
+        if self.codes and self.codes[-1] == code and self.ends[-1] + 1 == start_ip:
+            self.ends[-1] = end_ip
+            return
+        self.starts.append(start_ip)
+        self.ends.append(end_ip)
+        self.codes.append(code)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def lookup_code(self, ip_int):
+        """Return the country code for an integer address, 0 when it is not covered."""
+        if not ip_int:
+            return 0
+        i = bisect_right(self.starts, ip_int) - 1
+        if i >= 0 and ip_int <= self.ends[i]:
+            return self.codes[i]
+        return 0
+
+    def lookup(self, ip_int):
+        """
+        Args:
+            ip_int (int): IPv4 address as an integer
+
+        Returns:
+            str: The country name, or None if not found
+        """
+        return self.countries[self.lookup_code(ip_int)]
+
+    def lookup_many(self, ip_ints):
+        """
+        Look up a batch of integer addresses, searching each distinct address once.
+
+        Args:
+            ip_ints: Iterable of IPv4 addresses as integers
+
+        Returns:
+            list: Country names (or None) in the same order as ip_ints
+        """
+        starts, ends, codes, countries = self.starts, self.ends, self.codes, self.countries
+        resolved = {}
+        results = []
+        for ip_int in ip_ints:
+            country = resolved.get(ip_int, resolved)
+            if country is resolved:
+                country = None
+                if ip_int:
+                    i = bisect_right(starts, ip_int) - 1
+                    if i >= 0 and ip_int <= ends[i]:
+                        country = countries[codes[i]]
+                resolved[ip_int] = country
+            results.append(country)
+        return results
+
+    def codes_for(self, country_names):
+        """Return the set of codes for the given country names that appear in the index."""
+        return {code for code, country in enumerate(self.countries) if code and country in country_names}
+
+
+_geolocation_index = None
+_geolocation_index_lock = threading.Lock()
+
+def get_geolocation_index(generation=None):
     """
-    Load geolocation data from the database into memory.
+    Return this process's geolocation index, building it on first use and again
+    whenever the fetch process has re-imported the geolocation table.
+
+    Args:
+        generation: The GeolocationGeneration setting when the caller already has it,
+                    otherwise it is read from the configuration table
 
     Returns:
-        list: A list of tuples containing (network, country_name).
+        GeolocationIndex: The current index
     """
+    global _geolocation_index
     logger = logging.getLogger(__name__)
-    geolocation_data = []
 
-    geolocation_data = get_all_geolocations()
-    return geolocation_data
+    if generation is None:
+        generation = get_config_setting('GeolocationGeneration')
+
+    index = _geolocation_index
+    if index is not None and index.generation == generation:
+        return index
 
-def lookup_ip_country(ip_address):
+    with _geolocation_index_lock:
+        index = _geolocation_index
+        if index is None or index.generation != generation:
+            start = time.perf_counter()
+            index = GeolocationIndex(get_all_geolocations(), generation)
+            _geolocation_index = index
+            log_info(logger, f"[PERFORMANCE] Built geolocation index of {len(index)} intervals in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return index
+
+def load_geolocation_data(generation=None):
+    """
+    Load the geolocation lookup for a detection cycle.
+
+    The table is only read again after the fetch process has re-imported it.
+
+    Args:
+        generation: The GeolocationGeneration setting from the cycle's configuration
+
+    Returns:
+        GeolocationIndex: The current geolocation index
+    """
+    return get_geolocation_index(generation)
+
+def lookup_ip_country(ip_address, generation=None):
     """
     Look up the country for a given IP address by converting it to an integer
     and finding which geolocation range it falls within.
     
     Args:
         ip_address (str): The IP address to look up
+        generation: The GeolocationGeneration setting when the caller already has it
         
     Returns:
         str: The country name, or None if not found
@@ -214,7 +355,12 @@ def lookup_ip_country(ip_address):
             log_error(logger, f"[ERROR] Invalid IP address format: {ip_address}")
             return None
         
-        result = get_country_by_ip_int(ip_int)
+        # The compiled IP intelligence file is shared by every process, the index is the fallback until one exists
+        ip_intel = get_ip_intel()
+        if ip_intel is not None:
+            result = ip_intel.lookup_country(ip_int)
+        else:
+            result = get_geolocation_index(generation).lookup(ip_int)
 
         if result:
             return result
@@ -227,4 +373,3 @@ def lookup_ip_country(ip_address):
         log_error(logger, f"[ERROR] Error looking up country for IP {ip_address}: {e}")
         return None
 
-
@@ -8,35 +8,172 @@ if parent_dir not in sys.path:
 src_dir = f"{parent_dir}/src"
 if str(src_dir) not in sys.path:
     sys.path.insert(0, str(src_dir))
+import io
 import logging
 import requests
+import resource
 import zipfile
-from src.const import CONST_CONSOLIDATED_DB
+from src.const import CONST_CONSOLIDATED_DB, CONST_ASN_CHUNK_SIZE
 import json
 import sqlite3
 from init import *
 
 
+def iter_json_object(stream, chunk_size=CONST_ASN_CHUNK_SIZE):
+    """
+    Yield the (key, value) pairs of a top level JSON object read from a text stream.
+
+    Only the current member's value and one chunk of text are held in memory, so
+    very large files can be parsed without loading them whole.
+
+    Args:
+        stream: Text stream positioned at the start of a JSON object
+        chunk_size (int): Characters read from the stream at a time
+
+    Raises:
+        json.JSONDecodeError: If the stream is not a well formed JSON object
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    exhausted = False
+
+    def fill():
+        # Drop the consumed text and append the next chunk, returns False at end of stream
+        # without touching the buffer, so offsets into it stay valid
+        nonlocal buffer, position, exhausted
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            exhausted = True
+            return False
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+
+    def next_char():
+        # Skip whitespace and return the next significant character without consuming it
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\n\r":
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if not fill():
+                raise json.JSONDecodeError("Unexpected end of JSON object", buffer, position)
+
+    def decode():
+        # Decode one complete value, reading more text while it is cut off at the end of the buffer
+        nonlocal position
+        next_char()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if exhausted or not fill():
+                    raise
+                continue
+            # A number close to the end of the buffer may continue in the next chunk, "1." or "1e+"
+            # cut off there decodes as the integer 1 and leaves the rest of the number behind
+            if len(buffer) - end < 3 and not exhausted and fill():
+                continue
+            position = end
+            return value
+
+    if next_char() != "{":
+        raise json.JSONDecodeError("Expected a JSON object", buffer, position)
+    position += 1
+    if next_char() == "}":
+        return
+
+    while True:
+        key = decode()
+        if next_char() != ":":
+            raise json.JSONDecodeError("Expected ':' after an object key", buffer, position)
+        position += 1
+        yield key, decode()
+
+        separator = next_char()
+        position += 1
+        if separator == "}":
+            return
+        if separator != ",":
+            raise json.JSONDecodeError("Expected ',' or '}' in an object", buffer, position - 1)
+
+def read_memory_status_mb(field):
+    """
+    Read a memory field such as VmRSS or VmHWM from /proc/self/status.
+
+    Returns:
+        float: The value in MB, or None where /proc is not available
+    """
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+def reset_peak_rss():
+    """
+    Reset this process's peak resident set size, so get_peak_rss_mb reports the peak
+    from here on rather than the lifetime peak of the long running fetch process.
+
+    Returns:
+        bool: False when the kernel does not allow the reset
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+def get_rss_mb():
+    """Return this process's current resident set size in MB, or the lifetime peak without /proc."""
+    rss = read_memory_status_mb("VmRSS")
+    # ru_maxrss is reported in kilobytes on Linux
+    return rss if rss is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def get_peak_rss_mb():
+    """Return this process's peak resident set size in MB since the last reset_peak_rss."""
+    peak = read_memory_status_mb("VmHWM")
+    return peak if peak is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
 def create_asn_database():
     """
     Downloads ASN (Autonomous System Number) data from oxl.app,
     extracts IP ranges and ISP information, and stores it in a database.
     
     This enables IP to ISP lookups to identify the provider of an IP address.
+    The download, the zip member and the JSON are all streamed, so memory use
+    stays flat regardless of the size of the ASN file.
     """
     logger = logging.getLogger(__name__)
+
+    # Measure the import's own peak, not whatever earlier work in this process reached
+    if not reset_peak_rss():
+        log_warn(logger, "[WARN] Unable to reset the peak RSS, the logged peak covers the whole process lifetime")
+    start_rss = get_rss_mb()
     
     try:
         # Step 1: Create temporary directory if it doesn't exist
         temp_dir = "/database"
         os.makedirs(temp_dir, exist_ok=True)
         zip_path = os.path.join(temp_dir, "asn_ipv4_full.json.zip")
-        json_path = os.path.join(temp_dir, "asn_ipv4_full.json")
         
-        # Step 2: Download the ASN data file with 30-second timeout
+        # Step 2: Download the ASN data file with 30-second timeout, writing it to disk in chunks
         log_info(logger, "[INFO] Downloading ASN database from oxl.app with 30 second timeout...")
         try:
-            response = requests.get("https://geoip.oxl.app/file/asn_ipv4_full.json.zip", stream=True, timeout=30)
+            with requests.get("https://geoip.oxl.app/file/asn_ipv4_full.json.zip", stream=True, timeout=30) as response:
+                if response.status_code != 200:
+                    log_error(logger, f"[ERROR] Failed to download ASN database: {response.status_code}")
+                    return
+
+                with open(zip_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=CONST_ASN_CHUNK_SIZE):
+                        f.write(chunk)
         except requests.exceptions.Timeout:
             log_error(logger, "[ERROR] Timeout after 30 seconds while downloading ASN database.")
             return
@@ -44,105 +181,83 @@ def create_asn_database():
             log_error(logger, "[ERROR] Connection error while downloading ASN database. Check your internet connection.")
             return
         
-        if response.status_code != 200:
-            log_error(logger, f"[ERROR] Failed to download ASN database: {response.status_code}")
-            return
-            
-        with open(zip_path, "wb") as f:
-            f.write(response.content)
-        
-        # Step 3: Extract the ZIP file
-        log_info(logger, "[INFO] Extracting ASN database ZIP file...")
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir)
-        
-        # Step 4: Ensure we have the extracted JSON file
-        if not os.path.exists(json_path):
-            log_error(logger, "[ERROR] ASN JSON file not found after extraction")
-            return
-        
-        # Step 6: Parse the JSON and insert data into database
+        log_info(logger, f"[INFO] Downloaded ASN database ZIP file, peak RSS {get_peak_rss_mb():.1f} MB from {start_rss:.1f} MB at the start")
+
+        # Step 3: Parse the JSON straight out of the ZIP file and insert data into database
         log_info(logger, "[INFO] Processing ASN data and inserting into database...")
 
         try:
-            # For large files, process the data
             count = 0
-            with open(json_path, 'r') as json_file:
-                data = json.load(json_file)
-                
-                # New JSON structure is a dictionary with ASNs as keys
-                if not isinstance(data, dict):
-                    log_error(logger, f"[ERROR] Expected a dictionary of ASN entries, got {type(data).__name__}")
+            asn_count = 0
+            batch_size = 1000
+            current_batch = []
+
+            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                json_members = [name for name in zip_ref.namelist() if name.endswith(".json")]
+                if not json_members:
+                    log_error(logger, "[ERROR] ASN JSON file not found in ZIP file")
                     return
-                    
-                total_entries = sum(len(asn_data.get("ipv4", [])) for asn_data in data.values())
-                log_info(logger, f"[INFO] Found ASN data for {len(data)} ASNs with approximately {total_entries} network entries")
-                
-                # Process in batches for better performance
-                batch_size = 1000
-                current_batch = []
-                
-                # Loop through each ASN entry
-                for asn, asn_data in data.items():
-                    # Skip if not a dictionary
-                    if not isinstance(asn_data, dict):
-                        log_warn(logger, f"[WARN] Skipping invalid ASN data for {asn}")
-                        continue
-                    
-                    # Get IPv4 networks
-                    ipv4_networks = asn_data.get("ipv4", [])
-                    if not ipv4_networks:
-                        continue
-                    
-                    # Get organization info
-                    org_info = asn_data.get("organization", {})
-                    org_name = org_info.get("name", "") if isinstance(org_info, dict) else ""
-                    
-                    # Process each network for this ASN
-                    for network in ipv4_networks:
-                        # Convert network CIDR to start_ip, end_ip, netmask
-                        start_ip, end_ip, netmask = ip_network_to_range(network)
-                        if start_ip is None:
+
+                with zip_ref.open(json_members[0]) as member, io.TextIOWrapper(member, encoding="utf-8") as json_file:
+                    # The JSON is a dictionary with ASNs as keys, read one ASN entry at a time
+                    for asn, asn_data in iter_json_object(json_file):
+                        # Skip if not a dictionary
+                        if not isinstance(asn_data, dict):
+                            log_warn(logger, f"[WARN] Skipping invalid ASN data for {asn}")
                             continue
                         
-                        # Add to current batch
-                        current_batch.append((
-                            network,
-                            start_ip,
-                            end_ip,
-                            netmask,
-                            str(asn),
-                            org_name
-                        ))
+                        # Get IPv4 networks
+                        ipv4_networks = asn_data.get("ipv4", [])
+                        if not ipv4_networks:
+                            continue
+                        asn_count += 1
+                        
+                        # Get organization info
+                        org_info = asn_data.get("organization", {})
+                        org_name = org_info.get("name", "") if isinstance(org_info, dict) else ""
                         
-                        # Execute batch when it reaches the desired size
-                        if len(current_batch) >= batch_size:
-                            from database.ipasn import insert_asn_records_batch
-                            success, inserted = insert_asn_records_batch(current_batch)
-                            if success:
-                                count += inserted
-                            current_batch = []
+                        # Process each network for this ASN
+                        for network in ipv4_networks:
+                            # Convert network CIDR to start_ip, end_ip, netmask
+                            start_ip, end_ip, netmask = ip_network_to_range(network)
+                            if start_ip is None:
+                                continue
+                            
+                            # Add to current batch
+                            current_batch.append((
+                                network,
+                                start_ip,
+                                end_ip,
+                                netmask,
+                                str(asn),
+                                org_name
+                            ))
+                            
+                            # Execute batch when it reaches the desired size
+                            if len(current_batch) >= batch_size:
+                                success, inserted = insert_asn_records_batch(current_batch)
+                                if success:
+                                    count += inserted
+                                current_batch = []
                 
-                # Insert any remaining entries in the last batch
-                if current_batch:
-                    from database.ipasn import insert_asn_records_batch
-                    success, inserted = insert_asn_records_batch(current_batch)
-                    if success:
-                        count += inserted
+            # Insert any remaining entries in the last batch
+            if current_batch:
+                success, inserted = insert_asn_records_batch(current_batch)
+                if success:
+                    count += inserted
                         
         except json.JSONDecodeError as e:
             log_error(logger, f"[ERROR] Invalid JSON format in ASN data file: {e}")
             return
 
-        log_info(logger, f"[INFO] ASN database created successfully with {count} entries")
+        log_info(logger, f"[INFO] ASN database created successfully with {count} entries for {asn_count} ASNs, peak RSS {get_peak_rss_mb():.1f} MB from {start_rss:.1f} MB at the start")
+
+        # Tell running processes to drop ASN details cached from the previous import
+        update_config_setting('AsnGeneration', str(time.time_ns()))
         
-        # Step 8: Clean up temporary files
+        # Step 4: Clean up temporary files
         if os.path.exists(zip_path):
             os.remove(zip_path)
-        if os.path.exists(json_path):
-            os.remove(json_path)
             
     except Exception as e:
         log_error(logger, f"[ERROR] Error creating ASN database: {e}")
-
-
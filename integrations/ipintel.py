@@ -0,0 +1,502 @@
+import logging
+import mmap
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from heapq import heapify, heappop, heappush
+from pathlib import Path
+# Set up path for imports
+current_dir = Path(__file__).resolve().parent
+parent_dir = str(current_dir.parent)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+sys.path.insert(0, "/database")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# database.ipasn imports this module while init is still loading, so nothing here may import init
+from src.const import CONST_IP_INTEL_FILE, CONST_IP_INTEL_CHECK_SECONDS, CONST_CONSOLIDATED_DB
+from src.locallogging import log_info, log_error
+from database.core import connect_to_db, disconnect_from_db
+
+# File layout, all integers in native byte order:
+#   header: magic, range count, string count, string data length, generation length
+#   uint32 columns of range count entries: starts, ends, country, asn, isp_name, asn_network, reputation_network
+#   uint32 string offsets (string count + 1 entries), then uint8 flags per range, then the UTF-8 string data
+#   and last the UTF-8 import generation the file was compiled from
+# The attribute columns hold string ids, id 0 meaning the range has no value for that source.
+IP_INTEL_MAGIC = b"NFIPINT2"
+IP_INTEL_HEADER = struct.Struct("=8sIIII")
+IP_INTEL_COLUMNS = ("starts", "ends", "country", "asn", "isp_name", "asn_network", "reputation_network")
+IP_INTEL_FLAG_TOR = 1
+
+# Reader opened on first use in each process, see get_ip_intel
+ip_intel = None
+ip_intel_checked = None
+ip_intel_lock = threading.Lock()
+
+
+class IpIntelStrings:
+    """
+    String table of an IP intelligence file, written straight into its final byte layout.
+
+    Id 0 is the empty string. Shared values are stored once, unique values such as
+    networks are appended without being kept in the lookup dictionary.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array('I', [0, 0])
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def add(self, value, shared=True):
+        """
+        Args:
+            value: Value to store, None and "" map to id 0
+            shared (bool): Look the value up first and store it only once
+
+        Returns:
+            int: The string id
+        """
+        if value is None or value == "":
+            return 0
+        value = str(value)
+        if shared:
+            sid = self.ids.get(value)
+            if sid is not None:
+                return sid
+        sid = len(self.offsets) - 1
+        self.data += value.encode("utf-8")
+        self.offsets.append(len(self.data))
+        if shared:
+            self.ids[value] = sid
+        return sid
+
+
+def flatten_ranges(rows):
+    """
+    Flatten possibly nested ranges into disjoint intervals where the most specific range wins.
+
+    Args:
+        rows: Iterable of (start_ip, end_ip, value) ordered by start_ip, then end_ip descending
+
+    Yields:
+        tuple: (start_ip, end_ip, value) disjoint intervals in address order
+    """
+    stack = []
+    cursor = 0
+    for start_ip, end_ip, value in rows:
+        while stack and stack[-1][0] < start_ip:
+            stack_end, stack_value = stack.pop()
+            if cursor <= stack_end:
+                yield cursor, stack_end, stack_value
+                cursor = stack_end + 1
+        if stack and cursor < start_ip:
+            yield cursor, start_ip - 1, stack[-1][1]
+        cursor = start_ip
+        stack.append((end_ip, value))
+    while stack:
+        stack_end, stack_value = stack.pop()
+        if cursor <= stack_end:
+            yield cursor, stack_end, stack_value
+            cursor = stack_end + 1
+
+
+def coalesce_ranges(rows):
+    """
+    Coalesce overlapping ranges into disjoint intervals where the outermost range wins.
+
+    Args:
+        rows: Iterable of (start_ip, end_ip, value) ordered by start_ip, then end_ip descending
+
+    Yields:
+        tuple: (start_ip, end_ip, value) disjoint intervals in address order
+    """
+    pending = None
+    for start_ip, end_ip, value in rows:
+        if pending is not None and start_ip <= pending[1]:
+            if end_ip > pending[1]:
+                # Only possible for ranges that are not CIDR aligned, extend the previous interval
+                pending = (pending[0], end_ip, pending[2])
+            continue
+        if pending is not None:
+            yield pending
+        pending = (start_ip, end_ip, value)
+    if pending is not None:
+        yield pending
+
+
+def merge_adjacent(intervals):
+    """
+    Merge adjacent intervals carrying the same values and drop intervals without any value.
+
+    Args:
+        intervals: Iterable of (start_ip, end_ip, values) in address order, values being a tuple of ids
+
+    Yields:
+        tuple: (start_ip, end_ip, values)
+    """
+    pending = None
+    for start_ip, end_ip, values in intervals:
+        if not any(values):
+            continue
+        if pending is not None and pending[2] == values and pending[1] + 1 == start_ip:
+            pending = (pending[0], end_ip, values)
+            continue
+        if pending is not None:
+            yield pending
+        pending = (start_ip, end_ip, values)
+    if pending is not None:
+        yield pending
+
+
+def collect_ranges(intervals, width):
+    """
+    Store intervals in typed columns.
+
+    Args:
+        intervals: Iterable of (start_ip, end_ip, values), values being a tuple of width ids
+        width (int): Number of values per interval
+
+    Returns:
+        tuple: (starts, ends, value_columns) as array('I') columns
+    """
+    starts = array('I')
+    ends = array('I')
+    value_columns = tuple(array('I') for _ in range(width))
+    for start_ip, end_ip, values in intervals:
+        starts.append(start_ip)
+        ends.append(end_ip)
+        for column, value in zip(value_columns, values):
+            column.append(value)
+    return starts, ends, value_columns
+
+
+def overlay_ranges(sources):
+    """
+    Overlay sources of sorted, disjoint intervals into one sequence of segments.
+
+    The boundaries of all sources are merged with a heap holding the next boundary
+    of each source, so nothing but the sources themselves is kept in memory.
+
+    Args:
+        sources: List of (starts, ends, value_columns) as returned by collect_ranges
+
+    Yields:
+        tuple: (start_ip, end_ip, values) for each stretch covered by at least one source, values
+               holding the value columns of every source in order, 0 where a source has no interval
+    """
+    empty = [(0,) * len(value_columns) for _, _, value_columns in sources]
+    current = list(empty)
+    positions = [0] * len(sources)
+    active = [False] * len(sources)
+    heap = [(starts[0], s) for s, (starts, _, _) in enumerate(sources) if len(starts)]
+    heapify(heap)
+
+    while heap:
+        point = heap[0][0]
+        while heap and heap[0][0] == point:
+            _, s = heappop(heap)
+            starts, ends, value_columns = sources[s]
+            p = positions[s]
+            if active[s]:
+                # The interval at p ended just before this point
+                p += 1
+                positions[s] = p
+                active[s] = False
+                current[s] = empty[s]
+            if p < len(starts):
+                if starts[p] == point:
+                    active[s] = True
+                    current[s] = tuple(column[p] for column in value_columns)
+                    heappush(heap, (ends[p] + 1, s))
+                else:
+                    heappush(heap, (starts[p], s))
+        if heap and any(active):
+            yield point, heap[0][0] - 1, sum(current, ())
+
+
+def read_geolocation_source(cursor, strings):
+    """Read the geolocation table in address order into a country source for overlay_ranges."""
+    cursor.execute("""
+        SELECT start_ip, end_ip, country_name FROM geolocation
+        WHERE start_ip IS NOT NULL AND end_ip IS NOT NULL
+        ORDER BY start_ip, end_ip DESC
+    """)
+    rows = ((start_ip, end_ip, (strings.add(country),)) for start_ip, end_ip, country in cursor)
+    return collect_ranges(merge_adjacent(flatten_ranges(rows)), 1)
+
+
+def read_asn_source(cursor, strings):
+    """Read the ipasn table in address order into an asn, isp_name and network source for overlay_ranges."""
+    cursor.execute("""
+        SELECT start_ip, end_ip, asn, isp_name, network FROM ipasn
+        WHERE start_ip IS NOT NULL AND end_ip IS NOT NULL
+        ORDER BY start_ip, end_ip DESC
+    """)
+    rows = ((start_ip, end_ip, (strings.add(asn), strings.add(isp_name), strings.add(network, shared=False)))
+            for start_ip, end_ip, asn, isp_name, network in cursor)
+    return collect_ranges(merge_adjacent(flatten_ranges(rows)), 3)
+
+
+def read_reputation_source(cursor, strings):
+    """Read the reputation list in address order into a listed network source for overlay_ranges."""
+    cursor.execute("""
+        SELECT start_ip, end_ip, network FROM reputationlist
+        WHERE start_ip IS NOT NULL AND end_ip IS NOT NULL
+        ORDER BY start_ip, end_ip DESC
+    """)
+    # Only the network of each coalesced interval is stored, so it is added once the interval is known
+    intervals = coalesce_ranges(cursor)
+    return collect_ranges(((start_ip, end_ip, (strings.add(network, shared=False),)) for start_ip, end_ip, network in intervals), 1)
+
+
+def read_tor_source(cursor):
+    """Read the Tor node list into a flag source for overlay_ranges."""
+    ip_ints = array('I')
+    for (ip_address,) in cursor.execute("SELECT ip_address FROM tornodes"):
+        try:
+            ip_ints.append(struct.unpack('!L', socket.inet_aton(ip_address))[0])
+        except (OSError, TypeError):
+            continue
+    ip_ints = array('I', sorted(set(ip_ints)))
+    return ip_ints, ip_ints, (array('I', [IP_INTEL_FLAG_TOR]) * len(ip_ints),)
+
+
+def read_ip_intel_generation(path=CONST_IP_INTEL_FILE):
+    """
+    Return the import generation an IP intelligence file was compiled from.
+
+    Returns:
+        str: The generation, or None when there is no readable file
+    """
+    try:
+        with open(path, "rb") as f:
+            magic, _, _, _, generation_length = IP_INTEL_HEADER.unpack(f.read(IP_INTEL_HEADER.size))
+            if magic != IP_INTEL_MAGIC:
+                return None
+            if not generation_length:
+                return ""
+            f.seek(-generation_length, os.SEEK_END)
+            return f.read(generation_length).decode("utf-8")
+    except (OSError, struct.error, UnicodeDecodeError):
+        return None
+
+
+def compile_ip_intel_file(generation=None, path=CONST_IP_INTEL_FILE, db_name=CONST_CONSOLIDATED_DB):
+    """
+    Compile the geolocation, ASN, reputation and Tor tables into one binary lookup file.
+
+    Each table is read in address order straight into typed columns, and the file is
+    skipped entirely when it was already compiled from the same import generation.
+
+    Args:
+        generation (str): The import generations of the four tables, compared with the
+                          generation stored in the current file
+        path (str): Where to write the file
+        db_name (str): Database holding the tables
+
+    Returns:
+        int: Number of ranges written, or None when skipped or on failure
+    """
+    logger = logging.getLogger(__name__)
+
+    if generation is not None and read_ip_intel_generation(path) == generation:
+        log_info(logger, f"[INFO] IP intelligence data unchanged since {path} was compiled, skipping")
+        return None
+
+    start = time.perf_counter()
+    conn = connect_to_db(db_name, "ipintel")
+    if not conn:
+        log_error(logger, "[ERROR] Unable to connect to database to compile the IP intelligence file")
+        return None
+
+    try:
+        strings = IpIntelStrings()
+        cursor = conn.cursor()
+        sources = [
+            read_geolocation_source(cursor, strings),
+            read_asn_source(cursor, strings),
+            read_reputation_source(cursor, strings),
+            read_tor_source(cursor)
+        ]
+    except Exception as e:
+        log_error(logger, f"[ERROR] Error reading data for the IP intelligence file: {e}")
+        return None
+    finally:
+        disconnect_from_db(conn)
+
+    log_info(logger, f"[PERFORMANCE] Read IP intelligence sources of {', '.join(str(len(source[0])) for source in sources)} ranges in {time.perf_counter() - start:.2f} seconds")
+    return write_ip_intel_file(path, sources, strings, generation or "")
+
+
+def write_ip_intel_file(path, sources, strings, generation=""):
+    """
+    Write an IP intelligence file from the geolocation, ASN, reputation and Tor sources.
+
+    The file is written next to the target and renamed over it, so processes reading
+    the previous copy never see a partial file.
+
+    Args:
+        path (str): Where to write the file
+        sources: Country, ASN, reputation and Tor sources as built by the read_*_source functions
+        strings (IpIntelStrings): The string table the sources' ids refer to
+        generation (str): Import generation stored at the end of the file
+
+    Returns:
+        int: Number of ranges written, or None on failure
+    """
+    logger = logging.getLogger(__name__)
+    start = time.perf_counter()
+    temp_path = f"{path}.tmp"
+
+    try:
+        columns = {name: array('I') for name in IP_INTEL_COLUMNS}
+        flags = array('B')
+        appends = [columns[name].append for name in IP_INTEL_COLUMNS]
+        for start_ip, end_ip, values in merge_adjacent(overlay_ranges(sources)):
+            appends[0](start_ip)
+            appends[1](end_ip)
+            for append, value in zip(appends[2:], values):
+                append(value)
+            flags.append(values[-1])
+
+        count = len(flags)
+        generation_data = generation.encode("utf-8")
+        with open(temp_path, "wb") as f:
+            f.write(IP_INTEL_HEADER.pack(IP_INTEL_MAGIC, count, len(strings), len(strings.data), len(generation_data)))
+            for name in IP_INTEL_COLUMNS:
+                columns[name].tofile(f)
+            strings.offsets.tofile(f)
+            flags.tofile(f)
+            f.write(strings.data)
+            f.write(generation_data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+        log_info(logger, f"[PERFORMANCE] Compiled IP intelligence file {path} with {count} ranges and {len(strings)} strings in {time.perf_counter() - start:.2f} seconds")
+        return count
+
+    except Exception as e:
+        log_error(logger, f"[ERROR] Error compiling IP intelligence file: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return None
+
+class IpIntelFile:
+    """
+    Read-only view of a compiled IP intelligence file.
+
+    The file is mapped with mmap and its columns are read through memoryviews, so
+    every process shares the same page cache copy and nothing is loaded up front.
+    """
+
+    def __init__(self, path=CONST_IP_INTEL_FILE):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_ino, stat.st_mtime_ns)
+
+        magic, count, string_count, string_length, generation_length = IP_INTEL_HEADER.unpack_from(self.mm, 0)
+        if magic != IP_INTEL_MAGIC:
+            raise ValueError(f"{path} is not an IP intelligence file")
+
+        view = memoryview(self.mm)
+        offset = IP_INTEL_HEADER.size
+        for name in IP_INTEL_COLUMNS:
+            setattr(self, name, view[offset:offset + 4 * count].cast('I'))
+            offset += 4 * count
+        self.string_offsets = view[offset:offset + 4 * (string_count + 1)].cast('I')
+        offset += 4 * (string_count + 1)
+        self.flags = view[offset:offset + count]
+        offset += count
+        self.string_data = view[offset:offset + string_length]
+        offset += string_length
+        self.generation = str(view[offset:offset + generation_length], "utf-8")
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def string(self, sid):
+        """Return the string stored under an id, None for id 0."""
+        if not sid:
+            return None
+        return str(self.string_data[self.string_offsets[sid]:self.string_offsets[sid + 1]], "utf-8")
+
+    def find(self, ip_int):
+        """Return the position of the range containing an integer address, or -1."""
+        if not ip_int:
+            return -1
+        i = bisect_right(self.starts, ip_int) - 1
+        if i >= 0 and ip_int <= self.ends[i]:
+            return i
+        return -1
+
+    def lookup(self, ip_int):
+        """
+        Args:
+            ip_int (int): IPv4 address as an integer
+
+        Returns:
+            dict: country, asn, isp_name, asn_network, reputation_network and tor for the
+                  address, or None when no source covers it
+        """
+        i = self.find(ip_int)
+        if i < 0:
+            return None
+        return {
+            "country": self.string(self.country[i]),
+            "asn": self.string(self.asn[i]),
+            "isp_name": self.string(self.isp_name[i]),
+            "asn_network": self.string(self.asn_network[i]),
+            "reputation_network": self.string(self.reputation_network[i]),
+            "tor": bool(self.flags[i] & IP_INTEL_FLAG_TOR)
+        }
+
+    def lookup_country(self, ip_int):
+        """Return the country for an integer address, or None."""
+        i = self.find(ip_int)
+        return self.string(self.country[i]) if i >= 0 else None
+
+
+def get_ip_intel(path=CONST_IP_INTEL_FILE):
+    """
+    Return this process's IP intelligence reader, reopening it after the fetch process
+    has renamed a new file into place.
+
+    Returns:
+        IpIntelFile: The current reader, or None when no file has been compiled yet
+    """
+    global ip_intel, ip_intel_checked
+    logger = logging.getLogger(__name__)
+
+    now = time.monotonic()
+    if ip_intel_checked is not None and now - ip_intel_checked < CONST_IP_INTEL_CHECK_SECONDS:
+        return ip_intel
+
+    with ip_intel_lock:
+        if ip_intel_checked is not None and now - ip_intel_checked < CONST_IP_INTEL_CHECK_SECONDS:
+            return ip_intel
+        ip_intel_checked = now
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            ip_intel = None
+            return None
+        if ip_intel is None or ip_intel.identity != (stat.st_ino, stat.st_mtime_ns):
+            try:
+                # The previous mapping is released once no lookup still holds it
+                ip_intel = IpIntelFile(path)
+                log_info(logger, f"[INFO] Opened IP intelligence file {path} with {len(ip_intel)} ranges")
+            except (OSError, ValueError) as e:
+                log_error(logger, f"[ERROR] Unable to open IP intelligence file {path}: {e}")
+    return ip_intel
@@ -9,8 +9,12 @@ from pathlib import Path
 import os
 import sqlite3
 import sys
+import threading
+import time
+from array import array
+from bisect import bisect_right
 from datetime import datetime, timedelta
-from database.reputation import insert_reputation, get_all_reputation_records
+from database.reputation import replace_reputation_records, get_all_reputation_records
 from pathlib import Path
 # Set up path for imports
 current_dir = Path(__file__).resolve().parent
@@ -25,8 +29,7 @@ from init import *
 
 def import_reputation_list(config_dict):
     """
-    Downloads the reputation list and imports it into the reputationlist table
-    in the geolocations.db database.
+    Downloads the reputation list and replaces the reputationlist table with it.
 
     Args:
         config_dict (dict): Configuration dictionary.
@@ -67,12 +70,21 @@ def import_reputation_list(config_dict):
                 start_ip = int(network.network_address)
                 end_ip = int(network.broadcast_address)
                 netmask = network.prefixlen
-                insert_reputation(str(network), start_ip, end_ip, netmask)
                 processed_networks.append((str(network), start_ip, end_ip, netmask))
             except ValueError:
                 log_error(logger, f"[ERROR] Invalid network entry in reputation list: {line}")
 
+        # The whole list replaces the table in one transaction, so detectors never see a partial list
+        if replace_reputation_records(processed_networks) is None:
+            return
+
         log_info(logger, f"[INFO] Imported {len(processed_networks)} networks into the reputation table.")
+
+        # Build the index for the new rows and tell running processes to reload theirs
+        generation = str(time.time_ns())
+        index = get_reputation_index(generation)
+        update_config_setting('ReputationGeneration', generation)
+        log_info(logger, f"[INFO] Reputation index has {len(index)} intervals after coalescing overlapping networks.")
     except requests.exceptions.RequestException as e:
         log_error(logger, f"[ERROR] Failed to download reputation list: {e}")
     except sqlite3.Error as e:
@@ -81,15 +93,105 @@ def import_reputation_list(config_dict):
         log_error(logger, f"[ERROR] Unexpected error: {e}")
 
 
-def load_reputation_data():
+class ReputationIndex:
+    """
+    In-memory lookup for the reputation list.
+
+    Overlapping networks are coalesced into sorted, disjoint intervals held in typed
+    arrays, each keeping the network it came from, so a lookup is one bisect over
+    the start addresses.
+    """
+
+    __slots__ = ('starts', 'ends', 'networks', 'generation')
+
+    def __init__(self, reputation_data, generation=None):
+        """
+        Args:
+            reputation_data: Rows of (network, start_ip, end_ip, netmask)
+            generation: ReputationGeneration value the rows were loaded under
+        """
+        self.starts = array('L')
+        self.ends = array('L')
+        self.networks = []
+        self.generation = generation
+
+        ranges = [entry[:3] for entry in reputation_data or [] if len(entry) >= 4 and entry[1] is not None and entry[2] is not None]
+
+        # Outer networks sort ahead of the networks they contain, which are then dropped
+        ranges.sort(key=lambda r: (r[1], -r[2]))
+        for network, start_ip, end_ip in ranges:
+            if self.ends and start_ip <= self.ends[-1]:
+                if end_ip > self.ends[-1]:
+                    # Only possible for ranges that are not CIDR aligned, extend the previous interval
+                    self.ends[-1] = end_ip
+                continue
+            self.starts.append(start_ip)
+            self.ends.append(end_ip)
+            self.networks.append(network)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def lookup(self, ip_int):
+        """
+        Args:
+            ip_int (int): IPv4 address as an integer
+
+        Returns:
+            str: The listed network containing the address, or None
+        """
+        if not ip_int:
+            return None
+        i = bisect_right(self.starts, ip_int) - 1
+        if i >= 0 and ip_int <= self.ends[i]:
+            return self.networks[i]
+        return None
+
+
+_reputation_index = None
+_reputation_index_lock = threading.Lock()
+
+def get_reputation_index(generation=None):
     """
-    Load reputation list data from the database into memory.
+    Return this process's reputation index, building it on first use and again
+    whenever the reputation list has been re-imported.
+
+    Args:
+        generation: The ReputationGeneration setting when the caller already has it,
+                    otherwise it is read from the configuration table
 
     Returns:
-        list: A list of tuples containing (network, country_name).
+        ReputationIndex: The current index
     """
+    global _reputation_index
     logger = logging.getLogger(__name__)
 
-    geolocation_data = get_all_reputation_records()
+    if generation is None:
+        generation = get_config_setting('ReputationGeneration')
+
+    index = _reputation_index
+    if index is not None and index.generation == generation:
+        return index
+
+    with _reputation_index_lock:
+        index = _reputation_index
+        if index is None or index.generation != generation:
+            start = time.perf_counter()
+            index = ReputationIndex(get_all_reputation_records(), generation)
+            _reputation_index = index
+            log_info(logger, f"[PERFORMANCE] Built reputation index of {len(index)} intervals in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return index
+
+def load_reputation_data(generation=None):
+    """
+    Load the reputation lookup for a detection cycle.
+
+    The table is only read again after the reputation list has been re-imported.
+
+    Args:
+        generation: The ReputationGeneration setting from the cycle's configuration
 
-    return geolocation_data
\ No newline at end of file
+    Returns:
+        ReputationIndex: The current reputation index
+    """
+    return get_reputation_index(generation)
@@ -102,6 +102,9 @@ def create_services_db():
                 log_error(logger, f"[ERROR] Failed to insert final batch of {len(service_records)} records")
         
         log_info(logger, f"[INFO] Successfully loaded {total_count} IANA service entries into the database.")
+
+        # Tell running processes to drop service names cached from the previous import
+        update_config_setting('ServicesGeneration', str(time.time_ns()))
         return True
         
     except requests.RequestException as e:
@@ -18,7 +18,7 @@ from init import *
 def update_tor_nodes(config_dict):
     """
     Download and update Tor node list from dan.me.uk.
-    Deletes all existing entries in the tornodes table before updating.
+    The tornodes table is replaced in one transaction once the download succeeds.
     """
     logger = logging.getLogger(__name__)
     log_info(logger, "[INFO] Starting tor node processing")   
@@ -26,10 +26,6 @@ def update_tor_nodes(config_dict):
     tor_nodes_url = config_dict.get('TorNodesUrl','https://www.dan.me.uk/torlist/?full')
     
     try:
-
-        # Use delete_all_records to clear the tornodes table
-        delete_all_records(CONST_CONSOLIDATED_DB, "tornodes")
-
         log_info(logger,"[INFO] About to request tor node list from dan.me.uk")
         # Download new list with timeout
         response = requests.get(
@@ -44,10 +40,13 @@ def update_tor_nodes(config_dict):
         # Parse IPs (one per line)
         tor_nodes = set(ip.strip() for ip in response.text.split('\n') if ip.strip())
 
-        for ip in tor_nodes:
-            insert_tor_node(ip)
-        
+        if replace_tor_nodes(tor_nodes) is None:
+            return
+
         log_info(logger, f"[INFO] Updated Tor node list with {len(tor_nodes)} nodes")
+
+        # Tell running processes to drop enrichment cached from the previous list
+        update_config_setting('TorGeneration', str(time.time_ns()))
         
     except Exception as e:
         log_error(logger, f"[ERROR] Error updating Tor nodes: {e}")
@@ -4,7 +4,8 @@ from database.configuration import get_config_settings
 import os
 import logging
 from src.locallogging import log_info, log_error, log_warn
-from database.alerts import log_alert_to_db
+import time
+from database.alerts import log_alert_to_db, log_alerts_to_db
 from notifications.telegram import send_telegram_message
 
 def handle_alert(config_dict, detection_key, telegram_message, local_ip, original_flow, alert_category, enrichment_1, enrichment_2, alert_id_hash):
@@ -35,10 +36,8 @@ def handle_alert(config_dict, detection_key, telegram_message, local_ip, origina
                 #insert_or_update = log_alert_to_db(local_ip, original_flow, category, enrichment_1, enrichment_2, alert_id, False)
 #                           def log_alert_to_db(ip_address, flow, category, alert_enrichment_1, alert_enrichment_2, alert_id_hash, realert=False):
  
-        if insert_or_update == "insert":
-            send_telegram_message(telegram_message, original_flow)
-        elif insert_or_update == "update" and detection_level == 3:
-            send_telegram_message(telegram_message, original_flow)
+        if should_notify(detection_level, insert_or_update):
+            send_telegram_message(telegram_message, original_flow, f"{local_ip} - {alert_category}")
 
         return insert_or_update
 
@@ -46,4 +45,84 @@ def handle_alert(config_dict, detection_key, telegram_message, local_ip, origina
         # Only log to database
         return log_alert_to_db(local_ip, original_flow, alert_category, enrichment_1, enrichment_2, alert_id_hash, False)
 
-    return None
\ No newline at end of file
+    return None
+
+
+def should_notify(detection_level, insert_or_update):
+    """
+    Decide whether a logged alert is sent to Telegram.
+
+    Level 2 notifies on the first sighting of an alert id, level 3 on every sighting,
+    and level 1 only logs.
+
+    Args:
+        detection_level (int): The detection's configured alert level.
+        insert_or_update (str): Result of logging the alert, "insert", "update" or "error".
+
+    Returns:
+        bool: True when a Telegram message should be sent.
+    """
+    if detection_level < 2:
+        return False
+    return insert_or_update == "insert" or (insert_or_update == "update" and detection_level == 3)
+
+
+class AlertBuffer:
+    """
+    Collects the alerts raised during a processing cycle and logs them in one transaction.
+
+    Detectors append the same arguments they would pass to handle_alert, minus config_dict.
+    flush() upserts the whole batch through log_alerts_to_db and then queues Telegram messages
+    with the same level 1, 2 and 3 rules as handle_alert, in the order the alerts were raised.
+    """
+
+    def __init__(self, config_dict):
+        self.config_dict = config_dict
+        self.pending = []
+
+    def append(self, intent):
+        """
+        Queue an alert.
+
+        Args:
+            intent (tuple): (detection_key, telegram_message, local_ip, original_flow, alert_category,
+                enrichment_1, enrichment_2, alert_id_hash)
+        """
+        # Detections at level 0 are never logged, so they are dropped here as handle_alert would
+        if self.config_dict.get(intent[0], 0) >= 1:
+            self.pending.append(intent)
+
+    def extend(self, intents):
+        for intent in intents:
+            self.append(intent)
+
+    def __len__(self):
+        return len(self.pending)
+
+    def flush(self):
+        """
+        Log every queued alert in one transaction, then send the resulting notifications.
+
+        Returns:
+            list: "insert", "update" or "error" for each logged alert, in order.
+        """
+        logger = logging.getLogger(__name__)
+        pending, self.pending = self.pending, []
+        if not pending:
+            return []
+
+        started = time.perf_counter()
+        operations = log_alerts_to_db([
+            (local_ip, original_flow, alert_category, enrichment_1, enrichment_2, alert_id_hash)
+            for detection_key, telegram_message, local_ip, original_flow, alert_category, enrichment_1, enrichment_2, alert_id_hash in pending
+        ])
+
+        notified = 0
+        for intent, insert_or_update in zip(pending, operations):
+            detection_key, telegram_message, local_ip, original_flow, alert_category = intent[:5]
+            if should_notify(self.config_dict.get(detection_key, 0), insert_or_update):
+                send_telegram_message(telegram_message, original_flow, f"{local_ip} - {alert_category}")
+                notified += 1
+
+        log_info(logger, f"[PERFORMANCE] Flushed {len(pending)} alerts in {(time.perf_counter() - started) * 1000:.1f} ms, {notified} notifications")
+        return operations
@@ -1,7 +1,14 @@
 import requests
-from src.const import IS_CONTAINER, VERSION, CONST_SITE
+from src.const import (
+    IS_CONTAINER, VERSION, CONST_SITE, CONST_TELEGRAM_QUEUE_SIZE, CONST_TELEGRAM_MESSAGES_PER_MINUTE,
+    CONST_TELEGRAM_BURST, CONST_TELEGRAM_COALESCE_SECONDS, CONST_TELEGRAM_TIMEOUT, CONST_TELEGRAM_MAX_RETRIES,
+    CONST_TELEGRAM_DIGEST_ALERTS, CONST_TELEGRAM_MAX_MESSAGE_LENGTH
+)
 from database.configuration import get_config_settings
 import os
+import queue
+import threading
+import time
 import logging
 from src.locallogging import log_info, log_error, log_warn
 from database.alerts import log_alert_to_db
@@ -9,39 +16,200 @@ from database.alerts import log_alert_to_db
 if (IS_CONTAINER):
     SITE = os.getenv("SITE", CONST_SITE)
 
+# Dispatcher started on first use in each process, see get_telegram_dispatcher
+telegram_dispatcher = None
+telegram_dispatcher_pid = None
+telegram_dispatcher_lock = threading.Lock()
 
 
+class TokenBucket:
+    """Blocking token bucket: take() waits until a token is available."""
 
-def send_telegram_message(message, flow):
+    def __init__(self, rate, capacity):
+        """
+        Args:
+            rate (float): Tokens added per second
+            capacity (int): Most tokens held at once, the allowed burst
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            time.sleep((1 - self.tokens) / self.rate)
+
+
+class TelegramDispatcher:
     """
-    Sends a message to a Telegram group chat.
+    Sends Telegram messages from a background thread.
 
-    Args:
-        message (str): The message to send.
-        flow: The flow data associated with the alert.
+    Callers enqueue and return immediately. The thread collects whatever arrives within
+    CONST_TELEGRAM_COALESCE_SECONDS of the first message, merges messages sharing a group
+    (host and alert category) into one digest, and posts through a reused session under a
+    token bucket sized to Telegram's group chat limit. Failed posts are retried with
+    exponential backoff, honouring retry_after on 429. When the queue is full new messages
+    are dropped and counted.
     """
-    config_dict = get_config_settings()
-    logger = logging.getLogger(__name__)
-    if config_dict['TelegramBotToken'] and config_dict['TelegramChatId'] and config_dict['TelegramEnabled']:
+
+    def __init__(self, queue_size=CONST_TELEGRAM_QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.session = requests.Session()
+        self.bucket = TokenBucket(CONST_TELEGRAM_MESSAGES_PER_MINUTE / 60, CONST_TELEGRAM_BURST)
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self.run, name="telegram-dispatcher", daemon=True)
+        self.thread.start()
+
+    def enqueue(self, message, group):
+        """
+        Queue a message without blocking.
+
+        Args:
+            message (str): The alert text
+            group (str): Messages with the same group are merged into one digest
+
+        Returns:
+            bool: False if the queue was full and the message was dropped
+        """
         try:
-            
+            self.queue.put_nowait((group, message))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            log_warn(logging.getLogger(__name__), f"[WARN] Telegram queue full, dropped message ({self.dropped} dropped so far)")
+            return False
+
+    def run(self):
+        logger = logging.getLogger(__name__)
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + CONST_TELEGRAM_COALESCE_SECONDS
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self.send_batch(batch)
+            except Exception as e:
+                log_error(logger, f"[ERROR] Exception occurred while sending Telegram messages: {e}")
+
+    def send_batch(self, batch):
+        """Merge a batch of (group, message) tuples by group and post one message per group."""
+        config_dict = get_config_settings()
+        if not (config_dict['TelegramBotToken'] and config_dict['TelegramChatId'] and config_dict['TelegramEnabled']):
+            return
+
+        groups = {}
+        for group, message in batch:
+            groups.setdefault(group, []).append(message)
+
+        for group, messages in groups.items():
+            if len(messages) == 1:
+                text = messages[0]
+            else:
+                text = build_digest(group, messages)
             # Create header with warning emoji and site name
             header = f"⚠️ Security Alert - {SITE}\n\n"
-            formatted_message = header + message
+            self.post(config_dict, (header + text)[:CONST_TELEGRAM_MAX_MESSAGE_LENGTH])
 
-            url = f"https://api.telegram.org/bot{config_dict['TelegramBotToken']}/sendMessage"
-            payload = {
-                "chat_id": config_dict['TelegramChatId'],
-                "text": formatted_message,
-                "parse_mode": "HTML"
-            }
-            response = requests.post(url, json=payload)
-            if response.status_code == 200:
-                log_info(logger, f"[INFO] Telegram message sent successfully.")
+    def post(self, config_dict, text):
+        """
+        Post one message, retrying network errors, 429 and 5xx responses with backoff.
+
+        Returns:
+            bool: True if Telegram accepted the message
+        """
+        logger = logging.getLogger(__name__)
+        url = f"https://api.telegram.org/bot{config_dict['TelegramBotToken']}/sendMessage"
+        payload = {
+            "chat_id": config_dict['TelegramChatId'],
+            "text": text,
+            "parse_mode": "HTML"
+        }
+
+        for attempt in range(CONST_TELEGRAM_MAX_RETRIES + 1):
+            self.bucket.take()
+            delay = 2 ** attempt
+            try:
+                response = self.session.post(url, json=payload, timeout=CONST_TELEGRAM_TIMEOUT)
+            except requests.RequestException as e:
+                error = str(e)
             else:
-                log_error(logger, f"[ERROR] Failed to send Telegram message. Status code: {response.status_code}, Response: {response.text}")
-        except Exception as e:
-            log_error(logger, f"[ERROR] Exception occurred while sending Telegram message: {e}")
+                if response.status_code == 200:
+                    self.sent += 1
+                    log_info(logger, f"[INFO] Telegram message sent successfully.")
+                    return True
+                error = f"Status code: {response.status_code}, Response: {response.text}"
+                if response.status_code == 429:
+                    try:
+                        delay = response.json().get("parameters", {}).get("retry_after", delay)
+                    except ValueError:
+                        pass
+                elif response.status_code < 500:
+                    break
+
+            if attempt < CONST_TELEGRAM_MAX_RETRIES:
+                log_warn(logger, f"[WARN] Telegram message failed ({error}), retrying in {delay} seconds")
+                time.sleep(delay)
+
+        self.failed += 1
+        log_error(logger, f"[ERROR] Failed to send Telegram message. {error}")
+        return False
+
+
+def build_digest(group, messages):
+    """
+    Merge several alert messages into one digest.
+
+    Args:
+        group (str): What the messages have in common, used as the title
+        messages (list): Alert texts in arrival order
+
+    Returns:
+        str: The digest text
+    """
+    shown = messages[:CONST_TELEGRAM_DIGEST_ALERTS]
+    digest = f"{len(messages)} alerts for {group}\n\n" + "\n\n".join(shown)
+    if len(messages) > len(shown):
+        digest += f"\n\n... and {len(messages) - len(shown)} more"
+    return digest
+
+
+def get_telegram_dispatcher():
+    """Return this process's Telegram dispatcher, starting it on first use."""
+    global telegram_dispatcher, telegram_dispatcher_pid
+    with telegram_dispatcher_lock:
+        # A forked child does not inherit the parent's dispatcher thread
+        if telegram_dispatcher is None or telegram_dispatcher_pid != os.getpid():
+            telegram_dispatcher = TelegramDispatcher()
+            telegram_dispatcher_pid = os.getpid()
+        return telegram_dispatcher
+
+
+def send_telegram_message(message, flow, group=None):
+    """
+    Queues a message for the Telegram group chat and returns immediately.
+
+    Args:
+        message (str): The message to send.
+        flow: The flow data associated with the alert.
+        group (str): Messages queued close together with the same group are sent as one digest.
+            Defaults to the message itself, so only identical messages are merged.
+    """
+    get_telegram_dispatcher().enqueue(message, group or message)
 
 
 def send_test_telegram_message():
@@ -61,7 +229,7 @@ def send_test_telegram_message():
                 "text": message,
                 "parse_mode": "HTML"
             }
-            response = requests.post(url, json=payload)
+            response = get_telegram_dispatcher().session.post(url, json=payload, timeout=CONST_TELEGRAM_TIMEOUT)
             if response.status_code == 200:
                 log_info(logger, f"[INFO] Test Telegram message sent successfully.")
             else:
@@ -13,7 +13,8 @@ from src.netflow import handle_netflow_v5
 import logging
 from init import *
 from database.core import (
-    create_table
+    create_table,
+    add_column_if_missing
 )
 
 if (IS_CONTAINER):
@@ -56,6 +57,8 @@ if __name__ == "__main__":
     create_table(CONST_CONSOLIDATED_DB, CONST_CREATE_ALERTS_SQL, "alerts")
     create_table(CONST_CONSOLIDATED_DB, CONST_CREATE_ALLFLOWS_SQL, "allflows")
     create_table(CONST_CONSOLIDATED_DB, CONST_CREATE_NEWFLOWS_SQL, "newflows")
+    add_column_if_missing(CONST_CONSOLIDATED_DB, "allflows", "tag_bits", "INTEGER DEFAULT 0")
+    add_column_if_missing(CONST_CONSOLIDATED_DB, "newflows", "tag_bits", "INTEGER DEFAULT 0")
     delete_all_records(CONST_CONSOLIDATED_DB,"newflows")
     create_table(CONST_CONSOLIDATED_DB, CONST_CREATE_LOCALHOSTS_SQL, "localhosts")
     create_table(CONST_CONSOLIDATED_DB, CONST_CREATE_GEOLOCATION_SQL, "geolocation")
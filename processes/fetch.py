@@ -19,7 +19,8 @@ from integrations.reputation import import_reputation_list
 from integrations.piholedns import get_pihole_ftl_logs
 from integrations.services import create_services_db
 from integrations.ipasn import create_asn_database
-from src.const import CONST_REINITIALIZE_DB, CONST_CONSOLIDATED_DB, IS_CONTAINER
+from integrations.ipintel import compile_ip_intel_file
+from src.const import CONST_REINITIALIZE_DB, CONST_CONSOLIDATED_DB, IS_CONTAINER, CONST_IP_INTEL_GENERATION_KEYS
 from init import *
 
 if (IS_CONTAINER):
@@ -87,6 +88,14 @@ def main():
         except Exception as e:
             log_error(logger, f"[ERROR] Error during data fetch: {e}")
 
+        try:
+            log_info(logger, "[INFO] Compiling IP intelligence file...")
+            generation = ",".join(str(get_config_setting(key)) for key in CONST_IP_INTEL_GENERATION_KEYS)
+            compile_ip_intel_file(generation)
+            log_info(logger, "[INFO] IP intelligence file finished.")
+        except Exception as e:
+            log_error(logger, f"[ERROR] Error compiling IP intelligence file: {e}")
+
         try: 
             if config_dict.get('StorePiHoleDnsQueryHistory', 0) > 0:
                 log_info(logger, "[INFO] Fetching pihole dns query history...")
@@ -14,8 +14,8 @@ import logging
 from init import *
 app = Bottle()
 from integrations.dns import dns_lookup
-# Import geolocation function
-from integrations.geolocation import lookup_ip_country
+# Import enrichment function
+from integrations.enrichment import get_ip_enrichment
 
 
 def setup_agent_routes(app):
@@ -64,7 +64,7 @@ def setup_agent_routes(app):
                 log_info(logger, "[INFO] DNS lookup skipped - no DNS servers configured or discovery disabled")
 
             # Perform geolocation lookup
-            geo_result = lookup_ip_country(ip_address)
+            geo_result = get_ip_enrichment(ip_address)["country"]
             if geo_result:
                 result["country"] = geo_result
             else:
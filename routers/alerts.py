@@ -427,6 +427,8 @@ def setup_alerts_routes(app):
             from database.core import delete_all_records            
             # Delete all alerts
             count = delete_all_records(CONST_CONSOLIDATED_DB, "alerts")
+            # Make in-memory alert id sets reload, rowids of deleted alerts are reused
+            update_config_setting('AlertsGeneration', str(time.time_ns()))
             
             response.content_type = 'application/json'
 
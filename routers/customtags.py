@@ -12,6 +12,7 @@ if str(src_dir) not in sys.path:
 from bottle import Bottle, request, response, hook, route
 import logging
 from init import *
+from src.tags import validate_tag_rule
 app = Bottle()
 
 
@@ -32,10 +33,10 @@ def setup_customtags_routes(app):
         Expected JSON body:
         {
             "tag_id": "string",  # Optional - will be auto-generated if not provided
-            "src_ip": "string",   # Source IP pattern (e.g. "192.168.1.*")
-            "dst_ip": "string",   # Destination IP pattern
-            "dst_port": "string", # Destination port pattern (e.g. "80" or "*")
-            "protocol": "string", # Protocol pattern (e.g. "tcp" or "*")
+            "src_ip": "string",   # Source IP, CIDR prefix or "*" (e.g. "192.168.1.0/24")
+            "dst_ip": "string",   # Destination IP, CIDR prefix or "*"
+            "dst_port": "string", # Port, port range or "*" (e.g. "80", "8000-8100")
+            "protocol": "string", # Protocol number or "*" (e.g. "6")
             "tag_name": "string", # Optional - human-readable name
             "enabled": 1          # Optional - defaults to 1 (enabled)
         }
@@ -61,6 +62,12 @@ def setup_customtags_routes(app):
                 if field not in data:
                     response.status = 400
                     return {"success": False, "error": f"Missing required field: {field}"}
+
+            # Validate ip prefixes, port ranges and protocol
+            rule_error = validate_tag_rule(data["src_ip"], data["dst_ip"], data["dst_port"], data["protocol"])
+            if rule_error:
+                response.status = 400
+                return {"success": False, "error": rule_error}
             
             # Generate a tag_id if not provided
             if "tag_id" not in data or not data["tag_id"]:
@@ -12,6 +12,7 @@ if str(src_dir) not in sys.path:
 from bottle import Bottle, request, response, hook, route
 import logging
 from init import *
+from src.tags import validate_tag_rule
 app = Bottle()
 
 def setup_ignorelist_routes(app):
@@ -73,6 +74,11 @@ def setup_ignorelist_routes(app):
             if not ignorelist_id or not src_ip or not dst_ip or not dst_port or not protocol:
                 response.status = 400
                 return {"error": "Required fields missing (ignorelist_id, src_ip, dst_ip, dst_port, dst_protocol)"}
+
+            rule_error = validate_tag_rule(src_ip, dst_ip, dst_port, protocol)
+            if rule_error:
+                response.status = 400
+                return {"error": rule_error}
             
             try:
 
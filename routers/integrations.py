@@ -13,6 +13,7 @@ if str(src_dir) not in sys.path:
 from bottle import Bottle, request, response, hook, route
 import logging
 from init import *
+from integrations.enrichment import get_ip_enrichment, get_port_services, get_enrichment_stats
 app = Bottle()
 
 def setup_integrations_routes(app):
@@ -33,6 +34,14 @@ def setup_integrations_routes(app):
             client_data = export_client_definition(ip_address)
             
             if client_data:
+                # Destinations and ports repeat across flows, so each is looked up once through the enrichment caches
+                for flow in client_data["flows"]:
+                    enrichment = get_ip_enrichment(flow["destination"])
+                    flow["country"] = enrichment["country"]
+                    flow["asn"] = enrichment["asn"]
+                    flow["isp_name"] = enrichment["isp_name"]
+                    flow["services"] = get_port_services(flow["port"]) if flow["port"] is not None else {}
+
                 response.content_type = 'application/json'
                 log_info(logger, f"[INFO] Successfully retrieved client info for {ip_address}")
                 return json.dumps(client_data, indent=2)
@@ -96,4 +105,24 @@ def setup_integrations_routes(app):
         except Exception as e:
             log_error(logger, f"[ERROR] Failed to fetch database counts: {e}")
             response.status = 500
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
+
+    @app.route('/api/enrichmentcache', method=['GET'])
+    def get_enrichment_cache_stats():
+        """
+        API endpoint to get the enrichment cache counters of the API and of the processor's last cycle.
+        """
+        logger = logging.getLogger(__name__)
+        try:
+            processor_stats = get_config_setting('EnrichmentCacheStats')
+            stats = {
+                "api": get_enrichment_stats(),
+                "processor": json.loads(processor_stats) if processor_stats else None
+            }
+            response.content_type = 'application/json'
+            log_info(logger, "[INFO] Fetched enrichment cache stats successfully.")
+            return json.dumps(stats)
+        except Exception as e:
+            log_error(logger, f"[ERROR] Failed to fetch enrichment cache stats: {e}")
+            response.status = 500
+            return {"error": str(e)}
@@ -2,15 +2,48 @@ VERSION="v0.3.260"
 # v3 is after consolidating database, v4 is moving to ORM, v5 is moving to constructor, v6 is integrating agent
 CONST_COLLECTOR_LISTEN_PORT=2055
 CONST_COLLECTOR_LISTEN_ADDRESS="0.0.0.0"
+CONST_COLLECTOR_RECEIVE_BUFFER=8388608
+CONST_COLLECTOR_DRAIN_BATCH=512
+CONST_COLLECTOR_QUEUE_BYTES=16777216
+CONST_COLLECTOR_DATAGRAM_SIZE=8192
+CONST_COLLECTOR_FLUSH_TICK=1
 CONST_API_LISTEN_PORT=8044
 CONST_API_LISTEN_ADDRESS="0.0.0.0"
 IS_CONTAINER=1
 CONST_CONSOLIDATED_DB = "/database/consolidated.db"
+CONST_SQLITE_MMAP_SIZE = 134217728
+CONST_SQLITE_CACHE_SIZE = -16384
 #CONST_TEST_SOURCE_DB = ['/database/test_source_1.db','/database/test_source_2.db']
 CONST_TEST_SOURCE_DB = ['/database/test_source_1.db']
 CONST_SITE= 'TESTPPE'
 CONST_LINK_LOCAL_RANGE = ["169.254.0.0/16"]
+# Bits of the tag_bits column mirroring the built-in entries of the tags string
+CONST_TAG_IGNORELIST = 1
+CONST_TAG_BROADCAST = 2
+CONST_TAG_MULTICAST = 4
+CONST_TAG_LINKLOCAL = 8
 CONST_REINITIALIZE_DB = 0
+# Telegram dispatcher: bounded queue, group chat limit of 20 messages a minute, per-request timeout in seconds
+CONST_TELEGRAM_QUEUE_SIZE = 1000
+CONST_TELEGRAM_MESSAGES_PER_MINUTE = 20
+CONST_TELEGRAM_BURST = 3
+CONST_TELEGRAM_COALESCE_SECONDS = 2
+CONST_TELEGRAM_TIMEOUT = 10
+CONST_TELEGRAM_MAX_RETRIES = 4
+CONST_TELEGRAM_DIGEST_ALERTS = 5
+CONST_TELEGRAM_MAX_MESSAGE_LENGTH = 4000
+# IP intelligence file compiled by the fetch process, how often readers check it for a new copy in seconds
+# and the import generations that trigger a recompile
+CONST_IP_INTEL_FILE = "/database/ipintel.bin"
+CONST_IP_INTEL_CHECK_SECONDS = 10
+CONST_IP_INTEL_GENERATION_KEYS = ('GeolocationGeneration', 'ReputationGeneration', 'AsnGeneration', 'TorGeneration')
+# Per-IP and per-port enrichment cache: entry cap, entry lifetime and how often dataset generations are checked, in seconds
+CONST_ENRICHMENT_CACHE_SIZE = 65536
+CONST_ENRICHMENT_TTL_SECONDS = 3600
+CONST_ENRICHMENT_CHECK_SECONDS = 10
+CONST_ENRICHMENT_GENERATION_KEYS = ('GeolocationGeneration', 'ReputationGeneration', 'AsnGeneration', 'TorGeneration', 'ServicesGeneration')
+# Bytes per chunk when downloading the ASN file and characters per chunk when parsing its JSON
+CONST_ASN_CHUNK_SIZE = 1048576
 CONST_CREATE_NEWFLOWS_SQL='''
     CREATE TABLE IF NOT EXISTS newflows (
         src_ip TEXT,
@@ -25,6 +58,7 @@ CONST_CREATE_NEWFLOWS_SQL='''
         last_seen TEXT,
         times_seen INTEGER,
         tags TEXT,
+        tag_bits INTEGER DEFAULT 0,
         PRIMARY KEY (src_ip, dst_ip, src_port, dst_port, protocol)
     )'''
 
@@ -51,6 +85,7 @@ CONST_CREATE_ALLFLOWS_SQL='''
         times_seen INTEGER DEFAULT 1,
         last_seen TEXT,
         tags TEXT,
+        tag_bits INTEGER DEFAULT 0,
         PRIMARY KEY (src_ip, dst_ip, src_port, dst_port, protocol)
     )'''
 
@@ -265,4 +300,13 @@ CONST_INSTALL_CONFIGS = [
     ('ImportServicesList','1'),
     ('TelegramEnabled', '0'),
     ('ImportAsnDatabase', '1'),
+    ('CollectorMaxFlowEntries', '50000'),
+    ('NetflowTemplateTimeout', '1800'),
+    ('CollectorWorkers', '0'),
+    ('CollectorReceiveBuffer', '8388608'),
+    ('CollectorQueueBytes', '16777216'),
+    ('CollectorQueueDropPolicy', 'newest'),
+    ('CollectorFlushBytes', '4194304'),
+    ('CollectorFlushFlows', '20000'),
+    ('DetectionWorkers', '0'),
 ]
\ No newline at end of file
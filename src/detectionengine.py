@@ -0,0 +1,354 @@
+import os
+import pickle
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from multiprocessing import shared_memory
+from pathlib import Path
+# Set up path for imports
+current_dir = Path(__file__).resolve().parent
+parent_dir = str(current_dir.parent)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+sys.path.insert(0, "/database")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import logging
+from locallogging import log_info, log_error, log_warn
+from notifications.core import handle_alert
+from init import *
+
+class FlowView:
+    """
+    Column view of one cycle's flows, built once and shared by every detector.
+
+    Each field is a parallel list or array indexed by flow position, so detectors read
+    precomputed values instead of unpacking rows and repeating the same address checks.
+    Address facts (integer form, local network and router membership) are derived once
+    per distinct address. rows keeps the original records for alerts.
+    """
+
+    __slots__ = (
+        'rows', 'src_ip', 'dst_ip', 'src_port', 'dst_port', 'protocol', 'packets', 'bytes',
+        'tags', 'tag_bits', 'src_int', 'dst_int', 'src_local', 'dst_local', 'src_router',
+        'dst_router', 'to_server'
+    )
+
+    def __init__(self, rows, config_dict):
+        """
+        Args:
+            rows: List of flow records (src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes, ...)
+            config_dict: Dictionary containing configuration settings
+        """
+        local_networks = get_network_set(config_dict['LocalNetworks'])
+        router_ips = set(config_dict.get('RouterIpAddresses', '').split(','))
+
+        self.rows = rows
+        self.src_ip = [row[0] for row in rows]
+        self.dst_ip = [row[1] for row in rows]
+        self.src_port = array('l', [row[2] for row in rows])
+        self.dst_port = array('l', [row[3] for row in rows])
+        self.protocol = array('l', [row[4] for row in rows])
+        self.packets = array('q', [row[5] for row in rows])
+        self.bytes = array('q', [row[6] for row in rows])
+        self.tags = [row[11] if len(row) > 11 else None for row in rows]
+        self.tag_bits = array('l', [(row[12] or 0) if len(row) > 12 else 0 for row in rows])
+
+        ip_ints = {}
+        local_ips = set()
+        for ip in chain(self.src_ip, self.dst_ip):
+            if ip not in ip_ints:
+                ip_ints[ip] = ip_to_int(ip) or 0
+                if ip in local_networks:
+                    local_ips.add(ip)
+
+        self.src_int = array('L', [ip_ints[ip] for ip in self.src_ip])
+        self.dst_int = array('L', [ip_ints[ip] for ip in self.dst_ip])
+        self.src_local = bytearray(ip in local_ips for ip in self.src_ip)
+        self.dst_local = bytearray(ip in local_ips for ip in self.dst_ip)
+        self.src_router = bytearray(ip in router_ips for ip in self.src_ip)
+        self.dst_router = bytearray(ip in router_ips for ip in self.dst_ip)
+
+        # Set when the destination port is the lower, server side port of the flow
+        self.to_server = bytearray(dst_port < src_port for src_port, dst_port in zip(self.src_port, self.dst_port))
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class FlowDetector:
+    """
+    Base class for detectors run by the detection engine.
+
+    A detector prepares its configuration in start(), sees every flow once through
+    process_row() and raises aggregate alerts in finish(). Alerts go through
+    alert() so the engine can count them per detector.
+    """
+
+    # Name used in the engine's per-detector stats
+    name = None
+
+    # Set to False for detectors that only work in finish(), e.g. from the database
+    uses_rows = True
+
+    # Set to False for detectors that write to the database, which must stay in the parent process
+    parallel = True
+
+    def __init__(self, config_dict):
+        self.config_dict = config_dict
+        self.logger = logging.getLogger(self.__class__.__module__)
+        self.alerts = 0
+        # When a list, alerts are recorded here for the parent to apply instead of being raised
+        self.intents = None
+
+    def start(self):
+        """
+        Prepare per-cycle state before the first row.
+
+        Returns:
+            bool: False to skip this detector for the cycle
+        """
+        return True
+
+    def process_row(self, flows, i):
+        """
+        Inspect one flow.
+
+        Args:
+            flows (FlowView): The cycle's flows
+            i (int): Position of the flow in flows
+        """
+
+    def finish(self):
+        """Raise alerts that need the whole batch and log the detector summary."""
+
+    def alert(self, detection_key, message, local_ip, row, alert_category, enrichment_1, enrichment_2, alert_id):
+        """Raise an alert through handle_alert, or record it as an intent, and count it for this detector."""
+        self.alerts += 1
+        if self.intents is not None:
+            self.intents.append((detection_key, message, local_ip, row, alert_category, enrichment_1, enrichment_2, alert_id))
+            return None
+        return handle_alert(self.config_dict, detection_key, message, local_ip, row, alert_category, enrichment_1, enrichment_2, alert_id)
+
+
+def run_detectors(flows, config_dict, detectors, indexes=None, intents=None):
+    """
+    Run detectors over a batch of flows in a single pass.
+
+    Every detector reads the same FlowView, so per-flow values are computed once for
+    the whole cycle. A detector that raises is logged and dropped for the rest of the
+    cycle, leaving the others running.
+
+    Args:
+        flows: FlowView, or a list of flow records to build one from
+        config_dict: Dictionary containing configuration settings
+        detectors (list): FlowDetector instances, in the order they should see each flow
+        indexes (list): Positions in flows to run over, defaults to every flow
+        intents: AlertBuffer or list that collects the detectors' alerts instead of raising them
+
+    Returns:
+        dict: Detector name -> {"seconds": float, "alerts": int, "error": str or None}
+    """
+    logger = logging.getLogger(__name__)
+    stats = {}
+    active = []
+
+    for detector in detectors:
+        if intents is not None:
+            detector.intents = intents
+        stats[detector.name] = {"seconds": 0.0, "alerts": 0, "error": None}
+        started = time.perf_counter()
+        try:
+            if detector.start() is not False:
+                active.append(detector)
+        except Exception as e:
+            log_error(logger, f"[ERROR] Detector {detector.name} failed to start: {e}")
+            stats[detector.name]["error"] = str(e)
+        stats[detector.name]["seconds"] += time.perf_counter() - started
+
+    row_detectors = [(detector, stats[detector.name]) for detector in active if detector.uses_rows]
+    if flows and row_detectors:
+        if not isinstance(flows, FlowView):
+            flows = FlowView(flows, config_dict)
+        if indexes is None:
+            indexes = range(len(flows))
+        perf_counter = time.perf_counter
+
+        for i in indexes:
+            failed = None
+            for entry in row_detectors:
+                detector, detector_stats = entry
+                started = perf_counter()
+                try:
+                    detector.process_row(flows, i)
+                except Exception as e:
+                    log_error(logger, f"[ERROR] Error in {detector.name}: {e}")
+                    detector_stats["error"] = str(e)
+                    failed = (failed or []) + [entry]
+                detector_stats["seconds"] += perf_counter() - started
+            if failed:
+                row_detectors = [entry for entry in row_detectors if entry not in failed]
+
+    for detector in active:
+        if stats[detector.name]["error"]:
+            continue
+        started = time.perf_counter()
+        try:
+            detector.finish()
+        except Exception as e:
+            log_error(logger, f"[ERROR] Error in {detector.name}: {e}")
+            stats[detector.name]["error"] = str(e)
+        stats[detector.name]["seconds"] += time.perf_counter() - started
+
+    for detector in detectors:
+        stats[detector.name]["alerts"] = detector.alerts
+        stats[detector.name]["seconds"] = round(stats[detector.name]["seconds"], 4)
+
+    return stats
+
+
+# Worker pool reused across processing cycles, see get_detection_pool
+detection_pool = None
+detection_pool_workers = 0
+
+
+def get_detection_pool(worker_count):
+    """
+    Return the detector worker pool, starting it on first use or when the worker count changes.
+
+    Args:
+        worker_count (int): Number of worker processes
+
+    Returns:
+        ProcessPoolExecutor: The shared pool
+    """
+    global detection_pool, detection_pool_workers
+    if detection_pool is None or detection_pool_workers != worker_count:
+        if detection_pool is not None:
+            detection_pool.shutdown(wait=True)
+        detection_pool = ProcessPoolExecutor(max_workers=worker_count)
+        detection_pool_workers = worker_count
+    return detection_pool
+
+
+def shutdown_detection_pool():
+    """Stop the detector worker pool if it is running."""
+    global detection_pool, detection_pool_workers
+    if detection_pool is not None:
+        detection_pool.shutdown(wait=True)
+        detection_pool = None
+        detection_pool_workers = 0
+
+
+def run_detector_group(shm_name, size, config_dict, detectors):
+    """
+    Worker side of run_detectors_parallel: read the batch from shared memory and run a group of detectors on it.
+
+    Args:
+        shm_name (str): Name of the shared memory block holding the pickled flows
+        size (int): Length of the pickled flows in the block
+        config_dict: Dictionary containing configuration settings
+        detectors (list): FlowDetector instances to run
+
+    Returns:
+        tuple: (stats, intents) where intents maps detector name to its alert intents
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        rows = pickle.loads(shm.buf[:size])
+    finally:
+        shm.close()
+
+    for detector in detectors:
+        detector.intents = []
+    stats = run_detectors(rows, config_dict, detectors)
+    return stats, {detector.name: detector.intents for detector in detectors}
+
+
+def run_detectors_parallel(flows, config_dict, detectors, indexes=None, worker_count=2, intents=None):
+    """
+    Run detectors concurrently in a process pool, applying their alerts serially in this process.
+
+    The flows are pickled once into a shared memory block that every worker reads, instead of
+    being sent to each worker separately. Each worker runs a group of detectors and returns
+    their alerts as intents, which are then passed to handle_alert here or added to intents in
+    detector order, so the alerts table and Telegram only ever see one writer. Detectors that write to the
+    database themselves run here alongside the workers.
+
+    Args:
+        flows (FlowView): The cycle's flows
+        config_dict: Dictionary containing configuration settings
+        detectors (list): FlowDetector instances
+        indexes (list): Positions in flows to run over, defaults to every flow
+        worker_count (int): Number of worker processes
+        intents: AlertBuffer or list that collects the alerts instead of raising them here
+
+    Returns:
+        dict: Detector name -> {"seconds": float, "alerts": int, "error": str or None}
+    """
+    logger = logging.getLogger(__name__)
+    pooled = [detector for detector in detectors if detector.parallel and detector.uses_rows]
+    local = [detector for detector in detectors if detector not in pooled]
+    groups = [group for group in (pooled[k::worker_count] for k in range(worker_count)) if group]
+
+    rows = flows.rows if indexes is None else [flows.rows[i] for i in indexes]
+    payload = pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(payload)))
+    stats = {}
+    try:
+        shm.buf[:len(payload)] = payload
+        pool = get_detection_pool(worker_count)
+        futures = [(group, pool.submit(run_detector_group, shm.name, len(payload), config_dict, group)) for group in groups]
+
+        # Detectors that write to the database run here while the workers are busy
+        stats.update(run_detectors(flows, config_dict, local, indexes, intents))
+
+        for group, future in futures:
+            try:
+                group_stats, group_intents = future.result()
+            except Exception as e:
+                log_error(logger, f"[ERROR] Detector worker failed: {e}")
+                for detector in group:
+                    stats[detector.name] = {"seconds": 0.0, "alerts": 0, "error": str(e)}
+                continue
+
+            for detector in group:
+                detector_stats = group_stats[detector.name]
+                if intents is not None:
+                    intents.extend(group_intents[detector.name])
+                    stats[detector.name] = detector_stats
+                    continue
+
+                started = time.perf_counter()
+                for intent in group_intents[detector.name]:
+                    try:
+                        handle_alert(config_dict, *intent)
+                    except Exception as e:
+                        log_error(logger, f"[ERROR] Failed to apply {detector.name} alert {intent[7]}: {e}")
+                        detector_stats["error"] = str(e)
+                detector_stats["seconds"] = round(detector_stats["seconds"] + time.perf_counter() - started, 4)
+                stats[detector.name] = detector_stats
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return {detector.name: stats[detector.name] for detector in detectors}
+
+
+def log_detector_stats(stats, flow_count):
+    """
+    Log and store the per-detector timings and alert counts of one processing cycle.
+
+    Args:
+        stats (dict): Result of run_detectors
+        flow_count (int): Number of flows the detectors saw
+    """
+    logger = logging.getLogger(__name__)
+    for name, detector_stats in stats.items():
+        log_info(logger, f"[PERFORMANCE] Detector {name} took {detector_stats['seconds'] * 1000:.1f} ms and raised {detector_stats['alerts']} alerts over {flow_count} flows")
+    update_config_setting('DetectionEngineStats', json.dumps({
+        "timestamp": datetime.now().isoformat(),
+        "flows": flow_count,
+        "detectors": stats
+    }))
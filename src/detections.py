@@ -14,31 +14,32 @@ sys.path.insert(0, "/database")
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from locallogging import log_info, log_error, log_warn
 from init import * 
-from database.newflows import get_new_flows
-
-
-from integrations.geolocation import load_geolocation_data
-from integrations.reputation import load_reputation_data
-
-from detect.detect_custom_tag import detect_custom_tag
-from detect.detect_dead_connections import detect_dead_connections
-from detect.detect_new_outbound_connections import detect_new_outbound_connections
-from detect.detect_geolocation_flows import detect_geolocation_flows
-from detect.detect_unauthorized_dns import detect_unauthorized_dns
-from detect.detect_unauthorized_ntp import detect_unauthorized_ntp
-from detect.detect_incorrect_authoritative_dns import detect_incorrect_authoritative_dns
-from detect.detect_port_scanning import detect_port_scanning
-from detect.detect_tor_traffic import detect_tor_traffic
-from detect.detect_vpn_traffic import detect_vpn_traffic
-from detect.detect_high_bandwidth_flows import detect_high_bandwidth_flows
-from detect.detect_many_destinations import detect_many_destinations
-from detect.detect_reputation_flows import detect_reputation_flows
-from detect.local_flows_detection import local_flows_detection
-from detect.foreign_flows_detection import foreign_flows_detection
-from detect.router_flow_detections import router_flows_detection
-from detect.update_localhosts import update_local_hosts
-from detect.detect_high_risk_ports import detect_high_risk_ports
-from detect.detect_incorrect_ntp_stratum import detect_incorrect_ntp_stratum
+from database.newflows import get_new_flows, claim_new_flows
+
+
+
+from notifications.core import AlertBuffer
+from integrations.enrichment import log_enrichment_stats
+from src.detectionengine import FlowView, run_detectors, run_detectors_parallel, log_detector_stats
+from detect.detect_custom_tag import detect_custom_tag, CustomTagDetector
+from detect.detect_dead_connections import detect_dead_connections, DeadConnectionDetector
+from detect.detect_new_outbound_connections import detect_new_outbound_connections, NewOutboundDetector
+from detect.detect_geolocation_flows import detect_geolocation_flows, GeolocationFlowsDetector
+from detect.detect_unauthorized_dns import detect_unauthorized_dns, UnauthorizedDnsDetector
+from detect.detect_unauthorized_ntp import detect_unauthorized_ntp, UnauthorizedNtpDetector
+from detect.detect_incorrect_authoritative_dns import detect_incorrect_authoritative_dns, IncorrectAuthoritativeDnsDetector
+from detect.detect_port_scanning import detect_port_scanning, PortScanDetector
+from detect.detect_tor_traffic import detect_tor_traffic, TorTrafficDetector
+from detect.detect_vpn_traffic import detect_vpn_traffic, VpnTrafficDetector
+from detect.detect_high_bandwidth_flows import detect_high_bandwidth_flows, HighBandwidthFlowDetector
+from detect.detect_many_destinations import detect_many_destinations, ManyDestinationsDetector
+from detect.detect_reputation_flows import detect_reputation_flows, ReputationFlowsDetector
+from detect.local_flows_detection import local_flows_detection, LocalFlowsDetector
+from detect.foreign_flows_detection import foreign_flows_detection, ForeignFlowsDetector
+from detect.router_flow_detections import router_flows_detection, RouterFlowsDetector
+from detect.update_localhosts import update_local_hosts, LocalHostsDetector
+from detect.detect_high_risk_ports import detect_high_risk_ports, HighRiskPortDetector
+from detect.detect_incorrect_ntp_stratum import detect_incorrect_ntp_stratum, IncorrectNtpStratumDetector
 
 
 # Function to process data
@@ -52,17 +53,18 @@ def process_data():
         log_error(logger, "[ERROR] Failed to load configuration settings")
         return
 
-    newflows = get_new_flows()
     """Read data from the database and process it."""
 
     if config_dict['ScheduleProcessor'] == 1:
         try:
+            # Claim and remove only the rows read, so flows the collector writes meanwhile are kept for the next cycle
+            if (config_dict['CleanNewFlows'] == 1):
+                newflows = claim_new_flows()
+            else:
+                newflows = get_new_flows()
 
             if len(newflows) > 0:
-                # delete newflows so collector can write clean to it again as quickly as possible
                 log_info(logger, f"[INFO] Fetched {len(newflows)} rows from the database.")
-                if (config_dict['CleanNewFlows'] == 1):
-                    delete_all_records(CONST_CONSOLIDATED_DB, "newflows")
 
                 log_info(logger,f"[INFO] Processing {len(newflows)} rows.")
 
@@ -70,87 +72,84 @@ def process_data():
                 update_all_flows(newflows, config_dict)
                 update_traffic_stats(newflows, config_dict)
 
-                if config_dict.get('GeolocationFlowsDetection',0) > 0:
-                    geolocation_data = load_geolocation_data()
+                # Per-flow values shared by every detector are computed once for the cycle
+                flows = FlowView(newflows, config_dict)
 
-                if config_dict.get('ReputationListDetection', 0) > 0:
-                    reputation_data = load_reputation_data()
+                # Alerts raised during the cycle are logged together in one transaction at the end
+                alert_buffer = AlertBuffer(config_dict)
 
-                # Proper way to check config values with default of 0
+                # New hosts are tracked over every flow, before any tags are removed
+                detector_stats = {}
                 if config_dict.get("NewHostsDetection", 0) > 0:
-                    update_local_hosts(newflows, config_dict)
-                
-                log_info(logger,f"[INFO] Started removing IgnoreList flows")
-                # process ignorelisted entries and remove from detection rows
-                filtered_rows = [row for row in newflows if 'IgnoreList' not in str(row[11])]
-                log_info(logger,f"[INFO] Finished removing IgnoreList flows - processing flow count is {len(filtered_rows)}")
+                    detector_stats.update(run_detectors(flows, config_dict, [LocalHostsDetector(config_dict)], None, alert_buffer))
 
+                # IgnoreList flows are always removed from detection rows, the other built-in tags by config
+                removed_tags = ["IgnoreList"]
+                removed_bits = CONST_TAG_IGNORELIST
                 if config_dict.get('RemoveBroadcastFlows', 0) >0:
-                    filtered_rows = [row for row in filtered_rows if 'Broadcast' not in str(row[11])]
-                    log_info(logger,f"[INFO] Finished removing Broadcast flows - processing flow count is {len(filtered_rows)}")
-
+                    removed_tags.append("Broadcast")
+                    removed_bits |= CONST_TAG_BROADCAST
                 if config_dict.get('RemoveMulticastFlows', 0) >0:
-                    filtered_rows = [row for row in filtered_rows if 'Multicast' not in str(row[11])]
-                    log_info(logger,f"[INFO] Finished removing Multicast flows - processing flow count is {len(filtered_rows)}")
-
+                    removed_tags.append("Multicast")
+                    removed_bits |= CONST_TAG_MULTICAST
                 if config_dict.get('RemoveLinkLocalFlows', 0) >0:
-                    filtered_rows = [row for row in filtered_rows if 'LinkLocal' not in str(row[11])]
-                    log_info(logger,f"[INFO] Finished removing LinkLocal flows - processing flow count is {len(filtered_rows)}")
+                    removed_tags.append("LinkLocal")
+                    removed_bits |= CONST_TAG_LINKLOCAL
 
-                if config_dict.get("NewOutboundDetection", 0) > 0:
-                    detect_new_outbound_connections(filtered_rows, config_dict)
+                # One pass over the tag_bits column instead of a substring scan per tag
+                filtered_indexes = [i for i, bits in enumerate(flows.tag_bits) if not bits & removed_bits]
+                log_info(logger,f"[INFO] Finished removing {', '.join(removed_tags)} flows - processing flow count is {len(filtered_indexes)}")
 
+                # Every enabled detector sees each flow in one shared pass
+                detectors = []
+                if config_dict.get("NewOutboundDetection", 0) > 0:
+                    detectors.append(NewOutboundDetector(config_dict))
                 if config_dict.get("RouterFlowsDetection", 0) > 0:
-                    router_flows_detection(filtered_rows, config_dict)
-
+                    detectors.append(RouterFlowsDetector(config_dict))
                 if config_dict.get("ForeignFlowsDetection", 0) > 0:
-                    foreign_flows_detection(filtered_rows, config_dict)
-
+                    detectors.append(ForeignFlowsDetector(config_dict))
                 if config_dict.get("LocalFlowsDetection", 0) > 0:
-                    local_flows_detection(filtered_rows, config_dict)
-
+                    detectors.append(LocalFlowsDetector(config_dict))
                 if config_dict.get("UnauthorizedDNSDetection", 0) > 0:
-                    detect_unauthorized_dns(filtered_rows, config_dict)
-                
+                    detectors.append(UnauthorizedDnsDetector(config_dict))
                 if config_dict.get("UnauthorizedNTPDetection", 0) > 0:
-                    detect_unauthorized_ntp(filtered_rows, config_dict)
-
+                    detectors.append(UnauthorizedNtpDetector(config_dict))
                 if config_dict.get("IncorrectAuthoritativeDnsDetection", 0) > 0:
-                    detect_incorrect_authoritative_dns(filtered_rows, config_dict) 
-
+                    detectors.append(IncorrectAuthoritativeDnsDetector(config_dict))
                 if config_dict.get("IncorrectNtpStratumDetection", 0) > 0:
-                    detect_incorrect_ntp_stratum(filtered_rows, config_dict)
-
+                    detectors.append(IncorrectNtpStratumDetector(config_dict))
                 if config_dict.get("GeolocationFlowsDetection", 0) > 0:
-                    detect_geolocation_flows(filtered_rows, config_dict, geolocation_data)
-                
+                    # The detector uses its process's geolocation index, rebuilt only after a re-import
+                    detectors.append(GeolocationFlowsDetector(config_dict))
                 if config_dict.get("DeadConnectionDetection", 0) > 0:
-                    detect_dead_connections(config_dict)
-
+                    detectors.append(DeadConnectionDetector(config_dict))
                 if config_dict.get("ReputationListDetection", 0) > 0:
-                    detect_reputation_flows(filtered_rows, config_dict, reputation_data)
-
+                    # Like geolocation, the reputation index is reloaded only after a re-import
+                    detectors.append(ReputationFlowsDetector(config_dict))
                 if config_dict.get("VpnTrafficDetection", 0) > 0:
-                    detect_vpn_traffic(filtered_rows, config_dict)
-                
+                    detectors.append(VpnTrafficDetector(config_dict))
                 if config_dict.get("HighRiskPortDetection", 0) > 0:
-                    detect_high_risk_ports(filtered_rows, config_dict)      
-
+                    detectors.append(HighRiskPortDetector(config_dict))
                 if config_dict.get("ManyDestinationsDetection", 0) > 0:
-                    detect_many_destinations(filtered_rows, config_dict)  
-
+                    detectors.append(ManyDestinationsDetector(config_dict))
                 if config_dict.get("PortScanDetection", 0) > 0:
-                    detect_port_scanning(filtered_rows, config_dict)           
-
+                    detectors.append(PortScanDetector(config_dict))
                 if config_dict.get("TorFlowDetection", 0) > 0:
-                    detect_tor_traffic(filtered_rows, config_dict)     
-
+                    detectors.append(TorTrafficDetector(config_dict))
                 if config_dict.get("HighBandwidthFlowDetection", 0) > 0:
-                    detect_high_bandwidth_flows(filtered_rows, config_dict)     
-        
+                    detectors.append(HighBandwidthFlowDetector(config_dict))
                 if config_dict.get("AlertOnCustomTags", 0) > 0:
-                    detect_custom_tag(filtered_rows, config_dict)          
-  
+                    detectors.append(CustomTagDetector(config_dict))
+
+                # With DetectionWorkers above 1 the detectors run in a process pool and only alerting happens here
+                worker_count = int(config_dict.get("DetectionWorkers", 0))
+                if worker_count > 1:
+                    detector_stats.update(run_detectors_parallel(flows, config_dict, detectors, filtered_indexes, worker_count, alert_buffer))
+                else:
+                    detector_stats.update(run_detectors(flows, config_dict, detectors, filtered_indexes, alert_buffer))
+                alert_buffer.flush()
+                log_detector_stats(detector_stats, len(filtered_indexes))
+                log_enrichment_stats()
 
         except sqlite3.Error as e:
             log_error(logger, f"[ERROR] Error reading from database: {e}")        
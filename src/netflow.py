@@ -1,12 +1,16 @@
 import socket
 import struct
-from src.const import CONST_LINK_LOCAL_RANGE, CONST_COLLECTOR_LISTEN_ADDRESS, CONST_COLLECTOR_LISTEN_PORT, IS_CONTAINER, CONST_CONSOLIDATED_DB
+from src.const import CONST_LINK_LOCAL_RANGE, CONST_COLLECTOR_LISTEN_ADDRESS, CONST_COLLECTOR_LISTEN_PORT, IS_CONTAINER, CONST_CONSOLIDATED_DB, CONST_COLLECTOR_DRAIN_BATCH, CONST_COLLECTOR_RECEIVE_BUFFER, CONST_COLLECTOR_QUEUE_BYTES, CONST_COLLECTOR_DATAGRAM_SIZE, CONST_COLLECTOR_FLUSH_TICK
 import os
 import logging
 from datetime import datetime, timezone
-from src.tags import apply_tags
-from queue import Queue
+from src.tags import apply_tags, apply_tags_batch
+from src.ringbuffer import DatagramRing
+import queue
+import select
+import multiprocessing
 from init import *
+from database.core import connect_to_db, disconnect_from_db
 import threading
 import time
 import json
@@ -16,8 +20,42 @@ if (IS_CONTAINER):
     COLLECTOR_LISTEN_ADDRESS=os.getenv("COLLECTOR_LISTEN_ADDRESS", CONST_COLLECTOR_LISTEN_ADDRESS)
     COLLECTOR_LISTEN_PORT=os.getenv("COLLECTOR_LISTEN_PORT", CONST_COLLECTOR_LISTEN_PORT) 
 
-# Create global queue for netflow packets
-netflow_queue = Queue()
+# Global bounded ring of received datagrams, created by handle_netflow_v5
+netflow_ring = None
+persisted_ring_drops = (0, 0, 0)
+
+# In-memory 5-tuple aggregation table, flushed to newflows in bulk
+flow_table = {}
+flow_table_conn = None
+
+# Counters kept per ingest worker, in shared-memory order
+NETFLOW_WORKER_COUNTERS = ('received_datagrams', 'received_bytes', 'kernel_drops', 'decoded_flows')
+
+# NetFlow v5 record layout with nexthop, interfaces, tcp_flags, tos, AS and mask fields skipped,
+# leaving src_ip, dst_ip, packets, bytes, start_time, end_time, src_port, dst_port, protocol
+NETFLOW_V5_BATCH_STRUCT = struct.Struct('!II4x4xIIIIHH2xB1x8x')
+NETFLOW_V5_BATCH_FIELDS = ('src_ip', 'dst_ip', 'packets', 'bytes', 'start_time', 'end_time', 'src_port', 'dst_port', 'protocol')
+
+# NetFlow v9 / IPFIX information element ids mapped onto the v5 batch columns.
+# Millisecond timestamps are preferred over second timestamps when a template carries both.
+NETFLOW_TEMPLATE_FIELD_IDS = {
+    'src_ip': (8,),
+    'dst_ip': (12,),
+    'packets': (2,),
+    'bytes': (1,),
+    'start_time': (22, 152, 150),
+    'end_time': (21, 153, 151),
+    'src_port': (7,),
+    'dst_port': (11,),
+    'protocol': (4,)
+}
+NETFLOW_TEMPLATE_FIELD_FORMATS = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+# Template cache keyed by (exporter address, source id / observation domain, template id).
+# Values are (record struct, column index per batch field, last refresh time) and are
+# only ever replaced whole, so refreshes never leave a half-built template visible.
+netflow_templates = {}
+netflow_template_stats = {"unknown_template_sets": 0, "unsupported_template_sets": 0}
 
 # Update or insert flow in the DB
 
@@ -51,33 +89,378 @@ def parse_netflow_v5_record(data, offset):
         'src_mask': fields[16],
         'dst_mask': fields[17],
         'tags': "",
+        'tag_bits': 0,
         'last_seen': datetime.now().isoformat(),
         'times_seen': 1
     }
 
+def parse_netflow_v5_batch(packets):
+    """
+    Decode every v5 record in a list of datagrams into one columnar batch.
+
+    Valid record bytes from all datagrams are joined and unpacked in a single
+    struct.iter_unpack pass. IP addresses stay as integers; use int_to_ip where
+    text is actually needed.
+
+    Args:
+        packets: List of (data, addr) tuples as queued by collect_netflow_packets
+
+    Returns:
+        dict: Column name -> tuple of values for src_ip, dst_ip, packets, bytes,
+              start_time, end_time, src_port, dst_port and protocol, plus a
+              'last_seen' timestamp shared by the whole batch
+    """
+    chunks = []
+    for data, addr in packets:
+        if len(data) < 24:
+            continue
+
+        version, count = struct.unpack_from('!HH', data)
+        if version != 5:
+            continue
+
+        # Ignore a truncated trailing record rather than dropping the datagram
+        count = min(count, (len(data) - 24) // 48)
+        chunks.append(data[24:24 + count * 48])
+
+    columns = tuple(zip(*NETFLOW_V5_BATCH_STRUCT.iter_unpack(b"".join(chunks))))
+    if not columns:
+        columns = ((),) * len(NETFLOW_V5_BATCH_FIELDS)
+
+    batch = dict(zip(NETFLOW_V5_BATCH_FIELDS, columns))
+    batch['last_seen'] = datetime.now().isoformat()
+    return batch
+
+def compile_netflow_template(fields):
+    """
+    Precompile a v9/IPFIX template into a struct that unpacks a whole record in one call.
+
+    Fields the collector uses are unpacked as integers; everything else becomes pad bytes.
+
+    Args:
+        fields: List of (field_id, field_length) tuples in template order
+
+    Returns:
+        tuple: (struct.Struct, column indexes in NETFLOW_V5_BATCH_FIELDS order), or None if
+               the template has variable-length fields or lacks IPv4 addresses
+    """
+    wanted = {}
+    for column, field_ids in NETFLOW_TEMPLATE_FIELD_IDS.items():
+        for priority, field_id in enumerate(field_ids):
+            wanted[field_id] = (column, priority)
+
+    record_format = "!"
+    positions = {}
+    unpacked = 0
+    for field_id, field_length in fields:
+        if field_length == 65535:
+            return None
+        mapping = wanted.get(field_id)
+        field_format = NETFLOW_TEMPLATE_FIELD_FORMATS.get(field_length)
+        if mapping and field_format:
+            column, priority = mapping
+            if column not in positions or priority < positions[column][1]:
+                positions[column] = (unpacked, priority)
+            record_format += field_format
+            unpacked += 1
+        else:
+            record_format += f"{field_length}x"
+
+    if 'src_ip' not in positions or 'dst_ip' not in positions:
+        return None
+
+    record_struct = struct.Struct(record_format)
+    if record_struct.size == 0:
+        return None
+
+    indexes = tuple(positions[column][0] if column in positions else None for column in NETFLOW_V5_BATCH_FIELDS)
+    return record_struct, indexes
+
+def parse_netflow_template_set(data, offset, end, exporter, source_id, ipfix):
+    """
+    Read every template in a v9 template flowset or IPFIX template set into the template cache.
+
+    Args:
+        data: Datagram bytes
+        offset (int): Offset of the first template record in the set
+        end (int): Offset where the set ends
+        exporter (str): Address of the exporting router
+        source_id (int): v9 source id or IPFIX observation domain id
+        ipfix (bool): True for IPFIX, where fields may carry an enterprise number
+    """
+    now = time.time()
+    while offset + 4 <= end:
+        template_id, field_count = struct.unpack_from('!HH', data, offset)
+        offset += 4
+        key = (exporter, source_id, template_id)
+
+        if field_count == 0:
+            # IPFIX template withdrawal
+            netflow_templates.pop(key, None)
+            continue
+
+        fields = []
+        for _ in range(field_count):
+            if offset + 4 > end:
+                return
+            field_id, field_length = struct.unpack_from('!HH', data, offset)
+            offset += 4
+            if ipfix and field_id & 0x8000:
+                # Enterprise-specific element, never one of ours
+                offset += 4
+                field_id = 0
+            fields.append((field_id, field_length))
+
+        compiled = compile_netflow_template(fields)
+        if compiled:
+            netflow_templates[key] = (compiled[0], compiled[1], now)
+        else:
+            # Remember the template so its data sets are counted as unsupported, not unknown
+            netflow_templates[key] = (None, None, now)
+
+def parse_netflow_template_batch(packets):
+    """
+    Decode NetFlow v9 and IPFIX datagrams into a columnar batch shaped like parse_netflow_v5_batch.
+
+    Template sets refresh the template cache; data sets are decoded with the template's
+    precompiled struct, one unpack per record. Data sets that arrive before their template
+    are counted in netflow_template_stats and skipped.
+
+    Args:
+        packets: List of (data, addr) tuples as queued by collect_netflow_packets
+
+    Returns:
+        dict: Column name -> tuple of values for every NETFLOW_V5_BATCH_FIELDS column
+    """
+    logger = logging.getLogger(__name__)
+    columns = {column: [] for column in NETFLOW_V5_BATCH_FIELDS}
+
+    for data, addr in packets:
+        try:
+            if len(data) < 16:
+                continue
+
+            version = struct.unpack_from('!H', data)[0]
+            if version == 9:
+                if len(data) < 20:
+                    continue
+                source_id = struct.unpack_from('!I', data, 16)[0]
+                offset = 20
+                template_set_ids = (0,)
+                end = len(data)
+            elif version == 10:
+                length, source_id = struct.unpack_from('!H8xI', data, 2)
+                offset = 16
+                template_set_ids = (2,)
+                end = min(length, len(data))
+            else:
+                continue
+
+            exporter = addr[0]
+            while offset + 4 <= end:
+                set_id, set_length = struct.unpack_from('!HH', data, offset)
+                if set_length < 4:
+                    break
+                set_end = min(offset + set_length, end)
+
+                if set_id in template_set_ids:
+                    parse_netflow_template_set(data, offset + 4, set_end, exporter, source_id, version == 10)
+                elif set_id >= 256:
+                    template = netflow_templates.get((exporter, source_id, set_id))
+                    if template is None:
+                        netflow_template_stats["unknown_template_sets"] += 1
+                    elif template[0] is None:
+                        netflow_template_stats["unsupported_template_sets"] += 1
+                    else:
+                        record_struct, indexes, _ = template
+                        body = data[offset + 4:set_end]
+                        # Trailing bytes shorter than a record are set padding
+                        body = body[:len(body) - len(body) % record_struct.size]
+                        rows = tuple(zip(*record_struct.iter_unpack(body)))
+                        if rows:
+                            count = len(rows[0])
+                            for column, index in zip(NETFLOW_V5_BATCH_FIELDS, indexes):
+                                columns[column].extend(rows[index] if index is not None else (0,) * count)
+
+                offset += set_length
+        except struct.error as e:
+            log_warn(logger, f"[WARN] Malformed NetFlow v9/IPFIX datagram from {addr[0]}: {e}")
+
+    return {column: tuple(values) for column, values in columns.items()}
+
+def parse_netflow_batch(packets):
+    """
+    Decode a mix of NetFlow v5, v9 and IPFIX datagrams into one columnar batch.
+
+    Args:
+        packets: List of (data, addr) tuples as queued by collect_netflow_packets
+
+    Returns:
+        dict: Columnar batch in the parse_netflow_v5_batch shape
+    """
+    batch = parse_netflow_v5_batch(packets)
+    template_batch = parse_netflow_template_batch(packets)
+    if template_batch['src_ip']:
+        for column in NETFLOW_V5_BATCH_FIELDS:
+            batch[column] = batch[column] + template_batch[column]
+    return batch
+
+def expire_netflow_templates(max_age):
+    """
+    Drop templates that have not been refreshed by their exporter within max_age seconds.
+
+    Runs between decode passes, so expiry never holds up decoding.
+
+    Args:
+        max_age (int): Template lifetime in seconds
+
+    Returns:
+        int: Number of templates expired
+    """
+    cutoff = time.time() - max_age
+    expired = [key for key, template in list(netflow_templates.items()) if template[2] < cutoff]
+    for key in expired:
+        netflow_templates.pop(key, None)
+    return len(expired)
+
+def aggregate_flow_batch(batch, max_entries):
+    """
+    Fold a tagged columnar batch into the in-memory 5-tuple aggregation table.
+
+    Packets and bytes are summed, times_seen counted and start/end times kept as
+    min/max. If the table reaches max_entries it is flushed early so memory stays bounded.
+
+    Args:
+        batch: Tagged columnar batch from parse_netflow_v5_batch and apply_tags_batch
+        max_entries (int): Number of distinct flow keys that forces an early flush
+
+    Returns:
+        int: Number of records folded into the table
+    """
+    columns = zip(batch['src_ip'], batch['dst_ip'], batch['src_port'], batch['dst_port'], batch['protocol'],
+                  batch['packets'], batch['bytes'], batch['start_time'], batch['end_time'], batch['tags'], batch['tag_bits'])
+    records = 0
+    for src_ip, dst_ip, src_port, dst_port, protocol, packets, bytes_, start_time, end_time, tags, tag_bits in columns:
+        key = (src_ip, dst_ip, src_port, dst_port, protocol)
+        entry = flow_table.get(key)
+        if entry is None:
+            if len(flow_table) >= max_entries:
+                flush_flow_table()
+            flow_table[key] = [packets, bytes_, start_time, end_time, 1, tags, tag_bits]
+        else:
+            entry[0] += packets
+            entry[1] += bytes_
+            if start_time < entry[2]:
+                entry[2] = start_time
+            if end_time > entry[3]:
+                entry[3] = end_time
+            entry[4] += 1
+        records += 1
+    return records
+
+def flush_flow_table():
+    """
+    Write the aggregation table to newflows in one transaction on the collector's persistent connection.
+
+    Returns:
+        int: Number of aggregated flows written
+    """
+    global flow_table_conn
+    logger = logging.getLogger(__name__)
+
+    if not flow_table:
+        return 0
+
+    if flow_table_conn is None:
+        flow_table_conn = connect_to_db(CONST_CONSOLIDATED_DB, "newflows")
+        if not flow_table_conn:
+            log_error(logger, "[ERROR] Failed to connect to newflows database, keeping aggregated flows for the next flush")
+            return 0
+
+    written = update_new_flows_bulk(flow_table_conn, flow_table)
+    if written < 0:
+        # Drop the connection so the next flush starts clean; the table is kept for retry
+        disconnect_from_db(flow_table_conn)
+        flow_table_conn = None
+        return 0
+
+    flow_table.clear()
+    return written
+
+def load_tagging_context(config_dict):
+    """
+    Load the ignorelist, broadcast addresses and custom tag entries used to tag a batch.
+
+    Args:
+        config_dict: Dictionary containing configuration settings
+
+    Returns:
+        tuple: (ignorelist entries, broadcast address set, custom tag entries)
+    """
+    ignorelist = get_ignorelist()
+
+    tag_entries_json = config_dict.get("TagEntries") or "[]"
+    tag_entries = json.loads(tag_entries_json)
+
+    LOCAL_NETWORKS = set(config_dict['LocalNetworks'].split(','))
+    
+    # Calculate broadcast addresses for all local networks
+    broadcast_addresses = set()
+    for network in LOCAL_NETWORKS:
+        broadcast_ip = calculate_broadcast(network)
+        if broadcast_ip:
+            broadcast_addresses.add(broadcast_ip)
+            #log_info(logger, f"[INFO] Found broadcast address {broadcast_ip} for network {network}")
+    
+    # Add global broadcast address
+    broadcast_addresses.add('255.255.255.255')
+    broadcast_addresses.add('0.0.0.0')
+
+    return ignorelist, broadcast_addresses, tag_entries
+
 def collect_netflow_packets(listen_address, listen_port):
-    """Collect packets and add them to queue"""
+    """Collect packets straight into the preallocated ring buffer"""
     logger = logging.getLogger(__name__)
     
     with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
         s.bind((listen_address, listen_port))
-        log_info(logger, f"[INFO] NetFlow v5 collector listening on {listen_address}:{listen_port}")
+        log_info(logger, f"[INFO] NetFlow v5/v9/IPFIX collector listening on {listen_address}:{listen_port}")
         
         while True:
             try:
-                data, addr = s.recvfrom(8192)
-                netflow_queue.put((data, addr))
+                netflow_ring.receive(s)
             except Exception as e:
                 log_error(logger, f"[ERROR] Socket error: {e}")
                 time.sleep(1)
 
+def check_flush_thresholds(elapsed, pending_bytes, flow_keys, config_dict):
+    """
+    Decide whether the aggregation table should be flushed now.
+
+    Args:
+        elapsed (float): Seconds since the last flush
+        pending_bytes (int): Datagram bytes received since the last flush
+        flow_keys (int): Distinct flow keys in the aggregation table
+        config_dict: Dictionary containing configuration settings
+
+    Returns:
+        str: "time", "bytes" or "flows" for the first threshold reached, or None
+    """
+    if elapsed >= int(config_dict.get('CollectorProcessingInterval', 60)):
+        return "time"
+    if pending_bytes >= int(config_dict.get('CollectorFlushBytes', 4194304)):
+        return "bytes"
+    if flow_keys >= int(config_dict.get('CollectorFlushFlows', 20000)):
+        return "flows"
+    return None
+
 def process_netflow_packets():
-    """Process queued packets at fixed interval"""
+    """Decode queued packets continuously and flush when a time, byte or flow-key threshold is reached"""
     logger = logging.getLogger(__name__)
+    last_stats_write = None
     
     while True:
         try:
-            ignorelist = get_ignorelist()
             config_dict = get_config_settings()
 
             if not config_dict:
@@ -85,67 +468,343 @@ def process_netflow_packets():
                 time.sleep(60)  # Wait before retry
                 continue
 
-            tag_entries_json = config_dict.get("TagEntries", "[]")
-            tag_entries = json.loads(tag_entries_json)
+            ignorelist, broadcast_addresses, tag_entries = load_tagging_context(config_dict)
+            max_entries = int(config_dict.get('CollectorMaxFlowEntries', 50000))
 
-            LOCAL_NETWORKS = set(config_dict['LocalNetworks'].split(','))
-            
-            # Calculate broadcast addresses for all local networks
-            broadcast_addresses = set()
-            for network in LOCAL_NETWORKS:
-                broadcast_ip = calculate_broadcast(network)
-                if broadcast_ip:
-                    broadcast_addresses.add(broadcast_ip)
-                    #log_info(logger, f"[INFO] Found broadcast address {broadcast_ip} for network {network}")
-            
-            # Add global broadcast address
-            broadcast_addresses.add('255.255.255.255')
-            broadcast_addresses.add('0.0.0.0')
+            cycle_start = time.monotonic()
+            pending_packets = 0
+            pending_bytes = 0
+            total_flows = 0
+            flush_reason = None
+
+            while flush_reason is None:
+                time.sleep(CONST_COLLECTOR_FLUSH_TICK)
+
+                # Collect all available packets
+                packets = netflow_ring.drain()
+
+                if packets:
+                    # Decode all queued datagrams into one columnar batch, tag it and fold it into the aggregation table
+                    batch = parse_netflow_batch(packets)
+                    batch = apply_tags_batch(batch, ignorelist, broadcast_addresses, tag_entries, config_dict, CONST_LINK_LOCAL_RANGE)
+                    total_flows += aggregate_flow_batch(batch, max_entries)
+                    pending_packets += len(packets)
+                    pending_bytes += sum(len(data) for data, addr in packets)
+
+                flush_reason = check_flush_thresholds(time.monotonic() - cycle_start, pending_bytes, len(flow_table), config_dict)
+
+            unique_flows = flush_flow_table()
+            flush_stats = {
+                "reason": flush_reason,
+                "interval_seconds": round(time.monotonic() - cycle_start, 2),
+                "packets": pending_packets,
+                "bytes": pending_bytes,
+                "flows": total_flows,
+                "aggregated_flows": unique_flows
+            }
+            if pending_packets:
+                log_info(logger, f"[INFO] Flushed on {flush_reason} threshold after {flush_stats['interval_seconds']}s: {total_flows} flows from {pending_packets} packets ({pending_bytes} bytes), wrote {unique_flows} aggregated flows")
+                # Byte and flow-key flushes can come many times a second, store the stats at most once per interval
+                stats_interval = int(config_dict.get('CollectorProcessingInterval', 60))
+                if last_stats_write is None or time.monotonic() - last_stats_write >= stats_interval:
+                    update_config_setting('CollectorFlushStats', json.dumps(flush_stats))
+                    last_stats_write = time.monotonic()
+
+            persist_ring_drops(netflow_ring)
+
+            expired = expire_netflow_templates(int(config_dict.get('NetflowTemplateTimeout', 1800)))
+            if expired:
+                log_info(logger, f"[INFO] Expired {expired} NetFlow v9/IPFIX templates, {len(netflow_templates)} remain cached")
             
-            packets = []
-            # Collect all available packets
-            while not netflow_queue.empty():
-                packets.append(netflow_queue.get())
-                
-            if packets:
-                log_info(logger, f"[INFO] Processing {len(packets)} queued packets")
-                total_flows = 0
-                
-                for data, addr in packets:
-                    if len(data) < 24:
-                        continue
-                        
-                    version, count, *header_fields = parse_netflow_v5_header(data)
-                    if version != 5:
-                        continue
-                        
-                    offset = 24
-                    for _ in range(count):
-                        if offset + 48 > len(data):
+        except Exception as e:
+            log_error(logger, f"[ERROR] Failed to process NetFlow packets: {e}")
+            time.sleep(60)  # Wait before retry
+
+def persist_ring_drops(ring):
+    """
+    Store the ring buffer's cumulative drop counters in the configuration table when they change.
+
+    Args:
+        ring (DatagramRing): The collector's datagram ring
+    """
+    global persisted_ring_drops
+    logger = logging.getLogger(__name__)
+
+    stats = ring.stats()
+    drops = (stats["dropped_datagrams"], stats["dropped_bytes"], stats["truncated_datagrams"])
+    if drops == persisted_ring_drops:
+        return
+
+    log_warn(logger, f"[WARN] Collector ring buffer dropped {drops[0]} datagrams ({drops[1]} bytes) since start with drop policy '{ring.drop_policy}', "
+                     f"{drops[2]} of them truncated at {ring.slot_size} bytes")
+    update_config_setting('CollectorDroppedDatagrams', drops[0])
+    update_config_setting('CollectorDroppedBytes', drops[1])
+    update_config_setting('CollectorTruncatedDatagrams', drops[2])
+    persisted_ring_drops = drops
+
+def merge_flow_table(other_table):
+    """
+    Merge a worker's aggregation table into this process's flow_table.
+
+    Args:
+        other_table (dict): Aggregation table in the flow_table layout
+    """
+    for key, (packets, bytes_, start_time, end_time, times_seen, tags, tag_bits) in other_table.items():
+        entry = flow_table.get(key)
+        if entry is None:
+            flow_table[key] = [packets, bytes_, start_time, end_time, times_seen, tags, tag_bits]
+        else:
+            entry[0] += packets
+            entry[1] += bytes_
+            if start_time < entry[2]:
+                entry[2] = start_time
+            if end_time > entry[3]:
+                entry[3] = end_time
+            entry[4] += times_seen
+
+def open_reuseport_socket(listen_address, listen_port, receive_buffer):
+    """
+    Open a non-blocking UDP socket that shares its port with the other ingest workers.
+
+    Args:
+        listen_address (str): Address to bind
+        listen_port (int): Port to bind
+        receive_buffer (int): Requested SO_RCVBUF size in bytes
+
+    Returns:
+        socket.socket: Bound socket
+    """
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+    s.bind((listen_address, int(listen_port)))
+    s.setblocking(False)
+    return s
+
+def read_socket_kernel_drops(s):
+    """
+    Read the kernel's receive drop counter for a UDP socket from /proc/net/udp.
+
+    Args:
+        s: Bound UDP socket
+
+    Returns:
+        int: Datagrams dropped by the kernel for this socket, or 0 if unavailable
+    """
+    try:
+        inode = str(os.fstat(s.fileno()).st_ino)
+        with open("/proc/net/udp") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) > 12 and fields[9] == inode:
+                    return int(fields[12])
+    except (OSError, ValueError):
+        pass
+    return 0
+
+def netflow_ingest_worker(worker_id, listen_address, listen_port, receive_buffer, flush_generation, flush_results, worker_counters, start_generation=0):
+    """
+    Receive, decode, tag and aggregate datagrams in a dedicated process.
+
+    Each wakeup drains every datagram already queued on the socket. When the parent
+    bumps flush_generation the worker hands its aggregation table back through
+    flush_results and reloads its tagging context.
+
+    Args:
+        worker_id (int): Index of this worker
+        listen_address (str): Address to bind
+        listen_port (int): Port to bind, shared with the other workers through SO_REUSEPORT
+        receive_buffer (int): Requested SO_RCVBUF size in bytes
+        flush_generation: Shared multiprocessing.Value bumped by the parent to request a flush
+        flush_results: multiprocessing.Queue receiving (worker_id, generation, flow_table) tuples
+        worker_counters: Shared multiprocessing.Array of NETFLOW_WORKER_COUNTERS per worker
+        start_generation (int): flush_generation when the parent started this worker, so a bump
+                                made while the worker was starting is still answered
+    """
+    logger = logging.getLogger(__name__)
+    base = worker_id * len(NETFLOW_WORKER_COUNTERS)
+
+    config_dict = get_config_settings()
+    ignorelist, broadcast_addresses, tag_entries = load_tagging_context(config_dict)
+    max_entries = int(config_dict.get('CollectorMaxFlowEntries', 50000))
+    seen_generation = start_generation
+
+    with open_reuseport_socket(listen_address, listen_port, receive_buffer) as s:
+        log_info(logger, f"[INFO] NetFlow ingest worker {worker_id} listening on {listen_address}:{listen_port}")
+
+        while True:
+            try:
+                readable, _, _ = select.select([s], [], [], 0.5)
+                if readable:
+                    packets = []
+                    received_bytes = 0
+                    while len(packets) < CONST_COLLECTOR_DRAIN_BATCH:
+                        try:
+                            data, addr = s.recvfrom(65535)
+                        except BlockingIOError:
                             break
-                            
-                        record = parse_netflow_v5_record(data, offset)
-                        offset += 48
-                        
-                        # Apply tags and update flow database
-                        record = apply_tags(record, ignorelist, broadcast_addresses, tag_entries, config_dict, CONST_LINK_LOCAL_RANGE)
-                        update_new_flow(record)
-                        total_flows += 1
-                        
-                log_info(logger, f"[INFO] Processed {total_flows} flows from {len(packets)} packets")
-                
-            # Wait for next processing interval
+                        packets.append((data, addr))
+                        received_bytes += len(data)
+
+                    if packets:
+                        batch = parse_netflow_batch(packets)
+                        batch = apply_tags_batch(batch, ignorelist, broadcast_addresses, tag_entries, config_dict, CONST_LINK_LOCAL_RANGE)
+                        decoded = aggregate_flow_batch(batch, max_entries)
+                        worker_counters[base] += len(packets)
+                        worker_counters[base + 1] += received_bytes
+                        worker_counters[base + 3] += decoded
+
+                if flush_generation.value != seen_generation:
+                    seen_generation = flush_generation.value
+                    worker_counters[base + 2] = read_socket_kernel_drops(s)
+                    flush_results.put((worker_id, seen_generation, dict(flow_table)))
+                    flow_table.clear()
+                    expire_netflow_templates(int(config_dict.get('NetflowTemplateTimeout', 1800)))
+
+                    config_dict = get_config_settings() or config_dict
+                    ignorelist, broadcast_addresses, tag_entries = load_tagging_context(config_dict)
+                    max_entries = int(config_dict.get('CollectorMaxFlowEntries', 50000))
+            except Exception as e:
+                log_error(logger, f"[ERROR] NetFlow ingest worker {worker_id} failed: {e}")
+                time.sleep(1)
+
+def get_worker_stats(worker_counters, worker_count):
+    """
+    Snapshot the per-worker counters into a list of dictionaries.
+
+    Args:
+        worker_counters: Shared multiprocessing.Array written by the ingest workers
+        worker_count (int): Number of ingest workers
+
+    Returns:
+        list: One dictionary per worker keyed by NETFLOW_WORKER_COUNTERS
+    """
+    size = len(NETFLOW_WORKER_COUNTERS)
+    return [
+        dict(worker=worker_id, **dict(zip(NETFLOW_WORKER_COUNTERS, worker_counters[worker_id * size:(worker_id + 1) * size])))
+        for worker_id in range(worker_count)
+    ]
+
+def start_netflow_worker(worker_id, receive_buffer, flush_generation, flush_results, worker_counters):
+    """
+    Start one ingest worker process.
+
+    Returns:
+        multiprocessing.Process: The started worker
+    """
+    worker = multiprocessing.Process(
+        target=netflow_ingest_worker,
+        args=(worker_id, COLLECTOR_LISTEN_ADDRESS, COLLECTOR_LISTEN_PORT, receive_buffer, flush_generation, flush_results, worker_counters,
+              flush_generation.value),
+        daemon=True
+    )
+    worker.start()
+    return worker
+
+def collect_worker_tables(workers, generation, flush_results, timeout):
+    """
+    Merge worker aggregation tables until every live worker has answered the flush generation.
+
+    Tables answering an earlier generation arrive late from a slow worker; they are merged
+    as they come in but do not count as that worker's answer.
+
+    Args:
+        workers (list): Worker processes indexed by worker id
+        generation (int): The flush generation just requested
+        flush_results: multiprocessing.Queue of (worker_id, generation, flow_table) tuples
+        timeout (float): Seconds to wait for the last answer
+
+    Returns:
+        list: Ids of live workers that did not answer in time
+    """
+    pending = {worker_id for worker_id, worker in enumerate(workers) if worker.is_alive()}
+    deadline = time.monotonic() + timeout
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            worker_id, worker_generation, worker_table = flush_results.get(timeout=min(remaining, 1))
+        except queue.Empty:
+            # A worker that died mid flush will never answer
+            pending = {worker_id for worker_id in pending if workers[worker_id].is_alive()}
+            continue
+        merge_flow_table(worker_table)
+        if worker_generation == generation:
+            pending.discard(worker_id)
+    return sorted(pending)
+
+def handle_netflow_workers(worker_count, receive_buffer):
+    """
+    Start SO_REUSEPORT ingest worker processes and merge their aggregation tables at each flush.
+
+    Workers that have exited are started again before each flush.
+
+    Args:
+        worker_count (int): Number of ingest worker processes
+        receive_buffer (int): Requested SO_RCVBUF size in bytes for each worker socket
+    """
+    logger = logging.getLogger(__name__)
+
+    flush_generation = multiprocessing.Value('L', 0)
+    flush_results = multiprocessing.Queue()
+    worker_counters = multiprocessing.Array('Q', worker_count * len(NETFLOW_WORKER_COUNTERS))
+
+    workers = [
+        start_netflow_worker(worker_id, receive_buffer, flush_generation, flush_results, worker_counters)
+        for worker_id in range(worker_count)
+    ]
+
+    log_info(logger, f"[INFO] Started {worker_count} NetFlow ingest workers with SO_REUSEPORT")
+
+    while True:
+        try:
+            config_dict = get_config_settings() or {}
             interval = int(config_dict.get('CollectorProcessingInterval', 60))
             time.sleep(interval)
-            
+
+            for worker_id, worker in enumerate(workers):
+                if not worker.is_alive():
+                    log_warn(logger, f"[WARN] NetFlow ingest worker {worker_id} exited with code {worker.exitcode}, restarting it")
+                    workers[worker_id] = start_netflow_worker(worker_id, receive_buffer, flush_generation, flush_results, worker_counters)
+
+            with flush_generation.get_lock():
+                flush_generation.value += 1
+                generation = flush_generation.value
+
+            # Merge every worker's table before writing, so the flush is still one transaction
+            late_workers = collect_worker_tables(workers, generation, flush_results, 30)
+            if late_workers:
+                log_warn(logger, f"[WARN] NetFlow ingest workers {late_workers} did not return their flows in time, merging them at the next flush")
+
+            unique_flows = flush_flow_table()
+            worker_stats = get_worker_stats(worker_counters, worker_count)
+            live_workers = sum(1 for worker in workers if worker.is_alive())
+            log_info(logger, f"[INFO] Wrote {unique_flows} aggregated flows from {live_workers} of {worker_count} ingest workers: {json.dumps(worker_stats)}")
+            update_config_setting('CollectorWorkerStats', json.dumps(worker_stats))
+
         except Exception as e:
-            log_error(logger, f"[ERROR] Failed to process NetFlow packets: {e}")
+            log_error(logger, f"[ERROR] Failed to merge NetFlow ingest worker flows: {e}")
             time.sleep(60)  # Wait before retry
 
 def handle_netflow_v5():
     """Start collector and processor threads"""
     logger = logging.getLogger(__name__)
+
+    config_dict = get_config_settings() or {}
+    worker_count = int(config_dict.get('CollectorWorkers', 0))
+    if worker_count > 0:
+        handle_netflow_workers(worker_count, int(config_dict.get('CollectorReceiveBuffer', CONST_COLLECTOR_RECEIVE_BUFFER)))
+        return
     
+    global netflow_ring
+    netflow_ring = DatagramRing(
+        int(config_dict.get('CollectorQueueBytes', CONST_COLLECTOR_QUEUE_BYTES)),
+        CONST_COLLECTOR_DATAGRAM_SIZE,
+        config_dict.get('CollectorQueueDropPolicy', 'newest')
+    )
+    log_info(logger, f"[INFO] Collector ring buffer holds {netflow_ring.slot_count} datagrams, drop policy '{netflow_ring.drop_policy}'")
+
     # Start collector thread
     collector = threading.Thread(
         target=collect_netflow_packets,
@@ -15,18 +15,102 @@ import socket
 import struct
 from locallogging import log_error, log_info, log_warn
 from ipaddress import IPv4Network
+from functools import lru_cache
+from bisect import bisect_right
 
 def is_ip_in_range(ip, ranges):
     """Check if an IP address is within the specified ranges."""
-    logger = logging.getLogger(__name__)
-    try:
-        for ip_range in ranges:
-            if ipaddress.ip_address(ip) in ipaddress.ip_network(ip_range):
-                return True
-        return False
-    except ValueError as e:
-        log_error(logger, f"[ERROR] Invalid IP address or range: {e}")
-        return False
+    return ip in get_network_set(ranges)
+
+class NetworkSet:
+    """
+    Compiled set of IPv4 networks answering membership with a bisect on integers.
+
+    Networks are parsed once, converted to integer intervals and merged, so a
+    lookup is a single bisect instead of building ipaddress objects per range.
+    """
+
+    def __init__(self, networks):
+        """
+        Args:
+            networks (iterable): Networks in CIDR notation (e.g., ['192.168.1.0/24', '10.0.0.0/8'])
+        """
+        logger = logging.getLogger(__name__)
+        intervals = []
+        for network in networks:
+            try:
+                net = IPv4Network(network.strip(), strict=False)
+                intervals.append((int(net.network_address), int(net.broadcast_address)))
+            except ValueError as e:
+                log_error(logger, f"[ERROR] Invalid IP address or range: {e}")
+
+        merged = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts = [start for start, end in merged]
+        self.ends = [end for start, end in merged]
+
+    def contains_int(self, ip_int):
+        """Return True if the integer IP address falls inside one of the networks."""
+        index = bisect_right(self.starts, ip_int) - 1
+        return index >= 0 and ip_int <= self.ends[index]
+
+    def __contains__(self, ip):
+        if not isinstance(ip, int):
+            ip = ip_to_int(ip)
+            if ip is None:
+                return False
+        return self.contains_int(ip)
+
+    def contains_many(self, ip_ints):
+        """
+        Check a whole column of integer IP addresses at once.
+
+        Args:
+            ip_ints (iterable): IPv4 addresses as unsigned 32-bit integers
+
+        Returns:
+            list: One bool per address
+        """
+        starts, ends = self.starts, self.ends
+        if not starts:
+            return [False] * len(ip_ints)
+        if len(starts) == 1:
+            start, end = starts[0], ends[0]
+            return [start <= ip_int <= end for ip_int in ip_ints]
+        results = []
+        append = results.append
+        for ip_int in ip_ints:
+            index = bisect_right(starts, ip_int) - 1
+            append(index >= 0 and ip_int <= ends[index])
+        return results
+
+    def __len__(self):
+        return len(self.starts)
+
+@lru_cache(maxsize=64)
+def compile_network_set(networks):
+    """Build a NetworkSet for a tuple of CIDR strings, memoized per distinct tuple."""
+    return NetworkSet(networks)
+
+def get_network_set(networks):
+    """
+    Return the compiled NetworkSet for a comma separated config value or a list of networks.
+
+    Args:
+        networks (str or iterable): e.g. config_dict['LocalNetworks'] or ['169.254.0.0/16']
+
+    Returns:
+        NetworkSet: Shared compiled set; rebuilt only when the networks change
+    """
+    if isinstance(networks, NetworkSet):
+        return networks
+    if isinstance(networks, str):
+        networks = networks.split(',')
+    return compile_network_set(tuple(sorted(network.strip() for network in networks if network and network.strip())))
 
 def ip_network_to_range(network):
     logger = logging.getLogger(__name__)
@@ -59,6 +143,22 @@ def ip_to_int(ip_addr):
     except:
         return None
 
+@lru_cache(maxsize=65536)
+def int_to_ip(ip_int):
+    """
+    Convert an integer IP address back to dotted quad text.
+
+    Results are memoized because the same handful of hosts show up in most
+    flows, so a batch only pays for inet_ntoa once per distinct address.
+
+    Args:
+        ip_int (int): IPv4 address as an unsigned 32-bit integer
+
+    Returns:
+        str: Dotted quad representation (e.g., '192.168.1.10')
+    """
+    return socket.inet_ntoa(struct.pack('!L', ip_int))
+
 def get_usable_ips(networks):
     """
     Get a list of all usable IP addresses for multiple network ranges.
@@ -0,0 +1,151 @@
+import threading
+from array import array
+
+
+class DatagramRing:
+    """
+    Bounded, preallocated ring of fixed-size datagram slots.
+
+    The receiver writes straight into a slot with recvfrom_into, so no bytes object is
+    allocated per datagram. When every slot is full the drop policy decides whether the
+    oldest queued datagram is overwritten ("oldest") or the incoming one is discarded
+    ("newest"). Dropped datagrams and bytes are counted for reporting.
+
+    Designed for one receiving thread and one draining thread.
+    """
+
+    def __init__(self, capacity_bytes, slot_size, drop_policy="newest"):
+        """
+        Args:
+            capacity_bytes (int): Total buffer size in bytes
+            slot_size (int): Bytes per slot; datagrams that fill a whole slot are dropped as truncated
+            drop_policy (str): "oldest" or "newest"
+        """
+        self.slot_size = slot_size
+        self.slot_count = max(1, capacity_bytes // slot_size)
+        self.drop_policy = drop_policy
+        self.buffer = bytearray(self.slot_count * slot_size)
+        self.view = memoryview(self.buffer)
+        self.lengths = array('L', [0]) * self.slot_count
+        self.addrs = [None] * self.slot_count
+        self.scratch = bytearray(slot_size)
+        self.head = 0
+        self.count = 0
+        self.queued = 0
+        self.dropped_datagrams = 0
+        self.dropped_bytes = 0
+        self.truncated_datagrams = 0
+        self.lock = threading.Lock()
+
+    def receive(self, sock):
+        """
+        Receive one datagram from sock into the next free slot, applying the drop policy when full.
+
+        The ring is checked again once the datagram has arrived, so a drain that ran while
+        the receiver was blocked frees room instead of costing a datagram. A datagram that
+        fills its whole slot may have been cut off and is dropped as truncated.
+
+        Args:
+            sock: Bound UDP socket
+
+        Returns:
+            int: Number of bytes received
+        """
+        with self.lock:
+            full = self.count == self.slot_count
+            slot = (self.head + self.count) % self.slot_count
+
+        if full:
+            # Read into the scratch slot and only decide what to drop once the datagram is here
+            nbytes, addr = sock.recvfrom_into(self.scratch)
+            with self.lock:
+                if nbytes >= self.slot_size:
+                    self.count_truncated(nbytes)
+                    return nbytes
+                if self.count == self.slot_count:
+                    if self.drop_policy != "oldest":
+                        self.dropped_datagrams += 1
+                        self.dropped_bytes += nbytes
+                        return nbytes
+                    self.dropped_datagrams += 1
+                    self.dropped_bytes += self.lengths[self.head]
+                    self.queued -= self.lengths[self.head]
+                    self.head = (self.head + 1) % self.slot_count
+                    self.count -= 1
+                slot = (self.head + self.count) % self.slot_count
+                offset = slot * self.slot_size
+                self.view[offset:offset + nbytes] = self.scratch[:nbytes]
+                self.store(slot, nbytes, addr)
+            return nbytes
+
+        offset = slot * self.slot_size
+        nbytes, addr = sock.recvfrom_into(self.view[offset:offset + self.slot_size])
+        with self.lock:
+            if nbytes >= self.slot_size:
+                self.count_truncated(nbytes)
+                return nbytes
+            self.store(slot, nbytes, addr)
+        return nbytes
+
+    def store(self, slot, nbytes, addr):
+        """Queue a datagram received into slot, called with the lock held."""
+        self.lengths[slot] = nbytes
+        self.addrs[slot] = addr
+        self.count += 1
+        self.queued += nbytes
+
+    def count_truncated(self, nbytes):
+        """Count a datagram that did not fit its slot as dropped, called with the lock held."""
+        self.truncated_datagrams += 1
+        self.dropped_datagrams += 1
+        self.dropped_bytes += nbytes
+
+    def drain(self):
+        """
+        Take every queued datagram out of the ring with a single copy.
+
+        Returns:
+            list: (memoryview, addr) tuples, each view pointing into one snapshot of the queued slots
+        """
+        with self.lock:
+            head, count = self.head, self.count
+            if count == 0:
+                return []
+            end = head + count
+            if end <= self.slot_count:
+                snapshot = bytes(self.view[head * self.slot_size:end * self.slot_size])
+            else:
+                snapshot = bytes(self.view[head * self.slot_size:]) + bytes(self.view[:(end - self.slot_count) * self.slot_size])
+            slots = [(index % self.slot_count) for index in range(head, end)]
+            lengths = [self.lengths[slot] for slot in slots]
+            addrs = [self.addrs[slot] for slot in slots]
+            self.head = end % self.slot_count
+            self.count = 0
+            self.queued = 0
+
+        snapshot_view = memoryview(snapshot)
+        return [
+            (snapshot_view[position * self.slot_size:position * self.slot_size + length], addr)
+            for position, (length, addr) in enumerate(zip(lengths, addrs))
+        ]
+
+    def queued_bytes(self):
+        """Return the number of payload bytes currently queued."""
+        return self.queued
+
+    def stats(self):
+        """
+        Return ring occupancy and drop counters.
+
+        Returns:
+            dict: queued_datagrams, slot_count, dropped_datagrams, dropped_bytes and truncated_datagrams,
+                  truncated datagrams being included in the dropped counters
+        """
+        with self.lock:
+            return {
+                "queued_datagrams": self.count,
+                "slot_count": self.slot_count,
+                "dropped_datagrams": self.dropped_datagrams,
+                "dropped_bytes": self.dropped_bytes,
+                "truncated_datagrams": self.truncated_datagrams
+            }
@@ -10,6 +10,7 @@ if str(src_dir) not in sys.path:
 sys.path.insert(0, "/database")
 import time
 import logging
+from ipaddress import IPv4Network
 from integrations.dns import dns_lookup  # Import the dns_lookup function from dns.py
 from integrations.piholedhcp import get_pihole_dhcp_leases, get_pihole_network_devices
 from integrations.nmap_fingerprint import os_fingerprint
@@ -17,6 +18,277 @@ from integrations.nmap_fingerprint import os_fingerprint
 from init import *
 
 
+def parse_tag_rule_ip(value):
+    """
+    Parse the ip field of an ignorelist or custom tag rule.
+
+    Args:
+        value (str): "*", an IPv4 address or a CIDR prefix (e.g. '52.94.0.0/16')
+
+    Returns:
+        tuple: (network, prefix_length) as integers, or None for the "*" wildcard
+
+    Raises:
+        ValueError: If the value is not a valid address or prefix
+    """
+    if value == "*":
+        return None
+    network = IPv4Network(str(value).strip(), strict=False)
+    return int(network.network_address), network.prefixlen
+
+def parse_tag_rule_port(value):
+    """
+    Parse the port field of an ignorelist or custom tag rule.
+
+    Args:
+        value: "*", a port number or an inclusive range such as "8000-8100"
+
+    Returns:
+        tuple: (low, high) port numbers, or None for the "*" wildcard
+
+    Raises:
+        ValueError: If the value is not a valid port or range
+    """
+    if value == "*":
+        return None
+    if isinstance(value, str) and "-" in value:
+        low, high = (int(part) for part in value.split("-", 1))
+    else:
+        low = high = int(value)
+    if not 0 <= low <= high <= 65535:
+        raise ValueError(f"Invalid port range {value}")
+    return low, high
+
+def parse_tag_rule_protocol(value):
+    """
+    Parse the protocol field of an ignorelist or custom tag rule.
+
+    Returns:
+        int: IP protocol number, or None for the "*" wildcard
+
+    Raises:
+        ValueError: If the value is not a protocol number
+    """
+    if value == "*":
+        return None
+    protocol = int(value)
+    if not 0 <= protocol <= 255:
+        raise ValueError(f"Invalid protocol {value}")
+    return protocol
+
+def validate_tag_rule(src_ip, dst_ip, dst_port, protocol):
+    """
+    Check that ignorelist or custom tag rule fields can be compiled.
+
+    Args:
+        src_ip (str): "*", an IPv4 address or a CIDR prefix
+        dst_ip (str): "*", an IPv4 address or a CIDR prefix
+        dst_port: "*", a port number or a "low-high" range
+        protocol: "*" or an IP protocol number
+
+    Returns:
+        str: Description of the first invalid field, or None if the rule is valid
+    """
+    for field, value, parser in (
+        ("src_ip", src_ip, parse_tag_rule_ip),
+        ("dst_ip", dst_ip, parse_tag_rule_ip),
+        ("dst_port", dst_port, parse_tag_rule_port),
+        ("protocol", protocol, parse_tag_rule_protocol)
+    ):
+        try:
+            parser(value)
+        except (ValueError, TypeError) as e:
+            return f"Invalid {field} '{value}': {e}"
+    return None
+
+class IPPrefixTrie:
+    """
+    Binary radix trie over IPv4 prefixes.
+
+    Every node holds the rule positions whose prefix ends there, so walking one
+    address from the root collects every rule covering it in at most 32 steps.
+    """
+
+    def __init__(self):
+        self.root = [None, None, []]
+        self.depth = 0
+
+    def insert(self, network, prefix_length, position):
+        """Add a rule position under network/prefix_length; a None prefix means any address."""
+        node = self.root
+        if network is not None:
+            for bit in range(31, 31 - prefix_length, -1):
+                branch = (network >> bit) & 1
+                if node[branch] is None:
+                    node[branch] = [None, None, []]
+                node = node[branch]
+            self.depth = max(self.depth, prefix_length)
+        node[2].append(position)
+
+    def lookup(self, ip_int):
+        """Return the positions of every prefix containing ip_int."""
+        node = self.root
+        positions = list(node[2])
+        for bit in range(31, 31 - self.depth, -1):
+            node = node[(ip_int >> bit) & 1]
+            if node is None:
+                break
+            positions.extend(node[2])
+        return positions
+
+class TagRuleIndex:
+    """
+    Index over ignorelist or custom tag entries.
+
+    Entries are (label, src_ip, dst_ip, dst_port, protocol) with "*" as a wildcard.
+    Exact rules are grouped by which fields are wildcards and every group is a dict
+    keyed on the concrete values, so matching a flow costs a few dict probes. Rules
+    using CIDR prefixes or port ranges go into src and dst radix tries with their
+    port intervals checked on the trie hits. Like the original scan, an entry ip
+    matches either side of the flow and an entry port matches either port.
+    """
+
+    def __init__(self, entries):
+        """
+        Args:
+            entries: List of (label, src_ip, dst_ip, dst_port, protocol) entries
+        """
+        logger = logging.getLogger(__name__)
+        self.source = entries
+        self.snapshot = tag_rule_snapshot(entries)
+        self.labels = []
+        self.groups = {}
+        self.src_trie = IPPrefixTrie()
+        self.dst_trie = IPPrefixTrie()
+        self.range_rules = {}
+
+        for label, rule_src_ip, rule_dst_ip, rule_dst_port, rule_protocol in (entries or ()):
+            try:
+                src = parse_tag_rule_ip(rule_src_ip)
+                dst = parse_tag_rule_ip(rule_dst_ip)
+                ports = parse_tag_rule_port(rule_dst_port)
+                protocol = parse_tag_rule_protocol(rule_protocol)
+            except (ValueError, TypeError) as e:
+                log_error(logger, f"[ERROR] Skipping invalid tag rule {label}: {e}")
+                continue
+
+            position = len(self.labels)
+            self.labels.append(label)
+
+            is_exact = all(ip is None or ip[1] == 32 for ip in (src, dst)) and (ports is None or ports[0] == ports[1])
+            if is_exact:
+                values = (
+                    "*" if src is None else int_to_ip(src[0]),
+                    "*" if dst is None else int_to_ip(dst[0]),
+                    "*" if ports is None else ports[0],
+                    "*" if protocol is None else protocol
+                )
+                pattern = tuple(value == "*" for value in values)
+                key = tuple(value for value in values if value != "*")
+                self.groups.setdefault(pattern, {}).setdefault(key, []).append(position)
+            else:
+                self.src_trie.insert(*(src or (None, 0)), position)
+                self.dst_trie.insert(*(dst or (None, 0)), position)
+                self.range_rules[position] = (ports, protocol)
+
+    def matches_source(self, entries):
+        """Return True if the index was built from entries with the same content."""
+        if entries is self.source:
+            return True
+        if tag_rule_snapshot(entries) == self.snapshot:
+            self.source = entries
+            return True
+        return False
+
+    def match(self, src_ip, dst_ip, src_port, dst_port, protocol, src_int=None, dst_int=None):
+        """
+        Find every entry matching one flow.
+
+        Args:
+            src_ip, dst_ip (str): Flow addresses as text
+            src_port, dst_port, protocol (int): Flow ports and protocol
+            src_int, dst_int (int, optional): The same addresses as integers, when already known
+
+        Returns:
+            list: Labels of the matching entries, in entry order
+        """
+        ips = (src_ip,) if src_ip == dst_ip else (src_ip, dst_ip)
+        ports = (src_port,) if src_port == dst_port else (src_port, dst_port)
+        candidates = (ips, ips, ports, (protocol,))
+
+        matched = set()
+        for pattern, rules in self.groups.items():
+            keys = [()]
+            for is_wildcard, values in zip(pattern, candidates):
+                if not is_wildcard:
+                    keys = [key + (value,) for key in keys for value in values]
+            for key in keys:
+                positions = rules.get(key)
+                if positions:
+                    matched.update(positions)
+
+        if self.range_rules:
+            src_int = ip_to_int(src_ip) if src_int is None else src_int
+            dst_int = ip_to_int(dst_ip) if dst_int is None else dst_int
+            if src_int is not None and dst_int is not None:
+                src_hits = set(self.src_trie.lookup(src_int))
+                src_hits.update(self.src_trie.lookup(dst_int))
+                if src_hits:
+                    dst_hits = set(self.dst_trie.lookup(src_int))
+                    dst_hits.update(self.dst_trie.lookup(dst_int))
+                    for position in src_hits & dst_hits:
+                        rule_ports, rule_protocol = self.range_rules[position]
+                        if rule_protocol is not None and rule_protocol != protocol:
+                            continue
+                        if rule_ports is not None and not (
+                            rule_ports[0] <= src_port <= rule_ports[1] or rule_ports[0] <= dst_port <= rule_ports[1]
+                        ):
+                            continue
+                        matched.add(position)
+
+        return [self.labels[position] for position in sorted(matched)]
+
+    def __len__(self):
+        return len(self.labels)
+
+def compile_tag_rules(entries):
+    """
+    Validate and compile ignorelist or custom tag entries into a TagRuleIndex.
+
+    Invalid entries are logged and left out of the index.
+
+    Args:
+        entries: List of (label, src_ip, dst_ip, dst_port, protocol) entries
+
+    Returns:
+        TagRuleIndex: Compiled index
+    """
+    return TagRuleIndex(entries)
+
+def tag_rule_snapshot(entries):
+    """Return a hashable copy of tag rule entries for change detection."""
+    return tuple(tuple(entry) for entry in (entries or ()))
+
+# Compiled indexes by rule kind ("ignorelist", "customtags")
+tag_rule_indexes = {}
+
+def get_tag_rule_index(kind, entries):
+    """
+    Return the compiled TagRuleIndex for entries, rebuilding it only when they changed.
+
+    Args:
+        kind (str): "ignorelist" or "customtags"
+        entries: List of (label, src_ip, dst_ip, dst_port, protocol) entries
+
+    Returns:
+        TagRuleIndex: Index for the current entries
+    """
+    index = tag_rule_indexes.get(kind)
+    if index is None or not index.matches_source(entries):
+        index = compile_tag_rules(entries)
+        tag_rule_indexes[kind] = index
+    return index
+
 def tag_ignorelist(record, ignorelist_entries):
     """
     Check if a single row matches any ignorelist entry.
@@ -26,31 +298,16 @@ def tag_ignorelist(record, ignorelist_entries):
         ignorelist_entries: List of ignorelist entries from database
 
     Returns:
-        bool: True if the row matches a ignorelist entry, False otherwise
+        str: Ignorelist tags for the first matching entry, None otherwise
     """
-    logger = logging.getLogger(__name__)
-    #log_info(logger, "[INFO] Checking if the row is ignorelisted")
-
     if not ignorelist_entries:
         return None
 
-   # src_ip, dst_ip, src_port, dst_port, protocol, *_ = row
+    index = get_tag_rule_index("ignorelist", ignorelist_entries)
+    matches = index.match(record['src_ip'], record['dst_ip'], record['src_port'], record['dst_port'], record['protocol'])
+    if matches:
+        return f"IgnoreList;IgnoreList_{matches[0]};"
 
-    #log_info(logger, f"[INFO] Checking ignorelist for src_ip: {src_ip}, dst_ip: {dst_ip}, src_port: {src_port}, dst_port: {dst_port}, protocol: {protocol}")
-
-    for ignorelist_id, ignorelist_src_ip, ignorelist_dst_ip, ignorelist_dst_port, ignorelist_protocol in ignorelist_entries:
-        #log_info(logger, f"[INFO] Checking against ignorelist entry: {ignorelist_id}, src_ip: {ignorelist_src_ip}, dst_ip: {ignorelist_dst_ip}, dst_port: {ignorelist_dst_port}, protocol: {ignorelist_protocol}")
-        # Check if the flow matches any ignorelist entry
-        src_match = (ignorelist_src_ip == record['src_ip'] or ignorelist_src_ip == record['dst_ip'] or ignorelist_src_ip == "*")
-        dst_match = (ignorelist_dst_ip == record['dst_ip'] or ignorelist_dst_ip == record['src_ip'] or ignorelist_dst_ip == "*")
-        port_match = (ignorelist_dst_port in (record['src_port'], record['dst_port']) or ignorelist_dst_port == "*")
-        protocol_match = ((int(ignorelist_protocol) == record['protocol']) or (ignorelist_protocol == "*"))
-
-        if src_match and dst_match and port_match and protocol_match:
-            #log_info(logger, f"[INFO] Row is ignorelisted with ID: {ignorelist_id}")
-            return f"IgnoreList;IgnoreList_{ignorelist_id};"
-    
-    #log_info(logger, "[INFO] Row is not ignorelisted")
     return None
 
 def tag_broadcast(record, broadcast_addresses):
@@ -117,13 +374,14 @@ def tag_linklocal(record, link_local_range):
 
     try:
         # Link-local address range
-        
+        link_local_networks = get_network_set(link_local_range)
+
         # Check if source IP is in link-local range
-        if is_ip_in_range(record["src_ip"], link_local_range):
+        if record["src_ip"] in link_local_networks:
             return "LinkLocal;"
             
         # Check if destination IP is in link-local range
-        if is_ip_in_range(record["dst_ip"], link_local_range):
+        if record["dst_ip"] in link_local_networks:
             return "LinkLocal;"
             
         return None
@@ -143,38 +401,15 @@ def tag_custom(record, tag_entries):
     Returns:
         str: Custom tags to be applied or None if no matches
     """
-    logger = logging.getLogger(__name__)
-    
     if not tag_entries:
         return None
-    
-    applied_tags = []
-    
-    for tag_name, tag_src_ip, tag_dst_ip, tag_dst_port, tag_protocol in tag_entries:
-        try:
-            # Check for matches using wildcard pattern similar to ignorelist
-            src_match = (tag_src_ip == record['src_ip'] or tag_src_ip == record['dst_ip'] or tag_src_ip == "*")
-            dst_match = (tag_dst_ip == record['dst_ip'] or tag_dst_ip == record['src_ip'] or tag_dst_ip == "*")
-            
-            # Port check - handle string conversion for wildcard
-            port_match = (tag_dst_port == "*" or 
-                         tag_dst_port in (record['src_port'], record['dst_port']))
-            
-            # Protocol check - handle string conversion for wildcard
-            protocol_match = (tag_protocol == "*" or 
-                             int(tag_protocol) == record['protocol'])
-            
-            # If all criteria match, add the tag
-            if src_match and dst_match and port_match and protocol_match:
-                applied_tags.append(f"{tag_name};")
-                #log_info(logger, f"[INFO] Custom tag '{tag_name}' applied to flow: {record['src_ip']} -> {record['dst_ip']}:{record['dst_port']}")
-                
-        except (ValueError, KeyError, TypeError) as e:
-            log_error(logger, f"[ERROR] Error applying custom tag: {e}")
-    
+
+    index = get_tag_rule_index("customtags", tag_entries)
+    applied_tags = index.match(record['src_ip'], record['dst_ip'], record['src_port'], record['dst_port'], record['protocol'])
+
     # Return all matched tags as a single string
     if applied_tags:
-        return "".join(applied_tags)
+        return "".join(f"{tag_name};" for tag_name in applied_tags)
     return None
     
 def apply_tags(record, ignorelist_entries, broadcast_addresses, tag_entries, config_dict, link_local_range):
@@ -188,29 +423,36 @@ def apply_tags(record, ignorelist_entries, broadcast_addresses, tag_entries, con
         tag_entries: List of custom tag entries
 
     Returns:
-        record: Updated record with tags
+        record: Updated record with tags and tag_bits
     """
     # Initialize tags if not present
     if 'tags' not in record:
         record['tags'] = ""
+    tag_bits = record.get('tag_bits') or 0
 
     # Apply existing tags
     if ignorelist_entries:
         ignorelist_tag = tag_ignorelist(record, ignorelist_entries)
         if ignorelist_tag:
             record['tags'] += f"{ignorelist_tag}"
+            tag_bits |= CONST_TAG_IGNORELIST
 
     broadcast_tag = tag_broadcast(record, broadcast_addresses)
     if broadcast_tag:
         record['tags'] += f"{broadcast_tag}"
+        tag_bits |= CONST_TAG_BROADCAST
 
     multicast_tag = tag_multicast(record)
     if multicast_tag:
         record['tags'] += f"{multicast_tag}"
+        tag_bits |= CONST_TAG_MULTICAST
         
     linklocal_tag = tag_linklocal(record, link_local_range)
     if linklocal_tag:
         record['tags'] += f"{linklocal_tag}"
+        tag_bits |= CONST_TAG_LINKLOCAL
+
+    record['tag_bits'] = tag_bits
         
     if config_dict.get("AlertOnCustomTags", 0) > 0:
         # Apply custom tags
@@ -221,3 +463,69 @@ def apply_tags(record, ignorelist_entries, broadcast_addresses, tag_entries, con
 
     return record
 
+
+def apply_tags_batch(batch, ignorelist_entries, broadcast_addresses, tag_entries, config_dict, link_local_range):
+    """
+    Apply the same tags as apply_tags to every flow in a columnar batch.
+
+    Broadcast, multicast and link-local checks run on the integer IP columns. Text
+    addresses are only produced when ignorelist or custom tag entries need them.
+
+    Args:
+        batch: Columnar flow batch as produced by parse_netflow_v5_batch
+        ignorelist_entries: List of ignorelist entries from the database
+        broadcast_addresses: Set of broadcast addresses
+        tag_entries: List of custom tag entries
+        config_dict: Dictionary containing configuration settings
+        link_local_range: List of link-local networks in CIDR notation
+
+    Returns:
+        batch: The same batch with its 'tags' and 'tag_bits' columns filled in
+    """
+    broadcast_ints = set(ip_to_int(ip) for ip in (broadcast_addresses or ()))
+    link_local_networks = get_network_set(link_local_range)
+    src_linklocal = link_local_networks.contains_many(batch['src_ip'])
+    dst_linklocal = link_local_networks.contains_many(batch['dst_ip'])
+    ignorelist_index = get_tag_rule_index("ignorelist", ignorelist_entries) if ignorelist_entries else None
+    custom_index = None
+    if config_dict.get("AlertOnCustomTags", 0) > 0 and tag_entries:
+        custom_index = get_tag_rule_index("customtags", tag_entries)
+
+    tags = []
+    tag_bits = []
+    columns = zip(batch['src_ip'], batch['dst_ip'], batch['src_port'], batch['dst_port'], batch['protocol'], src_linklocal, dst_linklocal)
+    for src_ip, dst_ip, src_port, dst_port, protocol, is_src_linklocal, is_dst_linklocal in columns:
+        row_tags = ""
+        row_bits = 0
+
+        if ignorelist_index or custom_index:
+            src_text, dst_text = int_to_ip(src_ip), int_to_ip(dst_ip)
+
+        if ignorelist_index:
+            ignorelist_matches = ignorelist_index.match(src_text, dst_text, src_port, dst_port, protocol, src_ip, dst_ip)
+            if ignorelist_matches:
+                row_tags += f"IgnoreList;IgnoreList_{ignorelist_matches[0]};"
+                row_bits |= CONST_TAG_IGNORELIST
+
+        if dst_ip in broadcast_ints:
+            row_tags += "Broadcast;"
+            row_bits |= CONST_TAG_BROADCAST
+
+        if 0xE0000000 <= dst_ip <= 0xEFFFFFFF:
+            row_tags += "Multicast;"
+            row_bits |= CONST_TAG_MULTICAST
+
+        if is_src_linklocal or is_dst_linklocal:
+            row_tags += "LinkLocal;"
+            row_bits |= CONST_TAG_LINKLOCAL
+
+        if custom_index:
+            for tag_name in custom_index.match(src_text, dst_text, src_port, dst_port, protocol, src_ip, dst_ip):
+                row_tags += f"{tag_name};"
+
+        tags.append(row_tags)
+        tag_bits.append(row_bits)
+
+    batch['tags'] = tags
+    batch['tag_bits'] = tag_bits
+    return batch
@@ -0,0 +1,87 @@
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+# Set up path for imports
+current_dir = Path(__file__).resolve().parent
+parent_dir = str(current_dir.parent)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+sys.path.insert(0, "/database")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from init import *
+from integrations.ipasn import iter_json_object
+
+ASN_COUNT = 60000
+NETWORKS_PER_ASN = 12
+
+
+def build_asn_zip(zip_path, asn_count):
+    """
+    Write a ZIP file holding a JSON dictionary shaped like asn_ipv4_full.json.
+
+    Args:
+        zip_path (str): Where to write the ZIP file
+        asn_count (int): Number of ASN entries to write
+    """
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zip_ref:
+        with zip_ref.open("asn_ipv4_full.json", "w") as member, io.TextIOWrapper(member, encoding="utf-8") as json_file:
+            json_file.write("{")
+            for asn in range(1, asn_count + 1):
+                networks = [f"{int_to_ip(random.randint(1, 223) << 24 | random.randint(0, 65535) << 8)}/24" for _ in range(random.randint(1, NETWORKS_PER_ASN * 2))]
+                entry = {"ipv4": networks, "organization": {"name": f"Example Networks {asn}", "country": "US"}}
+                json_file.write(("," if asn > 1 else "") + f'"{asn}": ' + json.dumps(entry))
+            json_file.write("}")
+
+
+def count_networks(items):
+    """Walk the ASN entries the way create_asn_database does and count the networks."""
+    return sum(len(asn_data.get("ipv4", [])) for asn, asn_data in items)
+
+
+def whole_file(zip_path, temp_dir):
+    """The previous import: extract the member, then json.load the whole file."""
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        zip_ref.extractall(temp_dir)
+    with open(os.path.join(temp_dir, "asn_ipv4_full.json"), "r") as json_file:
+        data = json.load(json_file)
+    return count_networks(data.items())
+
+
+def streamed(zip_path, temp_dir):
+    """Read the member out of the ZIP file and parse one ASN entry at a time."""
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        with zip_ref.open("asn_ipv4_full.json") as member, io.TextIOWrapper(member, encoding="utf-8") as json_file:
+            return count_networks(iter_json_object(json_file))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        zip_path = os.path.join(temp_dir, "asn_ipv4_full.json.zip")
+        build_asn_zip(zip_path, ASN_COUNT)
+        with zipfile.ZipFile(zip_path, "r") as zip_ref:
+            json_size = zip_ref.getinfo("asn_ipv4_full.json").file_size
+        print(f"ASN file: {ASN_COUNT} ASNs, {json_size / 1048576:.1f} MiB of JSON")
+
+        for name, func in (("whole file", whole_file), ("streamed", streamed)):
+            start = time.perf_counter()
+            networks = func(zip_path, temp_dir)
+            elapsed = time.perf_counter() - start
+
+            # Traced separately, tracemalloc slows the timed run down several times over
+            tracemalloc.start()
+            func(zip_path, temp_dir)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{name:>10}: {networks} networks parsed in {elapsed:.2f} s, peak traced memory {peak / 1048576:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+# Set up path for imports
+current_dir = Path(__file__).resolve().parent
+parent_dir = str(current_dir.parent)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+sys.path.insert(0, "/database")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from init import *
+from database.core import bulk_replace_table
+
+GEOLOCATION_COUNT = 300000
+TOR_NODE_COUNT = 7000
+BATCH_SIZE = 1000
+GEOLOCATION_COLUMNS = ("network", "start_ip", "end_ip", "netmask", "country_name")
+
+
+def build_geolocations(count):
+    """Build disjoint /24 geolocation rows in the shape the MaxMind import produces."""
+    rows = []
+    for block in random.sample(range(ip_to_int("1.0.0.0") >> 8, ip_to_int("223.255.255.0") >> 8), count):
+        start_ip = block << 8
+        rows.append((f"{int_to_ip(start_ip)}/24", start_ip, start_ip + 255, 0xFFFFFF00, f"Country {block % 200}"))
+    return rows
+
+
+def batched_inserts(db_path, rows):
+    """The previous import: a connection per 1000 row batch and one execute per row."""
+    for offset in range(0, len(rows), BATCH_SIZE):
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        cursor = conn.cursor()
+        for row in rows[offset:offset + BATCH_SIZE]:
+            cursor.execute("""
+                INSERT OR IGNORE INTO geolocation (
+                    network, start_ip, end_ip, netmask, country_name
+                ) VALUES (?, ?, ?, ?, ?)
+            """, row)
+        conn.commit()
+        conn.close()
+
+
+def per_node_inserts(db_path, tor_nodes):
+    """The previous Tor import: a cleared table, then a connection and a commit per node."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM tornodes")
+    conn.commit()
+    conn.close()
+    for ip_address in tor_nodes:
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO tornodes (ip_address, import_date) VALUES (?, datetime('now', 'localtime'))", (ip_address,))
+        conn.commit()
+        conn.close()
+
+
+def main():
+    rows = build_geolocations(GEOLOCATION_COUNT)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "consolidated.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(CONST_CREATE_GEOLOCATION_SQL)
+        conn.execute(CONST_CREATE_TORNODES_SQL)
+        conn.commit()
+        conn.close()
+
+        start = time.perf_counter()
+        batched_inserts(db_path, rows)
+        batched_s = time.perf_counter() - start
+        print(f" batched inserts: {len(rows)} geolocation rows in {batched_s:.2f} s")
+
+        start = time.perf_counter()
+        loaded = bulk_replace_table(db_path, "geolocation", CONST_CREATE_GEOLOCATION_SQL, GEOLOCATION_COLUMNS, iter(rows), [("start_ip", "end_ip")])
+        bulk_s = time.perf_counter() - start
+        print(f"    bulk replace: {loaded} geolocation rows in {bulk_s:.2f} s including the range index ({batched_s / bulk_s:.1f}x)")
+
+
+        tor_nodes = [int_to_ip(random.randint(ip_to_int("1.0.0.0"), ip_to_int("223.255.255.255"))) for _ in range(TOR_NODE_COUNT)]
+        start = time.perf_counter()
+        per_node_inserts(db_path, tor_nodes)
+        per_node_s = time.perf_counter() - start
+        print(f"per node inserts: {len(tor_nodes)} Tor nodes in {per_node_s:.2f} s")
+
+        start = time.perf_counter()
+        loaded = bulk_replace_table(db_path, "tornodes", CONST_CREATE_TORNODES_SQL, ("ip_address", "import_date"),
+                                    ((ip_address, "2025-01-01 00:00:00") for ip_address in tor_nodes))
+        bulk_s = time.perf_counter() - start
+        print(f"    bulk replace: {loaded} Tor nodes in {bulk_s:.2f} s ({per_node_s / bulk_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
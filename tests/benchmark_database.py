@@ -0,0 +1,84 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+# Set up path for imports
+current_dir = Path(__file__).resolve().parent
+parent_dir = str(current_dir.parent)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+sys.path.insert(0, "/database")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from init import *
+import database.core
+import database.alerts
+import database.localhosts
+import database.newflows
+from database.core import close_pooled_connections
+from database.alerts import log_alert_to_db, get_alert_count_by_id
+from database.localhosts import get_localhosts, get_localhost_by_ip
+from database.newflows import update_new_flow, get_new_flows
+
+ITERATIONS = 500
+BENCHMARK_IP = "192.168.250.250"
+
+
+def run_helpers(iterations):
+    """
+    Call a representative mix of alerts, localhosts and newflows helpers.
+
+    Args:
+        iterations (int): Number of rounds to run
+
+    Returns:
+        int: Number of helper calls made
+    """
+    calls = 0
+    for i in range(iterations):
+        flow = [BENCHMARK_IP, "203.0.113.10", 40000 + (i % 100), 443, 6, 1, 100, 0]
+        record = {
+            'src_ip': BENCHMARK_IP, 'dst_ip': "203.0.113.10", 'src_port': 40000 + (i % 100), 'dst_port': 443,
+            'protocol': 6, 'packets': 1, 'bytes': 100, 'start_time': 0, 'end_time': 0, 'tags': ""
+        }
+        log_alert_to_db(BENCHMARK_IP, flow, "Benchmark", "", "", f"{BENCHMARK_IP}_Benchmark_{i % 50}", False)
+        get_alert_count_by_id(f"{BENCHMARK_IP}_Benchmark_{i % 50}")
+        get_localhosts()
+        get_localhost_by_ip(BENCHMARK_IP)
+        update_new_flow(record)
+        calls += 5
+        if i % 100 == 0:
+            get_new_flows()
+            calls += 1
+    return calls
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "consolidated.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(CONST_CREATE_ALERTS_SQL)
+        conn.executescript(CONST_CREATE_LOCALHOSTS_SQL)
+        conn.executescript(CONST_CREATE_NEWFLOWS_SQL)
+        conn.commit()
+        conn.close()
+
+        # The helpers read the database path from their module globals, point them at the scratch copy
+        for module in (database.alerts, database.localhosts, database.newflows):
+            module.CONST_CONSOLIDATED_DB = db_path
+
+        for name, pooled in (("per-call connect", False), ("pooled connection", True)):
+            database.core.connection_pool_enabled = pooled
+            close_pooled_connections()
+            start = time.perf_counter()
+            calls = run_helpers(ITERATIONS)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>18}: {calls} helper calls in {elapsed * 1000:.1f} ms ({elapsed * 1000000 / calls:.1f} us/call)")
+        close_pooled_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os
+import random
+import sys
+import time
+from pathlib import Path
+# Set up path for imports
+current_dir = Path(__file__).resolve().parent
+parent_dir = str(current_dir.parent)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+sys.path.insert(0, "/database")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from init import *
+from src.detectionengine import FlowView, run_detectors, run_detectors_parallel, shutdown_detection_pool
+from detect.detect_geolocation_flows import GeolocationFlowsDetector
+from detect.detect_reputation_flows import ReputationFlowsDetector
+from detect.detect_high_risk_ports import HighRiskPortDetector
+from detect.detect_vpn_traffic import VpnTrafficDetector
+from detect.detect_many_destinations import ManyDestinationsDetector
+from detect.detect_port_scanning import PortScanDetector
+from detect.detect_high_bandwidth_flows import HighBandwidthFlowDetector
+from detect.local_flows_detection import LocalFlowsDetector
+
+FLOW_COUNT = 50000
+RANGE_COUNT = 2000
+MAX_WORKERS = max(2, min(8, os.cpu_count() or 1))
+
+
+def build_cycle(flow_count):
+    """
+    Build a synthetic cycle of flows between local hosts and random remote addresses.
+
+    Args:
+        flow_count (int): Number of flows to build
+
+    Returns:
+        list: Flow records in the shape returned by get_new_flows
+    """
+    local_hosts = [f"192.168.1.{i}" for i in range(2, 60)]
+    rows = []
+    for _ in range(flow_count):
+        remote_ip = int_to_ip(random.randint(ip_to_int("1.0.0.0"), ip_to_int("223.255.255.255")))
+        rows.append((
+            random.choice(local_hosts), remote_ip, random.randint(32768, 60999), random.choice((22, 53, 80, 123, 443, 1194)), random.choice((6, 17)),
+            random.randint(1, 500), random.randint(64, 150000), "", "", "", 1, "", 0
+        ))
+    return rows
+
+
+def build_ranges(range_count):
+    """Build synthetic geolocation and reputation ranges spread across the address space."""
+    geolocation_data = []
+    reputation_data = []
+    for index in range(range_count):
+        start_ip = random.randint(ip_to_int("1.0.0.0"), ip_to_int("223.0.0.0"))
+        end_ip = start_ip + 255
+        network = f"{int_to_ip(start_ip)}/24"
+        geolocation_data.append((network, start_ip, end_ip, 24, "XX" if index % 2 else "YY"))
+        reputation_data.append((network, start_ip, end_ip, 24))
+    return geolocation_data, reputation_data
+
+
+def build_detectors(config_dict, geolocation_data, reputation_data):
+    """Return a fresh set of the CPU bound detectors."""
+    return [
+        GeolocationFlowsDetector(config_dict, geolocation_data),
+        ReputationFlowsDetector(config_dict, reputation_data),
+        HighRiskPortDetector(config_dict),
+        VpnTrafficDetector(config_dict),
+        ManyDestinationsDetector(config_dict),
+        PortScanDetector(config_dict),
+        HighBandwidthFlowDetector(config_dict),
+        LocalFlowsDetector(config_dict),
+    ]
+
+
+def main():
+    config_dict = get_config_settings()
+    config_dict['LocalNetworks'] = '192.168.1.0/24'
+    config_dict['BannedCountryList'] = 'XX'
+    # Level 0 keeps handle_alert out of the database so the timings cover detection only
+    for detector_key in ("GeolocationFlowsDetection", "ReputationListDetection", "HighRiskPortDetection", "VpnTrafficDetection",
+                         "ManyDestinationsDetection", "PortScanDetection", "HighBandwidthFlowDetection", "LocalFlowsDetection"):
+        config_dict[detector_key] = 0
+
+    rows = build_cycle(FLOW_COUNT)
+    geolocation_data, reputation_data = build_ranges(RANGE_COUNT)
+    flows = FlowView(rows, config_dict)
+
+    for worker_count in range(1, MAX_WORKERS + 1):
+        detectors = build_detectors(config_dict, geolocation_data, reputation_data)
+        if worker_count > 1:
+            # Warm the pool so process start up is not counted against the first cycle
+            run_detectors_parallel(flows, config_dict, build_detectors(config_dict, geolocation_data, reputation_data), None, worker_count)
+        start = time.perf_counter()
+        if worker_count == 1:
+            stats = run_detectors(flows, config_dict, detectors)
+        else:
+            stats = run_detectors_parallel(flows, config_dict, detectors, None, worker_count)
+        elapsed = time.perf_counter() - start
+        alerts = sum(detector_stats["alerts"] for detector_stats in stats.values())
+        print(f"{worker_count} worker(s): {len(rows)} flows through {len(detectors)} detectors in {elapsed * 1000:.1f} ms ({alerts} alerts)")
+
+    shutdown_detection_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import os
+import random
+import sys
+import time
+from pathlib import Path
+# Set up path for imports
+current_dir = Path(__file__).resolve().parent
+parent_dir = str(current_dir.parent)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+sys.path.insert(0, "/database")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from init import *
+from integrations.enrichment import load_ip_enrichment, get_ip_enrichment, get_enrichment_stats
+
+FLOW_COUNT = 50000
+REMOTE_COUNT = 2000
+
+
+def main():
+    remote_hosts = [int_to_ip(random.randint(ip_to_int("1.0.0.0"), ip_to_int("223.255.255.255"))) for _ in range(REMOTE_COUNT)]
+    destinations = [random.choice(remote_hosts) for _ in range(FLOW_COUNT)]
+
+    for name, func in (("uncached", load_ip_enrichment), ("cached", get_ip_enrichment)):
+        start = time.perf_counter()
+        for ip_address in destinations:
+            func(ip_address)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>9}: {len(destinations)} flows to {REMOTE_COUNT} remotes in {elapsed * 1000:.1f} ms ({elapsed / len(destinations) * 1e6:.1f} us per flow)")
+
+    print(f"    stats: {get_enrichment_stats()['ip']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+# Set up path for imports
+current_dir = Path(__file__).resolve().parent
+parent_dir = str(current_dir.parent)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+sys.path.insert(0, "/database")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from init import *
+from integrations.geolocation import GeolocationIndex
+
+RANGE_COUNT = 300000
+LOOKUP_COUNT = 50000
+LINEAR_LOOKUP_COUNT = 200
+BANNED_COUNTRIES = {"XX", "YY"}
+
+
+def build_ranges(range_count):
+    """
+    Build disjoint /24 ranges spread across the address space, the shape of a MaxMind country import.
+
+    Args:
+        range_count (int): Number of ranges to build
+
+    Returns:
+        list: Rows of (network, start_ip, end_ip, netmask, country_name)
+    """
+    countries = ["XX", "YY"] + [f"C{i}" for i in range(200)]
+    blocks = random.sample(range(ip_to_int("1.0.0.0") >> 8, ip_to_int("223.255.255.0") >> 8), range_count)
+    rows = []
+    for block in blocks:
+        start_ip = block << 8
+        rows.append((f"{int_to_ip(start_ip)}/24", start_ip, start_ip + 255, 0xFFFFFF00, random.choice(countries)))
+    return rows
+
+
+def linear_lookup(geo_ranges, ip_int):
+    """The previous per-address scan over the sorted banned country ranges."""
+    best_match = None
+    best_netmask = -1
+    for start_ip, end_ip, netmask, country in geo_ranges:
+        if start_ip <= ip_int <= end_ip:
+            if netmask > best_netmask:
+                best_match = country
+                best_netmask = netmask
+        elif start_ip > ip_int:
+            break
+    return best_match
+
+
+def main():
+    rows = build_ranges(RANGE_COUNT)
+    ip_ints = [random.choice(rows)[1] + random.randint(0, 255) if random.random() < 0.5 else random.randint(1, 2**32 - 1)
+               for _ in range(LOOKUP_COUNT)]
+
+    geo_ranges = sorted(((row[1], row[2], row[3], row[4]) for row in rows if row[4] in BANNED_COUNTRIES), key=lambda x: x[0])
+    start = time.perf_counter()
+    for ip_int in ip_ints[:LINEAR_LOOKUP_COUNT]:
+        linear_lookup(geo_ranges, ip_int)
+    linear_us = (time.perf_counter() - start) / LINEAR_LOOKUP_COUNT * 1e6
+    print(f"  linear scan: {len(geo_ranges)} banned ranges, {linear_us:.1f} us per lookup")
+
+    start = time.perf_counter()
+    index = GeolocationIndex(rows)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    tracemalloc.start()
+    retained = GeolocationIndex(rows)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  index build: {len(rows)} ranges into {len(index)} intervals in {build_ms:.1f} ms, {current / 1024:.0f} KiB retained")
+
+    start = time.perf_counter()
+    for ip_int in ip_ints:
+        index.lookup(ip_int)
+    single_us = (time.perf_counter() - start) / len(ip_ints) * 1e6
+
+    start = time.perf_counter()
+    index.lookup_many(ip_ints)
+    batch_us = (time.perf_counter() - start) / len(ip_ints) * 1e6
+    print(f"index lookups: {single_us:.2f} us per lookup, {batch_us:.2f} us per address in lookup_many")
+
+
+if __name__ == "__main__":
+    main()
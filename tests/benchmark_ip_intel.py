@@ -0,0 +1,101 @@
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+# Set up path for imports
+current_dir = Path(__file__).resolve().parent
+parent_dir = str(current_dir.parent)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+sys.path.insert(0, "/database")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from init import *
+from integrations.ipintel import compile_ip_intel_file, IpIntelFile
+
+RANGE_COUNT = 300000
+LOOKUP_COUNT = 20000
+SQL_LOOKUP_COUNT = 200
+
+
+def build_ranges(range_count):
+    """
+    Build disjoint /24 geolocation and ASN ranges spread across the address space.
+
+    Args:
+        range_count (int): Number of ranges to build
+
+    Returns:
+        tuple: (geolocation_data, asn_records)
+    """
+    blocks = random.sample(range(ip_to_int("1.0.0.0") >> 8, ip_to_int("223.255.255.0") >> 8), range_count)
+    geolocation_data = []
+    asn_records = []
+    for block in blocks:
+        start_ip = block << 8
+        network = f"{int_to_ip(start_ip)}/24"
+        geolocation_data.append((network, start_ip, start_ip + 255, 0xFFFFFF00, f"Country {block % 200}"))
+        asn_records.append({"network": network, "start_ip": start_ip, "end_ip": start_ip + 255, "netmask": 24,
+                            "asn": str(block % 60000), "isp_name": f"ISP {block % 60000}"})
+    return geolocation_data, asn_records
+
+
+def build_sqlite(db_path, geolocation_data, asn_records):
+    """Load the same ranges into geolocation and ipasn tables shaped like the consolidated database."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE geolocation (network TEXT PRIMARY KEY, start_ip INTEGER, end_ip INTEGER, netmask INTEGER, country_name TEXT)")
+    conn.execute("CREATE TABLE ipasn (network TEXT PRIMARY KEY, start_ip INTEGER, end_ip INTEGER, netmask INTEGER, asn TEXT, isp_name TEXT)")
+    conn.execute("CREATE INDEX idx_ipasn_ip_range ON ipasn (start_ip, end_ip)")
+    conn.execute("CREATE TABLE reputationlist (network TEXT PRIMARY KEY, start_ip INTEGER, end_ip INTEGER, netmask INTEGER)")
+    conn.execute("CREATE TABLE tornodes (ip_address TEXT PRIMARY KEY, import_date TEXT)")
+    conn.executemany("INSERT INTO geolocation VALUES (?, ?, ?, ?, ?)", geolocation_data)
+    conn.executemany("INSERT INTO ipasn VALUES (:network, :start_ip, :end_ip, :netmask, :asn, :isp_name)", asn_records)
+    conn.commit()
+    conn.close()
+
+
+def main():
+    geolocation_data, asn_records = build_ranges(RANGE_COUNT)
+    ip_ints = [random.randint(ip_to_int("1.0.0.0"), ip_to_int("223.255.255.255")) for _ in range(LOOKUP_COUNT)]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "consolidated.db")
+        intel_path = os.path.join(temp_dir, "ipintel.bin")
+        build_sqlite(db_path, geolocation_data, asn_records)
+
+        # One connection per lookup, as get_country_by_ip_int and get_asn_for_ip did
+        start = time.perf_counter()
+        for ip_int in ip_ints[:SQL_LOOKUP_COUNT]:
+            conn = sqlite3.connect(db_path)
+            conn.execute("SELECT country_name FROM geolocation WHERE ? BETWEEN start_ip AND end_ip LIMIT 1", (ip_int,)).fetchone()
+            conn.execute("SELECT asn, isp_name, network FROM ipasn WHERE ? BETWEEN start_ip AND end_ip LIMIT 1", (ip_int,)).fetchone()
+            conn.close()
+        sql_us = (time.perf_counter() - start) / SQL_LOOKUP_COUNT * 1e6
+        print(f" sqlite: {sql_us:.1f} us per address (country and ASN)")
+
+        del geolocation_data, asn_records
+        tracemalloc.start()
+        start = time.perf_counter()
+        ranges = compile_ip_intel_file("benchmark", intel_path, db_path)
+        compile_s = time.perf_counter() - start
+        compile_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        ip_intel = IpIntelFile(intel_path)
+        open_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for ip_int in ip_ints:
+            ip_intel.lookup(ip_int)
+        mmap_us = (time.perf_counter() - start) / len(ip_ints) * 1e6
+        print(f"   mmap: {mmap_us:.1f} us per address (all attributes), {ranges} ranges compiled in {compile_s:.1f} s "
+              f"with a {compile_peak / 1048576:.1f} MiB Python heap peak, {os.path.getsize(intel_path) / 1048576:.1f} MiB file opened in {open_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+import random
+import struct
+import sys
+import time
+from pathlib import Path
+# Set up path for imports
+current_dir = Path(__file__).resolve().parent
+parent_dir = str(current_dir.parent)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+sys.path.insert(0, "/database")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from init import *
+from src.netflow import parse_netflow_v5_header, parse_netflow_v5_record, parse_netflow_v5_batch
+
+RECORDS_PER_PACKET = 30
+PACKET_COUNT = 2000
+
+
+def build_netflow_v5_packets(packet_count, records_per_packet):
+    """
+    Build synthetic NetFlow v5 datagrams with a realistic mix of repeating hosts.
+
+    Args:
+        packet_count (int): Number of datagrams to build
+        records_per_packet (int): Number of 48-byte records per datagram
+
+    Returns:
+        list: List of (data, addr) tuples in the same shape as netflow_queue entries
+    """
+    local_hosts = [ip_to_int(f"192.168.1.{i}") for i in range(2, 60)]
+    remote_hosts = [ip_to_int(f"203.0.113.{i}") for i in range(1, 250)]
+    packets = []
+    for sequence in range(packet_count):
+        header = struct.pack('!HHIIIIBBH', 5, records_per_packet, 0, 0, 0, sequence, 0, 0, 0)
+        records = []
+        for _ in range(records_per_packet):
+            records.append(struct.pack(
+                '!IIIHHIIIIHHBBBBHHBBH',
+                random.choice(local_hosts), random.choice(remote_hosts), 0, 1, 2,
+                random.randint(1, 500), random.randint(64, 150000), 1000, 2000,
+                random.randint(32768, 60999), random.choice((53, 80, 123, 443)),
+                0, 0x18, 6, 0, 0, 0, 24, 24, 0
+            ))
+        packets.append((header + b"".join(records), ("192.168.1.1", 2055)))
+    return packets
+
+
+def benchmark_per_record(packets):
+    """Decode packets with the original one-dict-per-record path."""
+    flows = 0
+    for data, addr in packets:
+        version, count, *header_fields = parse_netflow_v5_header(data)
+        offset = 24
+        for _ in range(count):
+            parse_netflow_v5_record(data, offset)
+            offset += 48
+            flows += 1
+    return flows
+
+
+def benchmark_batch(packets):
+    """Decode packets with the columnar batch path."""
+    return len(parse_netflow_v5_batch(packets)['src_ip'])
+
+
+def main():
+    packets = build_netflow_v5_packets(PACKET_COUNT, RECORDS_PER_PACKET)
+
+    for name, func in (("per-record", benchmark_per_record), ("batch", benchmark_batch)):
+        start = time.perf_counter()
+        flows = func(packets)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>10}: {flows} records in {elapsed * 1000:.1f} ms ({flows / elapsed:,.0f} records/second)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import os
+import random
+import sys
+import time
+from pathlib import Path
+# Set up path for imports
+current_dir = Path(__file__).resolve().parent
+parent_dir = str(current_dir.parent)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+sys.path.insert(0, "/database")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from init import *
+from integrations.reputation import ReputationIndex
+
+NETWORK_COUNT = 4500
+LOOKUP_COUNT = 50000
+LINEAR_LOOKUP_COUNT = 2000
+
+
+def build_networks(network_count):
+    """
+    Build a firehol level1 shaped list, mostly small networks with some large ones overlapping them.
+
+    Args:
+        network_count (int): Number of networks to build
+
+    Returns:
+        list: Rows of (network, start_ip, end_ip, netmask)
+    """
+    rows = []
+    for _ in range(network_count):
+        prefix = random.choice((8, 12, 16, 20, 22, 24, 24, 24, 32, 32))
+        start_ip = random.randint(ip_to_int("1.0.0.0"), ip_to_int("223.255.255.255")) & (0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF
+        rows.append((f"{int_to_ip(start_ip)}/{prefix}", start_ip, start_ip + (1 << (32 - prefix)) - 1, prefix))
+    return rows
+
+
+def linear_match(reputation_ranges, ip_int):
+    """The previous per-address walk over ranges sorted by network string."""
+    for network, start_ip, end_ip, netmask in reputation_ranges:
+        if start_ip <= ip_int <= end_ip:
+            return (True, network)
+        elif start_ip > ip_int:
+            break
+    return (False, None)
+
+
+def main():
+    rows = build_networks(NETWORK_COUNT)
+    ip_ints = [random.randint(ip_to_int("1.0.0.0"), ip_to_int("223.255.255.255")) for _ in range(LOOKUP_COUNT)]
+
+    start = time.perf_counter()
+    reputation_ranges = sorted(rows, key=lambda x: x[0])
+    for ip_int in ip_ints[:LINEAR_LOOKUP_COUNT]:
+        linear_match(reputation_ranges, ip_int)
+    linear_us = (time.perf_counter() - start) / LINEAR_LOOKUP_COUNT * 1e6
+    print(f"linear walk: {len(rows)} networks, {linear_us:.1f} us per lookup")
+
+    start = time.perf_counter()
+    index = ReputationIndex(rows)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    matches = sum(1 for ip_int in ip_ints if index.lookup(ip_int))
+    index_us = (time.perf_counter() - start) / len(ip_ints) * 1e6
+    print(f"      index: {len(index)} intervals built in {build_ms:.1f} ms, {index_us:.2f} us per lookup ({matches} matches)")
+
+
+if __name__ == "__main__":
+    main()
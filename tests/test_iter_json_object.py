@@ -0,0 +1,60 @@
+import io
+import json
+import os
+import sys
+from pathlib import Path
+# Set up path for imports
+current_dir = Path(__file__).resolve().parent
+parent_dir = str(current_dir.parent)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+sys.path.insert(0, "/database")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from init import *
+from integrations.ipasn import iter_json_object
+
+CHUNK_SIZES = (1, 2, 3, 4, 5, 7, 8, 16, 64)
+
+DOCUMENTS = [
+    '{}',
+    ' { } ',
+    '{"a": 1.5, "b": 2}',
+    '{"a": -2.5e10, "b": 1e5, "c": 1E-7, "d": 0.25, "e": -0, "f": 123456789}',
+    '{"a": true, "b": false, "c": null, "d": "", "e": "x\\"y\\\\z\\u00e9"}',
+    '{\n  "13335": {"ipv4": ["1.0.0.0/24", "1.1.1.0/24"], "organization": {"name": "Cloudflare, Inc.", "country": "US"}},\n'
+    '  "15169": {"ipv4": [], "organization": {"name": "Google LLC"}, "weight": 3.75e2},\n'
+    '  "0": [1, 2.5, [3e3, {"k": -4.125}]]\n}',
+]
+
+MALFORMED = ['', '[1, 2]', '{"a": 1', '{"a" 1}', '{"a": 1 "b": 2}', '{"a": 1.}']
+
+
+def test_matches_json_loads():
+    """Every chunk size yields exactly the members json.loads produces, in order."""
+    for document in DOCUMENTS:
+        expected = list(json.loads(document).items())
+        for chunk_size in CHUNK_SIZES:
+            parsed = list(iter_json_object(io.StringIO(document), chunk_size))
+            assert parsed == expected, f"chunk size {chunk_size}: {parsed!r} != {expected!r} for {document!r}"
+
+
+def test_rejects_malformed():
+    """Malformed documents raise JSONDecodeError whatever the chunk size."""
+    for document in MALFORMED:
+        for chunk_size in CHUNK_SIZES:
+            try:
+                list(iter_json_object(io.StringIO(document), chunk_size))
+            except json.JSONDecodeError:
+                continue
+            raise AssertionError(f"chunk size {chunk_size}: {document!r} was accepted")
+
+
+def main():
+    test_matches_json_loads()
+    test_rejects_malformed()
+    print(f"iter_json_object matches json.loads for {len(DOCUMENTS)} documents at chunk sizes {', '.join(map(str, CHUNK_SIZES))}")
+
+
+if __name__ == "__main__":
+    main()
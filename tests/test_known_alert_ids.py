@@ -0,0 +1,96 @@
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+# Set up path for imports
+current_dir = Path(__file__).resolve().parent
+parent_dir = str(current_dir.parent)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+sys.path.insert(0, "/database")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from init import *
+import database.alerts
+import database.localhosts
+from database.core import close_pooled_connections
+from detect.detect_new_outbound_connections import KnownAlertIds
+
+SUFFIX = "_NewOutboundDetection"
+
+
+def alert_id(name):
+    return f"192.168.1.10_{name}_6_443{SUFFIX}"
+
+
+def insert_alert(db_path, name):
+    """Insert an alert row the way log_alert_to_db does and return its rowid."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.execute(
+        "INSERT INTO alerts (id, ip_address, flow, category, times_seen, first_seen, last_seen) VALUES (?, '192.168.1.10', '[]', 'NewOutboundDetection', 1, '', '')",
+        (alert_id(name),)
+    )
+    conn.commit()
+    rowid = cursor.lastrowid
+    conn.close()
+    return rowid
+
+
+def create_database(temp_dir):
+    """Create a scratch database with the alerts and configuration tables and point the helpers at it."""
+    db_path = os.path.join(temp_dir, "consolidated.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript(CONST_CREATE_ALERTS_SQL)
+    conn.executescript(CONST_CREATE_CONFIG_SQL)
+    conn.commit()
+    conn.close()
+    for module in (database.alerts, database.localhosts):
+        module.CONST_CONSOLIDATED_DB = db_path
+    return db_path
+
+
+def test_delete_newest_then_insert():
+    """A deleted newest alert whose rowid is reused by the next insert is forgotten, and the new one learned."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = create_database(temp_dir)
+        for name in ("a", "b", "c"):
+            insert_alert(db_path, name)
+        known = KnownAlertIds(SUFFIX)
+        assert known.refresh()
+        assert alert_id("c") in known
+
+        assert delete_alert_database(alert_id("c"))
+        assert insert_alert(db_path, "d") == 3, "SQLite is expected to reuse the deleted newest rowid"
+        assert known.refresh()
+        assert alert_id("d") in known
+        assert alert_id("c") not in known
+        assert alert_id("a") in known and alert_id("b") in known
+        close_pooled_connections()
+
+
+def test_delete_by_ip_then_insert():
+    """Alerts deleted with their host are forgotten even when the row count ends up unchanged."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = create_database(temp_dir)
+        insert_alert(db_path, "a")
+        known = KnownAlertIds(SUFFIX)
+        assert known.refresh()
+
+        success, count = database.localhosts.delete_alerts_by_ip("192.168.1.10")
+        assert success and count == 1
+        insert_alert(db_path, "b")
+        assert known.refresh()
+        assert alert_id("b") in known
+        assert alert_id("a") not in known
+        close_pooled_connections()
+
+
+def main():
+    test_delete_newest_then_insert()
+    test_delete_by_ip_then_insert()
+    print("KnownAlertIds follows deletes followed by inserts that reuse rowids")
+
+
+if __name__ == "__main__":
+    main()